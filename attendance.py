@@ -0,0 +1,134 @@
+# # attendance.py
+"""
+Infer which sessions each attendee sat through from their badge scans.
+
+Scans become presence intervals (first → last scan of a day, optionally split
+at long gaps). Each interval is matched against the time-sorted session
+blocks with searchsorted, so the whole roster is credited in one pass.
+"""
+import numpy as np
+import pandas as pd
+
+from conference import conference_sessions, sessions
+from metrics import timed
+
+MIN_FRACTION = 0.8      # share of a block that must be covered by default
+
+
+# ─── Intervals ───────────────────────────────────────────────────────────────
+def presence_intervals(scans: pd.DataFrame, max_gap_minutes: float | None = None) -> pd.DataFrame:
+    """
+    Scan frame (badge_id, timestamp) → one row per presence interval
+    (badge_id, start, end). Scans on different days never share an interval;
+    with max_gap_minutes set, a longer gap between scans also starts a new one.
+    """
+    s = scans[["badge_id", "timestamp"]].sort_values(["badge_id", "timestamp"], kind="stable")
+    ts = s["timestamp"]
+    new = (s["badge_id"].ne(s["badge_id"].shift())
+           | ts.dt.normalize().ne(ts.dt.normalize().shift()))
+    if max_gap_minutes is not None:
+        new |= ts.diff() > pd.Timedelta(minutes=max_gap_minutes)
+    return s.groupby(new.cumsum().rename("interval")) \
+            .agg(badge_id=("badge_id", "first"),
+                 start=("timestamp", "min"),
+                 end=("timestamp", "max")) \
+            .reset_index(drop=True)
+
+
+def session_blocks(blocks: list[dict] = conference_sessions) -> pd.DataFrame:
+    """Timed blocks sorted by start (start, end, title)."""
+    df = pd.DataFrame(blocks)
+    df["start"] = pd.to_datetime(df["start"])
+    df["end"]   = pd.to_datetime(df["end"])
+    return df.sort_values("start", kind="stable").reset_index(drop=True)
+
+
+# ─── Crediting ───────────────────────────────────────────────────────────────
+def block_credits(intervals: pd.DataFrame, blocks: pd.DataFrame,
+                  min_minutes: float | None = None,
+                  min_fraction: float = MIN_FRACTION) -> pd.DataFrame:
+    """
+    Overlap of every interval with every block it touches.
+    A block is credited when the overlap reaches min_minutes, or, if that is
+    not given, min_fraction of the block's length.
+    Returns badge_id, block (row in blocks), overlap_minutes, credited.
+    """
+    b_start = blocks["start"].to_numpy()
+    b_end   = blocks["end"].to_numpy()
+    i_start = intervals["start"].to_numpy()
+    i_end   = intervals["end"].to_numpy()
+
+    # blocks are sorted and disjoint, so ends are sorted too: the blocks an
+    # interval touches are the contiguous run [lo, hi)
+    lo = np.searchsorted(b_end, i_start, side="right")
+    hi = np.searchsorted(b_start, i_end, side="left")
+    n  = np.maximum(hi - lo, 0)
+
+    row   = np.repeat(np.arange(len(intervals)), n)
+    block = np.repeat(lo, n) + (np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n))
+
+    overlap = (np.minimum(i_end[row], b_end[block])
+               - np.maximum(i_start[row], b_start[block])) / np.timedelta64(1, "m")
+
+    out = pd.DataFrame({
+        "badge_id":        intervals["badge_id"].to_numpy()[row],
+        "block":           block,
+        "overlap_minutes": overlap,
+    })
+    # a badge may have several intervals touching the same block
+    out = out.groupby(["badge_id", "block"], as_index=False)["overlap_minutes"].sum()
+    out["credited"] = out["overlap_minutes"] >= _required_minutes(
+        out["block"], blocks, min_minutes, min_fraction)
+    return out
+
+
+def _required_minutes(block: pd.Series, blocks: pd.DataFrame,
+                      min_minutes: float | None, min_fraction: float) -> np.ndarray:
+    """Minutes of overlap each block requires under the given rule."""
+    if min_minutes is not None:
+        return np.full(len(block), float(min_minutes))
+    length = (blocks["end"] - blocks["start"]).dt.total_seconds().to_numpy() / 60
+    return length[block.to_numpy()] * min_fraction
+
+
+@timed("attendance.credited_sessions")
+def credited_sessions(scans: pd.DataFrame, ce_sessions: list[dict] = sessions,
+                      min_minutes: float | None = None,
+                      min_fraction: float = MIN_FRACTION,
+                      max_gap_minutes: float | None = None) -> dict[int, list[dict]]:
+    """
+    badge_id → CE sessions earned. A CE session spanning several blocks is
+    credited only when every one of its blocks is.
+    """
+    blocks = session_blocks()
+    if scans.empty:
+        return {}
+    credits = block_credits(presence_intervals(scans, max_gap_minutes), blocks,
+                            min_minutes, min_fraction)
+    credits = credits[credits["credited"]]
+
+    start_of = blocks["start"].dt.strftime("%Y-%m-%d %H:%M").to_numpy()
+    have = set(zip(credits["badge_id"].tolist(), start_of[credits["block"].to_numpy()]))
+    earned: dict[int, list[dict]] = {}
+    for bid in credits["badge_id"].unique().tolist():
+        got = [s for s in ce_sessions if all((bid, b) in have for b in s["blocks"])]
+        if got:
+            earned[int(bid)] = got
+    return earned
+
+
+# ─── Outputs ─────────────────────────────────────────────────────────────────
+def attendance_sheet(earned: dict[int, list[dict]], attendees: list[dict],
+                     ce_sessions: list[dict] = sessions) -> pd.DataFrame:
+    """Wide ✅ sheet (Badge ID | Name | Email | <session>...) for save_ce_report."""
+    titles = [s["title"] for s in ce_sessions]
+    rows = []
+    for a in attendees:
+        got = {s["title"] for s in earned.get(int(a["badge_id"]), [])}
+        rows.append({
+            "Badge ID": int(a["badge_id"]),
+            "Name":     a["name"],
+            "Email":    a["email"],
+            **{t: "✅" if t in got else "" for t in titles},
+        })
+    return pd.DataFrame(rows, columns=["Badge ID", "Name", "Email", *titles])
@@ -0,0 +1,237 @@
+# # attendee_search.py
+"""
+In-memory attendee search over name, email and badge id.
+
+Each word of a name or email (lower-cased, accents folded) is indexed under
+every one of its prefixes, the badge id under the prefixes of its digits,
+and the name and email-user words under their trigrams. A query is answered from those posting
+sets alone: attendees with a word starting with each query word rank first,
+then typo-tolerant matches by shared trigrams. Rows are added, replaced or
+removed one at a time, so a registration never rebuilds the index.
+
+Within a rank, matches come in name order from a sorted list kept beside
+the postings, so a one-letter query that matches half the roster still
+only looks at the first few names.
+"""
+import bisect
+import heapq
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+MAX_PREFIX     = 12      # longer query words are looked up by their first 12 characters
+MIN_SIMILARITY = 0.3     # share of the query's trigrams a fuzzy match must have
+
+_SPLIT = re.compile(r"[\W_]+")
+
+
+def normalize(text) -> str:
+    """Lower-case and strip accents: 'José' → 'jose'."""
+    text = str(text or "")
+    if text.isascii():
+        return text.lower()
+    text = unicodedata.normalize("NFKD", text).casefold()
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def words(text) -> list[str]:
+    return [w for w in _SPLIT.split(normalize(text)) if w]
+
+
+@lru_cache(maxsize=65536)
+def prefixes(word: str) -> frozenset:
+    return frozenset(word[:k] for k in range(1, min(len(word), MAX_PREFIX) + 1))
+
+
+@lru_cache(maxsize=65536)
+def trigrams(word: str) -> frozenset:
+    padded = f" {word} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class _Entry:
+    __slots__ = ("row", "key", "sort", "name_words", "all_words", "name_keys", "keys", "grams")
+
+    def __init__(self, row: dict, key: tuple):
+        name_words      = words(key[0])
+        user, _, domain = key[1].partition("@")
+        fuzzy_words     = set(name_words) | set(words(user))
+        self.row        = row
+        self.key        = key
+        self.sort       = (" ".join(name_words), key[2])
+        self.name_words = name_words
+        self.all_words  = fuzzy_words | set(words(domain)) | {str(key[2])}
+        self.name_keys  = frozenset().union(*map(prefixes, name_words))
+        self.keys       = frozenset().union(*map(prefixes, self.all_words))
+        self.grams      = frozenset().union(*map(trigrams, fuzzy_words))
+
+
+class AttendeeIndex:
+    def __init__(self, rows=()):
+        self._lock     = threading.Lock()
+        self._entries: dict[int, _Entry] = {}
+        self._prefix   = defaultdict(set)        # prefix of any word → badges
+        self._names    = defaultdict(set)        # prefix of a name word → badges
+        self._grams    = defaultdict(set)        # trigram → badges
+        self._order: list[tuple[str, int]] = []  # (normalized name, badge), sorted
+        self.add_many(rows)
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ─── Updating ─────────────────────────────────────────────────────────
+    def add(self, row: dict):
+        """Index one attendee row, replacing an older version of the same badge."""
+        with self._lock:
+            self._add(row)
+
+    def add_many(self, rows):
+        with self._lock:
+            bulk = not self._entries                 # empty: append now, sort once at the end
+            for row in rows:
+                self._add(row, sort=not bulk)
+            if bulk:
+                self._order.sort()
+
+    def remove(self, badge_id: int):
+        with self._lock:
+            self._remove(int(badge_id))
+
+    def sync(self, rows: list[dict]):
+        """Bring the index in line with a fresh roster: only changed rows are re-indexed."""
+        with self._lock:
+            seen = set()
+            for row in rows:
+                seen.add(int(row["badge_id"]))
+                self._add(row)
+            for badge in [b for b in self._entries if b not in seen]:
+                self._remove(badge)
+
+    def _add(self, row: dict, sort: bool = True):
+        badge = int(row["badge_id"])
+        key = (row.get("name") or "", row.get("email") or "", badge)
+        old = self._entries.get(badge)
+        if old is not None and old.key == key:
+            old.row = row
+            return
+        if old is not None:
+            self._remove(badge)
+        entry = self._entries[badge] = _Entry(row, key)
+        for index, keys in self._postings(entry):
+            for k in keys:
+                index[k].add(badge)
+        if sort:
+            bisect.insort(self._order, entry.sort)
+        else:
+            self._order.append(entry.sort)
+
+    def _remove(self, badge: int):
+        entry = self._entries.pop(badge, None)
+        if entry is None:
+            return
+        for index, keys in self._postings(entry):
+            for k in keys:
+                index[k].discard(badge)
+                if not index[k]:
+                    del index[k]
+        i = bisect.bisect_left(self._order, entry.sort)
+        if i < len(self._order) and self._order[i] == entry.sort:
+            del self._order[i]
+        else:                                        # mid-way through a bulk load
+            self._order.remove(entry.sort)
+
+    def _postings(self, entry: _Entry):
+        return ((self._prefix, entry.keys), (self._names, entry.name_keys),
+                (self._grams, entry.grams))
+
+    # ─── Searching ────────────────────────────────────────────────────────
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """Best matches for `query` (name, email or badge id), best first."""
+        q = words(query)
+        if not q or limit < 1:
+            return []
+        with self._lock:
+            ranked = self._ranked(q, limit) or self._fuzzy(q, limit)
+            return [self._entries[b].row for b in ranked]
+
+    def _matching(self, index: dict, q: list[str]) -> set[int]:
+        """Badges with, for every query word, a word that starts with it."""
+        hits = None
+        for w in sorted(q, key=len, reverse=True):       # longest word: smallest posting
+            # the first posting is the index's own set: read it, never change it
+            posting = index.get(w[:MAX_PREFIX])
+            if not posting:
+                return set()
+            hits = posting if hits is None else hits & posting
+            if not hits:
+                return hits
+        long = [w for w in q if len(w) > MAX_PREFIX]
+        if long:
+            hits = {b for b in hits
+                    if all(any(x.startswith(w) for x in self._entries[b].all_words) for w in long)}
+        return hits
+
+    def _ranked(self, q: list[str], limit: int) -> list[int]:
+        """
+        Prefix matches in rank order: the badge number itself, names that read
+        as typed, names containing every word, then email/badge prefixes.
+        """
+        hits = self._matching(self._prefix, q)
+        if not hits:
+            return []
+        phrase = " ".join(q)
+        out = [int(phrase)] if phrase.isdigit() and int(phrase) in hits else []
+
+        # names starting with the phrase are one contiguous run of _order
+        i = bisect.bisect_left(self._order, (phrase,))
+        while len(out) < limit and i < len(self._order) and self._order[i][0].startswith(phrase):
+            if self._order[i][1] not in out:
+                out.append(self._order[i][1])
+            i += 1
+
+        in_name = self._matching(self._names, q)
+        out += self._first_by_name(in_name, len(in_name), set(out), limit - len(out))
+        out += self._first_by_name(hits, len(hits) - len(in_name), in_name.union(out),
+                                   limit - len(out))
+        return out
+
+    def _first_by_name(self, badges: set[int], size: int, skip: set[int], limit: int) -> list[int]:
+        """The first `limit` of badges-minus-skip (about `size` of them) in name order."""
+        if limit <= 0 or size <= 0:
+            return []
+        if size * 16 < len(self._order):                 # few: sort them
+            return [b for _, b in sorted(self._entries[b].sort for b in badges
+                                         if b not in skip)[:limit]]
+        out = []                                         # many: walk the roster in name order
+        for _, b in self._order:
+            if b in badges and b not in skip:
+                out.append(b)
+                if len(out) == limit:
+                    break
+        return out
+
+    def _fuzzy(self, q: list[str], limit: int) -> list[int]:
+        """
+        Typo-tolerant matches when nothing matches by prefix: most shared
+        trigrams, then closest name. Trigrams found in more than an eighth
+        of the roster ("son", "an ") say little and are not counted.
+        """
+        qgrams = frozenset().union(*map(trigrams, q))
+        common = max(64, len(self._entries) // 8)
+        shared = Counter()
+        for g in qgrams:
+            posting = self._grams.get(g)
+            if posting and len(posting) <= common:
+                shared.update(posting)
+        need = MIN_SIMILARITY * len(qgrams)
+        top = heapq.nlargest(limit * 4, (b for b, n in shared.items() if n >= need),
+                             key=shared.__getitem__)
+
+        def closeness(b):
+            name = frozenset().union(*map(trigrams, self._entries[b].name_words))
+            both = len(qgrams & name)
+            return -shared[b], -both / (len(qgrams) + len(name) - both), self._entries[b].sort
+
+        return sorted(top, key=closeness)[:limit]
@@ -0,0 +1,764 @@
+# # backends.py
+"""
+Storage backends behind database.py.
+
+    STORAGE_BACKEND=rest       Supabase REST client (default)
+    STORAGE_BACKEND=postgres   direct Postgres: pooled connections, prepared
+                               statements, COPY for bulk loads and exports
+    STORAGE_BACKEND=sqlite     self-contained SQLite (SQLITE_PATH, default
+                               in-memory) for tests and local runs
+
+Every backend speaks the same small set of primitives; caching, queuing,
+debouncing and report shaping stay in database.py. The REST and Postgres
+backends rely on the functions in migrations/; the SQLite backend implements
+the same contracts itself.
+"""
+from __future__ import annotations
+
+import abc
+import csv
+import datetime
+import io
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from zoneinfo import ZoneInfo
+
+BACKENDS = ("rest", "postgres", "sqlite")
+
+SCAN_SLOTS = 10      # scan1..scanN in attendee_scan_slots
+PG_INT     = (-2**31, 2**31 - 1)   # a Postgres integer's range: an open badge bound
+
+# listed, not "*": the tables' shape changes under migrations (007 drops scan1..10)
+ATTENDEE_COLUMNS = ("badge_id", "name", "email")
+SLOT_COLUMNS     = (*ATTENDEE_COLUMNS, *(f"scan{i}" for i in range(1, SCAN_SLOTS + 1)), "scan_count")
+
+
+class StorageBackend(abc.ABC):
+    """Primitive operations database.py needs from a store."""
+
+    name = "base"
+
+    # attendees
+    @abc.abstractmethod
+    def insert_attendees(self, rows: list[dict]):
+        """Insert {badge_id, name, email} rows."""
+
+    @abc.abstractmethod
+    def fetch_attendees(self) -> list[dict]:
+        """Every attendee row, ordered by badge_id."""
+
+    @abc.abstractmethod
+    def reserve_badge_ids(self, count: int) -> int:
+        """Reserve `count` consecutive badge ids; return the first."""
+
+    @abc.abstractmethod
+    def query_attendees(self, term: str, badge_min: int | None, badge_max: int | None,
+                        offset: int, limit: int) -> tuple[list[dict], int]:
+        """One page of attendees whose name or email contains `term`, plus the total."""
+
+    # scans
+    @abc.abstractmethod
+    def log_scan(self, badge_id: int, ts_iso: str, key: str | None) -> int | None:
+        """log_scan contract: slot 1..10, 0 past the tenth scan, -1 repeat, None unknown badge."""
+
+    def log_scans(self, events: list[dict]) -> list[dict]:
+        """Batch form: events {badge_id, timestamp, key} → [{badge_id, timestamp, slot}]."""
+        return [{"badge_id": e["badge_id"], "timestamp": e["timestamp"],
+                 "slot": self.log_scan(e["badge_id"], e["timestamp"], e.get("key"))}
+                for e in sorted(events, key=lambda e: _utc_iso(e["timestamp"]))]
+
+    @abc.abstractmethod
+    def fetch_scan_slots(self) -> list[dict]:
+        """attendee_scan_slots: {badge_id, name, email, scan1..scan10, scan_count} by badge."""
+
+    @abc.abstractmethod
+    def fetch_scans_after(self, last_id: int, limit: int, badge_min: int | None = None,
+                          badge_max: int | None = None) -> list[dict]:
+        """
+        scanlog rows (id, badge_id, timestamp as ISO text) with id > last_id, by
+        id; only badges in [badge_min, badge_max] when either bound is given.
+        """
+
+    @abc.abstractmethod
+    def fetch_badge_scans(self, badge_id: int) -> list[dict]:
+        """scanlog rows (id, badge_id, timestamp as ISO text) of one badge, by time."""
+
+    @abc.abstractmethod
+    def query_scan_log(self, start_iso: str | None, end_iso: str | None,
+                       badge_min: int | None, badge_max: int | None,
+                       offset: int, limit: int) -> tuple[list[dict], int]:
+        """One page of scans in [start, end), newest first, plus the total."""
+
+    @abc.abstractmethod
+    def query_punch_report(self, tz: str, start_iso: str | None, end_iso: str | None,
+                           badge_min: int | None, badge_max: int | None, term: str,
+                           missed_only: bool, offset: int, limit: int) -> tuple[list[dict], int]:
+        """
+        One page of punch_report (migrations/009_punch_report.sql): {badge_id,
+        name, email, day, check_in, check_out} per badge and day in tz, by day
+        then badge, plus the total.
+        """
+
+    def copy_scans_out(self, out, tz: str) -> int:
+        """
+        Write the whole scanlog by id as CSV (badge_id, timestamp as wall-clock
+        time in tz) to a text file object; returns the row count.
+        """
+        zone = ZoneInfo(tz)
+        writer = csv.writer(out)
+        writer.writerow(["badge_id", "timestamp"])
+        last_id, n = 0, 0
+        while True:
+            rows = self.fetch_scans_after(last_id, 1000)
+            if not rows:
+                return n
+            writer.writerows((r["badge_id"], _wall_clock(r["timestamp"], zone)) for r in rows)
+            n += len(rows)
+            last_id = rows[-1]["id"]
+
+    # CE reports
+    @abc.abstractmethod
+    def fetch_ce_report(self, report_date: str) -> dict[tuple[int, str], bool]:
+        """Existing (badge_id, session_title) → attended for one report date."""
+
+    @abc.abstractmethod
+    def upsert_ce_reports(self, records: list[dict]):
+        """Upsert {badge_id, session_title, attended, report_date} on the natural key."""
+
+
+def _iso(ts) -> str:
+    return ts if isinstance(ts, str) else ts.isoformat()
+
+
+def _utc_iso(ts) -> str:
+    """ISO text or datetime → fixed-width UTC ISO text (naive: taken as UTC)."""
+    if isinstance(ts, str):
+        ts = datetime.datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=datetime.timezone.utc)
+    return ts.astimezone(datetime.timezone.utc).isoformat(timespec="microseconds")
+
+
+def _punch_page(rows: list[dict]) -> tuple[list[dict], int]:
+    """punch_report rows → (rows without their repeated total, total)."""
+    total = rows[0]["total"] if rows else 0
+    return [{k: v for k, v in r.items() if k != "total"} for r in rows], total
+
+
+def _wall_clock(ts, zone: ZoneInfo) -> str:
+    """ISO text or datetime → 'YYYY-MM-DD HH:MM:SS[.ffffff]' in zone (naive: as is)."""
+    if isinstance(ts, str):
+        ts = datetime.datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(zone).replace(tzinfo=None)
+    return ts.isoformat(sep=" ")
+
+
+# ─── Supabase REST ───────────────────────────────────────────────────────────
+def _ilike_term(text: str) -> str:
+    # characters that would break a PostgREST or=() filter
+    return "".join(ch for ch in text if ch not in ",()*\\\"")
+
+
+class RestBackend(StorageBackend):
+    """One HTTP request per operation through the Supabase client."""
+
+    name = "rest"
+
+    def __init__(self, url: str | None = None, key: str | None = None):
+        self._url  = url or os.getenv("SUPABASE_URL")
+        self._key  = key or os.getenv("SUPABASE_KEY")
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from supabase import create_client
+                    self._client = create_client(self._url, self._key)
+        return self._client
+
+    def insert_attendees(self, rows):
+        self.client.table("attendees") \
+                   .insert(rows) \
+                   .execute()
+
+    def fetch_attendees(self):
+        resp = self.client.table("attendees") \
+                          .select(",".join(ATTENDEE_COLUMNS)) \
+                          .order("badge_id", desc=False) \
+                          .execute()
+        return resp.data
+
+    def reserve_badge_ids(self, count):
+        return self.client.rpc("reserve_badge_ids", {"p_count": int(count)}).execute().data
+
+    def query_attendees(self, term, badge_min, badge_max, offset, limit):
+        q = self.client.table("attendees").select("badge_id,name,email", count="exact")
+        term = _ilike_term(term)
+        if term:
+            q = q.or_(f"name.ilike.*{term}*,email.ilike.*{term}*")
+        if badge_min is not None:
+            q = q.gte("badge_id", int(badge_min))
+        if badge_max is not None:
+            q = q.lte("badge_id", int(badge_max))
+        resp = q.order("badge_id", desc=False) \
+                .range(offset, offset + limit - 1) \
+                .execute()
+        return resp.data, resp.count or 0
+
+    def log_scan(self, badge_id, ts_iso, key):
+        return self.client.rpc("log_scan", {
+            "p_badge_id": int(badge_id),
+            "p_ts":       ts_iso,
+            "p_key":      key,
+        }).execute().data
+
+    def log_scans(self, events):
+        resp = self.client.rpc("log_scans", {"p_events": events}).execute()
+        return resp.data or []
+
+    def fetch_scan_slots(self):
+        resp = self.client.table("attendee_scan_slots") \
+                          .select(",".join(SLOT_COLUMNS)) \
+                          .order("badge_id", desc=False) \
+                          .execute()
+        return resp.data
+
+    def fetch_scans_after(self, last_id, limit, badge_min=None, badge_max=None):
+        q = self.client.table("scanlog").select("id,badge_id,timestamp").gt("id", last_id)
+        if badge_min is not None:
+            q = q.gte("badge_id", int(badge_min))
+        if badge_max is not None:
+            q = q.lte("badge_id", int(badge_max))
+        resp = q.order("id", desc=False) \
+                .limit(limit) \
+                .execute()
+        return resp.data
+
+    def fetch_badge_scans(self, badge_id):
+        resp = self.client.table("scanlog") \
+                          .select("id,badge_id,timestamp") \
+                          .eq("badge_id", int(badge_id)) \
+                          .order("timestamp", desc=False) \
+                          .order("id", desc=False) \
+                          .execute()
+        return resp.data
+
+    def query_scan_log(self, start_iso, end_iso, badge_min, badge_max, offset, limit):
+        q = self.client.table("scanlog").select("id,badge_id,timestamp", count="exact")
+        if start_iso is not None:
+            q = q.gte("timestamp", start_iso)
+        if end_iso is not None:
+            q = q.lt("timestamp", end_iso)
+        if badge_min is not None:
+            q = q.gte("badge_id", int(badge_min))
+        if badge_max is not None:
+            q = q.lte("badge_id", int(badge_max))
+        resp = q.order("timestamp", desc=True) \
+                .range(offset, offset + limit - 1) \
+                .execute()
+        return resp.data, resp.count or 0
+
+    def query_punch_report(self, tz, start_iso, end_iso, badge_min, badge_max, term,
+                           missed_only, offset, limit):
+        return _punch_page(self.client.rpc("punch_report", {
+            "p_tz":          tz,
+            "p_start":       start_iso,
+            "p_end":         end_iso,
+            "p_badge_min":   badge_min,
+            "p_badge_max":   badge_max,
+            "p_term":        term,
+            "p_missed_only": bool(missed_only),
+            "p_offset":      int(offset),
+            "p_limit":       int(limit),
+        }).execute().data or [])
+
+    def fetch_ce_report(self, report_date):
+        existing, start = {}, 0
+        while True:
+            resp = self.client.table("ce_reports") \
+                              .select("badge_id,session_title,attended") \
+                              .eq("report_date", report_date) \
+                              .order("badge_id", desc=False) \
+                              .order("session_title", desc=False) \
+                              .range(start, start + 999) \
+                              .execute()
+            for r in resp.data:
+                existing[(int(r["badge_id"]), r["session_title"])] = bool(r["attended"])
+            if len(resp.data) < 1000:
+                return existing
+            start += 1000
+
+    def upsert_ce_reports(self, records):
+        self.client.table("ce_reports") \
+                   .upsert(records, on_conflict="badge_id,session_title,report_date") \
+                   .execute()
+
+
+# ─── Direct Postgres ─────────────────────────────────────────────────────────
+# hot-path statements, PREPAREd once per pooled connection
+_PG_STATEMENTS = {
+    "attendees_all": ("", f"select {', '.join(ATTENDEE_COLUMNS)} from public.attendees "
+                          "order by badge_id"),
+    "reserve_ids":   ("(integer)", "select public.reserve_badge_ids($1)"),
+    "log_scan":      ("(integer, timestamptz, text)", "select public.log_scan($1, $2, $3)"),
+    "log_scans":     ("(jsonb)", 'select badge_id, "timestamp", slot from public.log_scans($1)'),
+    "scan_slots":    ("", f"select {', '.join(SLOT_COLUMNS)} from public.attendee_scan_slots "
+                          "order by badge_id"),
+    "scans_after":   ("(bigint, integer)",
+                      'select id, badge_id, "timestamp" from public.scanlog '
+                      "where id > $1 order by id limit $2"),
+    "badges_after":  ("(bigint, integer, integer, integer)",
+                      'select id, badge_id, "timestamp" from public.scanlog '
+                      "where id > $1 and badge_id between $3 and $4 order by id limit $2"),
+    "badge_scans":   ("(integer)",
+                      'select id, badge_id, "timestamp" from public.scanlog '
+                      'where badge_id = $1 order by "timestamp", id'),
+    "punch_report":  ("(text, timestamptz, timestamptz, integer, integer, text, boolean, "
+                      "integer, integer)",
+                      "select badge_id, name, email, day, check_in, check_out, total "
+                      "from public.punch_report($1, $2, $3, $4, $5, $6, $7, $8, $9)"),
+    "ce_for_date":   ("(date)",
+                      "select badge_id, session_title, attended from public.ce_reports "
+                      "where report_date = $1"),
+}
+
+
+def pg_dsn() -> dict:
+    """Connection settings: DATABASE_URL, or the user/password/host/port/dbname variables."""
+    url = os.getenv("DATABASE_URL")
+    if url:
+        return {"dsn": url}
+    return {
+        "user":     os.getenv("user"),
+        "password": os.getenv("password"),
+        "host":     os.getenv("host"),
+        "port":     os.getenv("port", "5432"),
+        "dbname":   os.getenv("dbname", "postgres"),
+    }
+
+
+class _LineCounter(io.TextIOBase):
+    """Text file wrapper counting the lines COPY writes through it."""
+    def __init__(self, out):
+        super().__init__()
+        self._out, self.lines = out, 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        # psycopg2 hands a TextIOBase str, anything else bytes
+        self.lines += data.count("\n")
+        return self._out.write(data)
+
+
+class PostgresBackend(StorageBackend):
+    """psycopg2 connection pool; prepared statements and COPY for bulk paths."""
+
+    name = "postgres"
+
+    def __init__(self, minconn: int | None = None, maxconn: int | None = None, **dsn):
+        import psycopg2.extensions
+        import psycopg2.extras
+        import psycopg2.pool
+
+        class _Connection(psycopg2.extensions.connection):
+            """Remembers which statements this session has PREPAREd."""
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.prepared = set()
+
+        self._extras = psycopg2.extras
+        self._pool = psycopg2.pool.ThreadedConnectionPool(
+            minconn or int(os.getenv("PG_POOL_MIN", "1")),
+            maxconn or int(os.getenv("PG_POOL_MAX", "8")),
+            connection_factory=_Connection,
+            **(dsn or pg_dsn()),
+        )
+
+    @contextmanager
+    def _cursor(self, dict_rows: bool = False):
+        conn = self._pool.getconn()
+        try:
+            factory = self._extras.RealDictCursor if dict_rows else None
+            with conn.cursor(cursor_factory=factory) as cur:
+                yield cur
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._pool.putconn(conn)
+
+    def _execute(self, cur, name: str, params: tuple = ()):
+        conn = cur.connection
+        if name not in conn.prepared:
+            types, sql = _PG_STATEMENTS[name]
+            cur.execute(f"prepare {name}{types} as {sql}")
+            conn.prepared.add(name)
+        placeholders = ", ".join(["%s"] * len(params))
+        cur.execute(f"execute {name}({placeholders})" if params else f"execute {name}", params)
+
+    def close(self):
+        self._pool.closeall()
+
+    def insert_attendees(self, rows):
+        buf = io.StringIO()
+        csv.writer(buf).writerows((r["badge_id"], r["name"], r["email"]) for r in rows)
+        buf.seek(0)
+        with self._cursor() as cur:
+            cur.copy_expert("copy public.attendees (badge_id, name, email) "
+                            "from stdin with (format csv)", buf)
+
+    def fetch_attendees(self):
+        with self._cursor(dict_rows=True) as cur:
+            self._execute(cur, "attendees_all")
+            return [dict(r) for r in cur.fetchall()]
+
+    def reserve_badge_ids(self, count):
+        with self._cursor() as cur:
+            self._execute(cur, "reserve_ids", (int(count),))
+            return cur.fetchone()[0]
+
+    def query_attendees(self, term, badge_min, badge_max, offset, limit):
+        where, params = ["true"], []
+        if term:
+            where.append("(name ilike %s or email ilike %s)")
+            like = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            params += [like, like]
+        if badge_min is not None:
+            where.append("badge_id >= %s")
+            params.append(int(badge_min))
+        if badge_max is not None:
+            where.append("badge_id <= %s")
+            params.append(int(badge_max))
+        cond = " and ".join(where)
+        with self._cursor(dict_rows=True) as cur:
+            cur.execute(f"select count(*) as n from public.attendees where {cond}", params)
+            total = cur.fetchone()["n"]
+            cur.execute(f"select badge_id, name, email from public.attendees where {cond} "
+                        "order by badge_id offset %s limit %s", params + [offset, limit])
+            return [dict(r) for r in cur.fetchall()], total
+
+    def log_scan(self, badge_id, ts_iso, key):
+        with self._cursor() as cur:
+            self._execute(cur, "log_scan", (int(badge_id), ts_iso, key))
+            return cur.fetchone()[0]
+
+    def log_scans(self, events):
+        with self._cursor() as cur:
+            self._execute(cur, "log_scans", (self._extras.Json(events),))
+            return [{"badge_id": b, "timestamp": _iso(t), "slot": s}
+                    for b, t, s in cur.fetchall()]
+
+    def fetch_scan_slots(self):
+        with self._cursor(dict_rows=True) as cur:
+            self._execute(cur, "scan_slots")
+            return [dict(r) for r in cur.fetchall()]
+
+    def fetch_scans_after(self, last_id, limit, badge_min=None, badge_max=None):
+        with self._cursor() as cur:
+            if badge_min is None and badge_max is None:
+                self._execute(cur, "scans_after", (int(last_id), int(limit)))
+            else:
+                lo, hi = (PG_INT[0] if badge_min is None else int(badge_min),
+                          PG_INT[1] if badge_max is None else int(badge_max))
+                self._execute(cur, "badges_after", (int(last_id), int(limit), lo, hi))
+            return [{"id": i, "badge_id": b, "timestamp": _iso(t)}
+                    for i, b, t in cur.fetchall()]
+
+    def fetch_badge_scans(self, badge_id):
+        with self._cursor() as cur:
+            self._execute(cur, "badge_scans", (int(badge_id),))
+            return [{"id": i, "badge_id": b, "timestamp": _iso(t)}
+                    for i, b, t in cur.fetchall()]
+
+    def query_scan_log(self, start_iso, end_iso, badge_min, badge_max, offset, limit):
+        where, params = ["true"], []
+        for cond, value in (('"timestamp" >= %s', start_iso), ('"timestamp" < %s', end_iso),
+                            ("badge_id >= %s", badge_min), ("badge_id <= %s", badge_max)):
+            if value is not None:
+                where.append(cond)
+                params.append(value)
+        cond = " and ".join(where)
+        with self._cursor() as cur:
+            cur.execute(f"select count(*) from public.scanlog where {cond}", params)
+            total = cur.fetchone()[0]
+            cur.execute(f'select id, badge_id, "timestamp" from public.scanlog where {cond} '
+                        'order by "timestamp" desc offset %s limit %s', params + [offset, limit])
+            rows = [{"id": i, "badge_id": b, "timestamp": _iso(t)} for i, b, t in cur.fetchall()]
+        return rows, total
+
+    def query_punch_report(self, tz, start_iso, end_iso, badge_min, badge_max, term,
+                           missed_only, offset, limit):
+        with self._cursor(dict_rows=True) as cur:
+            self._execute(cur, "punch_report", (tz, start_iso, end_iso, badge_min, badge_max,
+                                                term, bool(missed_only), int(offset), int(limit)))
+            return _punch_page([dict(r) for r in cur.fetchall()])
+
+    def copy_scans_out(self, out, tz):
+        counted = _LineCounter(out)
+        with self._cursor() as cur:
+            sql = cur.mogrify('copy (select badge_id, "timestamp" at time zone %s as "timestamp" '
+                              "from public.scanlog order by id) to stdout with (format csv, header)",
+                              (tz,)).decode()
+            cur.copy_expert(sql, counted)
+        return max(counted.lines - 1, 0)
+
+    def fetch_ce_report(self, report_date):
+        with self._cursor() as cur:
+            self._execute(cur, "ce_for_date", (report_date,))
+            return {(int(b), t): bool(a) for b, t, a in cur.fetchall()}
+
+    def upsert_ce_reports(self, records):
+        buf = io.StringIO()
+        csv.writer(buf).writerows((r["badge_id"], r["session_title"], r["attended"],
+                                   r["report_date"]) for r in records)
+        buf.seek(0)
+        with self._cursor() as cur:
+            cur.execute("create temp table ce_stage (badge_id integer, session_title text, "
+                        "attended boolean, report_date date) on commit drop")
+            cur.copy_expert("copy ce_stage from stdin with (format csv)", buf)
+            cur.execute("insert into public.ce_reports (badge_id, session_title, attended, report_date) "
+                        "select badge_id, session_title, attended, report_date from ce_stage "
+                        "on conflict (badge_id, session_title, report_date) "
+                        "do update set attended = excluded.attended")
+
+
+# ─── SQLite ──────────────────────────────────────────────────────────────────
+# the schema migrations/ arrive at, minus day partitions. SQLite has no
+# timestamptz: scan times are stored as fixed-width UTC ISO text (_utc_iso),
+# so comparing and ordering them as strings is comparing them as instants.
+_SQLITE_SLOTS = ", ".join(f'max(case when s.n = {i} then s."timestamp" end) as scan{i}'
+                          for i in range(1, SCAN_SLOTS + 1))
+_SQLITE_SCHEMA = f"""
+create table if not exists attendees (
+    badge_id integer primary key,
+    name     text,
+    email    text
+);
+create table if not exists scanlog (
+    id              integer primary key autoincrement,
+    badge_id        integer not null,
+    "timestamp"     text not null,
+    idempotency_key text unique
+);
+create index if not exists scanlog_badge_ts on scanlog (badge_id, "timestamp");
+create index if not exists scanlog_ts on scanlog ("timestamp");
+create view if not exists attendee_scan_slots as
+select a.badge_id, a.name, a.email,
+       {_SQLITE_SLOTS},
+       count(s.id) as scan_count
+from attendees a
+left join (select id, badge_id, "timestamp",
+                  row_number() over (partition by badge_id order by "timestamp", id) as n
+           from scanlog) s on s.badge_id = a.badge_id
+group by a.badge_id, a.name, a.email;
+create table if not exists badge_id_seq (last_value integer not null);
+create table if not exists ce_reports (
+    badge_id      integer not null,
+    session_title text not null,
+    attended      integer not null,
+    report_date   text not null,
+    unique (badge_id, session_title, report_date)
+);
+"""
+
+
+class SqliteBackend(StorageBackend):
+    """Everything in one SQLite file (or in memory), serialised by a lock."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str | None = None):
+        self._db = sqlite3.connect(path or os.getenv("SQLITE_PATH", ":memory:"),
+                                   check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.create_function("utc_iso", 1, _utc_iso, deterministic=True)
+        self._db.create_function("wall_clock", 2, lambda ts, tz: _wall_clock(ts, ZoneInfo(tz)),
+                                 deterministic=True)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.executescript(_SQLITE_SCHEMA)
+            # files written before times were normalized kept each scan's own offset
+            self._db.execute('update scanlog set "timestamp" = utc_iso("timestamp") '
+                             'where "timestamp" <> utc_iso("timestamp")')
+
+    def insert_attendees(self, rows):
+        with self._lock, self._db:
+            self._db.executemany("insert into attendees (badge_id, name, email) values (?, ?, ?)",
+                                 [(r["badge_id"], r["name"], r["email"]) for r in rows])
+
+    def fetch_attendees(self):
+        with self._lock:
+            return [dict(r) for r in self._db.execute(
+                f"select {', '.join(ATTENDEE_COLUMNS)} from attendees order by badge_id")]
+
+    def reserve_badge_ids(self, count):
+        if count < 1:
+            raise ValueError(f"count must be positive, got {count}")
+        with self._lock, self._db:
+            seq = self._db.execute("select last_value from badge_id_seq").fetchone()
+            top = self._db.execute("select coalesce(max(badge_id), 0) from attendees").fetchone()[0]
+            first = max((seq[0] if seq else 0) + 1, top + 1)
+            if seq:
+                self._db.execute("update badge_id_seq set last_value = ?", (first + count - 1,))
+            else:
+                self._db.execute("insert into badge_id_seq values (?)", (first + count - 1,))
+            return first
+
+    def query_attendees(self, term, badge_min, badge_max, offset, limit):
+        where, params = ["1"], []
+        if term:
+            where.append("(name like ? escape '\\' or email like ? escape '\\')")
+            like = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            params += [like, like]
+        if badge_min is not None:
+            where.append("badge_id >= ?")
+            params.append(int(badge_min))
+        if badge_max is not None:
+            where.append("badge_id <= ?")
+            params.append(int(badge_max))
+        cond = " and ".join(where)
+        with self._lock:
+            total = self._db.execute(f"select count(*) from attendees where {cond}", params).fetchone()[0]
+            rows = self._db.execute(f"select badge_id, name, email from attendees where {cond} "
+                                    "order by badge_id limit ? offset ?", params + [limit, offset])
+            return [dict(r) for r in rows], total
+
+    def log_scan(self, badge_id, ts_iso, key):
+        with self._lock, self._db:
+            return self._log_scan(int(badge_id), _utc_iso(ts_iso), key)
+
+    def log_scans(self, events):
+        # one call for the batch, as the log_scans RPC is
+        stamped = sorted(((_utc_iso(e["timestamp"]), e) for e in events), key=lambda p: p[0])
+        with self._lock, self._db:
+            return [{"badge_id": e["badge_id"], "timestamp": ts,
+                     "slot": self._log_scan(int(e["badge_id"]), ts, e.get("key"))}
+                    for ts, e in stamped]
+
+    def _log_scan(self, badge: int, ts_iso: str, key: str | None) -> int | None:
+        """log_scan body on a _utc_iso time; the caller holds the lock and the transaction."""
+        if self._db.execute('select 1 from scanlog where badge_id = ? and "timestamp" = ?',
+                            (badge, ts_iso)).fetchone():
+            return -1
+        try:
+            self._db.execute('insert into scanlog (badge_id, "timestamp", idempotency_key) '
+                             "values (?, ?, ?)", (badge, ts_iso, key))
+        except sqlite3.IntegrityError:
+            return -1
+        if not self._db.execute("select 1 from attendees where badge_id = ?", (badge,)).fetchone():
+            return None
+        # place in arrival order, as migrations/008_log_scan_arrival_slots.sql
+        slot = self._db.execute("select count(*) from scanlog where badge_id = ?",
+                                (badge,)).fetchone()[0]
+        return slot if slot <= SCAN_SLOTS else 0
+
+    def fetch_scan_slots(self):
+        with self._lock:
+            return [dict(r) for r in self._db.execute(
+                f"select {', '.join(SLOT_COLUMNS)} from attendee_scan_slots order by badge_id")]
+
+    def fetch_scans_after(self, last_id, limit, badge_min=None, badge_max=None):
+        where, params = ["id > ?"], [int(last_id)]
+        for cond, value in (("badge_id >= ?", badge_min), ("badge_id <= ?", badge_max)):
+            if value is not None:
+                where.append(cond)
+                params.append(int(value))
+        with self._lock:
+            rows = self._db.execute('select id, badge_id, "timestamp" from scanlog '
+                                    f"where {' and '.join(where)} order by id limit ?",
+                                    params + [int(limit)])
+            return [dict(r) for r in rows]
+
+    def fetch_badge_scans(self, badge_id):
+        with self._lock:
+            rows = self._db.execute('select id, badge_id, "timestamp" from scanlog '
+                                    'where badge_id = ? order by "timestamp", id', (int(badge_id),))
+            return [dict(r) for r in rows]
+
+    def query_scan_log(self, start_iso, end_iso, badge_min, badge_max, offset, limit):
+        start_iso = start_iso and _utc_iso(start_iso)
+        end_iso   = end_iso and _utc_iso(end_iso)
+        where, params = ["1"], []
+        for cond, value in (('"timestamp" >= ?', start_iso), ('"timestamp" < ?', end_iso),
+                            ("badge_id >= ?", badge_min), ("badge_id <= ?", badge_max)):
+            if value is not None:
+                where.append(cond)
+                params.append(value)
+        cond = " and ".join(where)
+        with self._lock:
+            total = self._db.execute(f"select count(*) from scanlog where {cond}", params).fetchone()[0]
+            rows = self._db.execute(f'select id, badge_id, "timestamp" from scanlog where {cond} '
+                                    'order by "timestamp" desc limit ? offset ?',
+                                    params + [limit, offset])
+            return [dict(r) for r in rows], total
+
+    def query_punch_report(self, tz, start_iso, end_iso, badge_min, badge_max, term,
+                           missed_only, offset, limit):
+        # the punch_report function of migrations/009_punch_report.sql
+        scans, report = ["1"], ["1"]
+        params = {"tz": tz, "offset": int(offset), "limit": int(limit)}
+        for cond, name, value in (('"timestamp" >= :start', "start", start_iso and _utc_iso(start_iso)),
+                                  ('"timestamp" < :end', "end", end_iso and _utc_iso(end_iso)),
+                                  ("badge_id >= :badge_min", "badge_min", badge_min),
+                                  ("badge_id <= :badge_max", "badge_max", badge_max)):
+            if value is not None:
+                scans.append(cond)
+                params[name] = value
+        if term:
+            report.append("(a.name like :like escape '\\' or a.email like :like escape '\\')")
+            params["like"] = "%" + term.replace("\\", "\\\\").replace("%", "\\%") \
+                                       .replace("_", "\\_") + "%"
+        outer = "check_in = check_out" if missed_only else "1"
+        with self._lock:
+            rows = self._db.execute(f"""
+                select badge_id, name, email, day, check_in, check_out, count(*) over () as total
+                from (select p.badge_id, p.day,
+                             coalesce(a.name, '<unknown>') as name,
+                             coalesce(a.email, '') as email,
+                             substr(wall_clock(p.first_scan, :tz), 12, 8) as check_in,
+                             substr(wall_clock(p.last_scan, :tz), 12, 8) as check_out
+                      from (select badge_id, substr(wall_clock("timestamp", :tz), 1, 10) as day,
+                                   min("timestamp") as first_scan, max("timestamp") as last_scan
+                            from scanlog where {" and ".join(scans)}
+                            group by 1, 2) p
+                      left join attendees a on a.badge_id = p.badge_id
+                      where {" and ".join(report)})
+                where {outer}
+                order by day, badge_id limit :limit offset :offset""", params)
+            return _punch_page([dict(r) for r in rows])
+
+    def fetch_ce_report(self, report_date):
+        with self._lock:
+            rows = self._db.execute("select badge_id, session_title, attended from ce_reports "
+                                    "where report_date = ?", (report_date,))
+            return {(int(r[0]), r[1]): bool(r[2]) for r in rows}
+
+    def upsert_ce_reports(self, records):
+        with self._lock, self._db:
+            self._db.executemany(
+                "insert into ce_reports (badge_id, session_title, attended, report_date) "
+                "values (?, ?, ?, ?) on conflict (badge_id, session_title, report_date) "
+                "do update set attended = excluded.attended",
+                [(int(r["badge_id"]), r["session_title"], bool(r["attended"]), r["report_date"])
+                 for r in records])
+
+
+def make_backend(name: str | None = None) -> StorageBackend:
+    """Build the backend named by `name` or STORAGE_BACKEND (default "rest")."""
+    name = (name or os.getenv("STORAGE_BACKEND") or "rest").strip().lower()
+    if name == "rest":
+        return RestBackend()
+    if name == "postgres":
+        return PostgresBackend()
+    if name == "sqlite":
+        return SqliteBackend()
+    raise ValueError(f"Unknown STORAGE_BACKEND {name!r}; expected one of {', '.join(BACKENDS)}")
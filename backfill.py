@@ -0,0 +1,88 @@
+# # backfill.py
+"""
+Move scanlog into per-day partitions after migration 006.
+
+    python backfill.py                      # programme days + every day in scanlog_default
+    python backfill.py --day 2025-10-02     # only these days (repeatable)
+    python backfill.py --dry-run            # show what would move
+
+Migration 006 leaves the existing log in scanlog_default. Each day here is
+its own short transaction through ensure_scanlog_partition(), so kiosks only
+wait while that one day's rows move; the tables touched are vacuumed at the
+end. Run it once after migrating, and again before each event so the
+programme's days exist ahead of the first scan; afterwards scanlog_default
+should stay empty.
+"""
+import argparse
+import datetime
+
+from conference import conference_sessions
+from database import LOCAL_TZ
+
+
+def programme_days(blocks: list[dict] = conference_sessions) -> list[datetime.date]:
+    return sorted({datetime.date.fromisoformat(b["start"][:10]) for b in blocks})
+
+
+def default_days(conn, tz: str = LOCAL_TZ.key) -> dict[datetime.date, int]:
+    """Days (in tz) that still have rows in scanlog_default, with their counts."""
+    with conn, conn.cursor() as cur:
+        cur.execute('select ("timestamp" at time zone %s)::date, count(*) '
+                    "from public.scanlog_default group by 1 order by 1", (tz,))
+        return dict(cur.fetchall())
+
+
+def backfill(conn, days, tz: str = LOCAL_TZ.key, log=print) -> dict[datetime.date, int]:
+    """Give each day its own partition, one transaction per day; rows moved per day."""
+    moved = {}
+    for day in sorted(set(days)):
+        with conn, conn.cursor() as cur:
+            cur.execute("select public.ensure_scanlog_partition(%s, %s)", (day, tz))
+            moved[day] = cur.fetchone()[0]
+        log(f"{day}  {moved[day]:>8} rows moved")
+    filled = [day for day, n in moved.items() if n]
+    if filled:
+        vacuum(conn, filled)
+    return moved
+
+
+def vacuum(conn, days: list[datetime.date]):
+    """
+    VACUUM ANALYZE scanlog_default and the given days' partitions. The move
+    leaves every old row dead in the default partition, and until the new
+    partitions are vacuumed their index-only scans still visit the heap.
+    """
+    tables = ["scanlog_default"] + [f"scanlog_{day:%Y%m%d}" for day in days]
+    conn.autocommit = True                       # VACUUM cannot run in a transaction
+    try:
+        with conn.cursor() as cur:
+            for table in tables:
+                cur.execute(f"vacuum (analyze) public.{table}")
+    finally:
+        conn.autocommit = False
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Move scanlog rows into per-day partitions.")
+    ap.add_argument("--day", type=datetime.date.fromisoformat, action="append",
+                    help="partition this day (default: programme days and every day found)")
+    ap.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args()
+
+    from migrate import connect
+    conn = connect()
+    try:
+        waiting = default_days(conn)
+        days = args.day or programme_days() + list(waiting)
+        if args.dry_run:
+            for day in sorted(set(days)):
+                print(f"{day}  {waiting.get(day, 0):>8} rows to move")
+            return
+        backfill(conn, days)
+        print(f"{sum(default_days(conn).values())} rows left in scanlog_default")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
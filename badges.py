@@ -0,0 +1,148 @@
+# # badges.py
+"""
+Badge QR codes and printable badge sheets.
+
+    python badges.py --all --out badges.pdf
+    python badges.py --range 100-250 --out reprint.pdf
+
+Rendered QR PNGs live in a content-addressed cache keyed by the badge id and
+the encoding parameters, so reprinting only renders badges it has not seen.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+
+CACHE_DIR = os.getenv("BADGE_CACHE_DIR", ".badge_cache")
+
+# encoding parameters; part of every cache key
+QR_PARAMS = {"error_correction": "L", "box_size": 5, "border": 2}
+
+
+def generate_qr_code(badge_id: int, error_correction: str = "L",
+                     box_size: int = 5, border: int = 2) -> bytes:
+    import qrcode
+    levels = {"L": qrcode.constants.ERROR_CORRECT_L, "M": qrcode.constants.ERROR_CORRECT_M,
+              "Q": qrcode.constants.ERROR_CORRECT_Q, "H": qrcode.constants.ERROR_CORRECT_H}
+    qr = qrcode.QRCode(error_correction=levels[error_correction], box_size=box_size, border=border)
+    qr.add_data(str(badge_id))
+    qr.make(fit=True)
+    img = qr.make_image(fill='black', back_color='white')
+    buf = BytesIO()
+    img.save(buf, format='PNG')
+    return buf.getvalue()
+
+
+# ─── Render cache ────────────────────────────────────────────────────────────
+def cache_path(badge_id: int, params: dict = QR_PARAMS, cache_dir: str = CACHE_DIR) -> str:
+    key = json.dumps({"badge_id": int(badge_id), **params}, sort_keys=True)
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return os.path.join(cache_dir, digest[:2], digest + ".png")
+
+
+def _render_to_cache(badge_id: int, params: dict, cache_dir: str) -> str:
+    path = cache_path(badge_id, params, cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # write-then-rename so a crashed render never leaves a half-written PNG
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(generate_qr_code(badge_id, **params))
+    os.replace(tmp, path)
+    return path
+
+
+def render_badges(badge_ids: list[int], params: dict = QR_PARAMS,
+                  cache_dir: str = CACHE_DIR, workers: int | None = None) -> dict[int, str]:
+    """
+    Ensure a cached PNG exists for every badge; return badge_id → path.
+    Only cache misses are rendered, across a process pool when there are many.
+    """
+    paths = {int(b): cache_path(b, params, cache_dir) for b in badge_ids}
+    missing = [b for b, p in paths.items() if not os.path.exists(p)]
+    if len(missing) < 32:
+        for b in missing:
+            _render_to_cache(b, params, cache_dir)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_render_to_cache, missing, [params] * len(missing),
+                          [cache_dir] * len(missing),
+                          chunksize=max(1, len(missing) // 64)))
+    return paths
+
+
+def render_qr_codes(badge_ids: list[int], out_dir: str, workers: int | None = None) -> list[str]:
+    """Write <badge_id>.png for every badge, reusing cached renders."""
+    os.makedirs(out_dir, exist_ok=True)
+    out = []
+    for bid, src in render_badges(badge_ids, workers=workers).items():
+        dst = os.path.join(out_dir, f"{bid}.png")
+        shutil.copyfile(src, dst)
+        out.append(dst)
+    return out
+
+
+# ─── Printable sheets ────────────────────────────────────────────────────────
+def badge_sheet_pdf(attendees: list[dict], out, cols: int = 3, rows: int = 4,
+                    workers: int | None = None):
+    """
+    Lay out badges (QR + name + number) cols × rows per US-letter page.
+    `out` is a path or a binary file object.
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.pdfgen import canvas
+
+    paths = render_badges([a["badge_id"] for a in attendees], workers=workers)
+    page_w, page_h = letter
+    margin = 0.5 * inch
+    cell_w = (page_w - 2 * margin) / cols
+    cell_h = (page_h - 2 * margin) / rows
+    qr_size = min(cell_w, cell_h) * 0.65
+
+    c = canvas.Canvas(out, pagesize=letter)
+    per_page = cols * rows
+    for i, a in enumerate(attendees):
+        if i and i % per_page == 0:
+            c.showPage()
+        slot = i % per_page
+        x = margin + (slot % cols) * cell_w
+        y = page_h - margin - (slot // cols + 1) * cell_h
+
+        c.setDash(2, 3)
+        c.rect(x, y, cell_w, cell_h)       # cutting guide
+        c.setDash()
+        c.drawImage(paths[int(a["badge_id"])], x + (cell_w - qr_size) / 2,
+                    y + cell_h - qr_size - 0.15 * inch, qr_size, qr_size)
+        c.setFont("Helvetica-Bold", 12)
+        c.drawCentredString(x + cell_w / 2, y + 0.45 * inch, str(a.get("name") or ""))
+        c.setFont("Helvetica", 10)
+        c.drawCentredString(x + cell_w / 2, y + 0.25 * inch, f"# {a['badge_id']}")
+    c.save()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Render printable badge sheets.")
+    who = ap.add_mutually_exclusive_group(required=True)
+    who.add_argument("--all", action="store_true", help="every registered attendee")
+    who.add_argument("--range", help="badge range, e.g. 100-250")
+    ap.add_argument("--out", default="badges.pdf")
+    ap.add_argument("--cols", type=int, default=3)
+    ap.add_argument("--rows", type=int, default=4)
+    ap.add_argument("--workers", type=int, default=None)
+    args = ap.parse_args()
+
+    from database import get_all_attendees
+    people = get_all_attendees()
+    if args.range:
+        lo, hi = (int(x) for x in args.range.split("-"))
+        people = [a for a in people if lo <= int(a["badge_id"]) <= hi]
+    badge_sheet_pdf(people, args.out, args.cols, args.rows, args.workers)
+    print(f"{len(people)} badges → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
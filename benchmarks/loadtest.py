@@ -0,0 +1,289 @@
+# # benchmarks/loadtest.py
+"""
+Simulate many door kiosks checking people in at once.
+
+    python -m benchmarks.loadtest --stations 8 --attendees 2000 --duration 60
+    python -m benchmarks.loadtest --backend postgres --mode direct --json run.json
+    python -m benchmarks.loadtest --baseline run.json          # compare commits
+
+Each station is a thread working through a seeded, pre-built stream of
+scans: most arrivals cluster at session starts, a share are immediate
+repeats at the same kiosk (the debounce should absorb them), and a smaller
+share are the same badge at a neighbouring kiosk. Each check-in does what
+run_qr_scanner does: log_scan, then get_attendee.
+
+The default backend is an in-memory SQLite store with --rtt-ms added to
+every backend call, which stands in for PostgREST round trips. --backend
+postgres (DATABASE_URL) or rest (SUPABASE_URL, e.g. a local PostgREST) run
+against a real server. Point those at a scratch database: the run reserves
+and registers its own badges and checks only those.
+
+The report gives throughput, p50/p95/p99 latency (from the call and from
+the scheduled arrival time), drain time for the queue, per-backend-call
+latency, and these correctness checks: scans lost, scanN slots left empty
+while scans exist, slots assigned twice, and slots holding timestamps that
+are not in scanlog. Exits non-zero when a check fails.
+"""
+import argparse
+import datetime
+import functools
+import json
+import os
+import random
+import subprocess
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+SLOTS = 10
+
+
+# ─── Workload ────────────────────────────────────────────────────────────────
+def build_schedule(badges: list[int], stations: int, duration: float, seed: int,
+                   scans_per_badge: float = 3.0, bursts: int = 4, burst_share: float = 0.7,
+                   burst_width: float = 3.0, dup_rate: float = 0.15,
+                   cross_dup_rate: float = 0.05) -> list[list[tuple]]:
+    """
+    Per-station lists of (offset_seconds, badge_id, kind), sorted by offset.
+    kind is "scan", "repeat" (same kiosk, seconds later) or "cross" (another kiosk).
+    """
+    rng = random.Random(seed)
+    starts = [duration * j / bursts for j in range(bursts)]
+    per_station = [[] for _ in range(stations)]
+    for badge in badges:
+        n = max(1, min(SLOTS, round(rng.expovariate(1 / scans_per_badge))))
+        for _ in range(n):
+            if rng.random() < burst_share:
+                t = rng.choice(starts) + rng.expovariate(1 / burst_width)
+            else:
+                t = rng.uniform(0, duration)
+            t = min(t, duration)
+            st = rng.randrange(stations)
+            per_station[st].append((t, badge, "scan"))
+            if rng.random() < dup_rate:
+                per_station[st].append((t + rng.uniform(0.2, 2.0), badge, "repeat"))
+            if stations > 1 and rng.random() < cross_dup_rate:
+                other = (st + rng.randrange(1, stations)) % stations
+                per_station[other].append((t + rng.uniform(0.2, 2.0), badge, "cross"))
+    for events in per_station:
+        events.sort()
+    return per_station
+
+
+def with_latency(backend, rtt_ms: float):
+    """Add a fixed sleep to every public backend call (network stand-in)."""
+    if rtt_ms <= 0:
+        return backend
+    delay = rtt_ms / 1000
+
+    def slow(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            time.sleep(delay)
+            return fn(*args, **kwargs)
+        return inner
+
+    for name in dir(type(backend)):
+        if not name.startswith("_") and callable(getattr(type(backend), name)):
+            setattr(backend, name, slow(getattr(backend, name)))
+    return backend
+
+
+# ─── Run ─────────────────────────────────────────────────────────────────────
+def run_station(db, station: str, events, t0: float, mode: str, out: list, lock):
+    rows = []
+    for offset, badge, kind in events:
+        due = t0 + offset
+        wait = due - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        start = time.perf_counter()
+        error = ""
+        try:
+            if mode == "queued":
+                accepted = db.log_scan(badge, station=station) is not None
+            else:
+                try:
+                    accepted = db.log_scan_now(badge, station=station) != -1
+                except db.ScanSlotsFull:
+                    accepted = True
+            db.get_attendee(badge)
+        except Exception as e:
+            accepted, error = False, f"{type(e).__name__}: {e}"
+        end = time.perf_counter()
+        rows.append({"badge": badge, "kind": kind, "accepted": accepted, "error": error,
+                     "latency": end - start, "from_due": end - due})
+    with lock:
+        out.extend(rows)
+
+
+def _pct(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+
+def _parse(ts) -> datetime.datetime:
+    ts = ts if isinstance(ts, str) else ts.isoformat()
+    return datetime.datetime.fromisoformat(ts.replace("Z", "+00:00"))
+
+
+def check_correctness(db, badges: set[int], accepted_badges: set[int]) -> dict:
+    """Compare scanN slots with scanlog for the run's badges."""
+    scans = defaultdict(list)
+    last_id = 0
+    while True:
+        page = db.backend().fetch_scans_after(last_id, 1000)
+        if not page:
+            break
+        for r in page:
+            if int(r["badge_id"]) in badges:
+                scans[int(r["badge_id"])].append(_parse(r["timestamp"]))
+        last_id = page[-1]["id"]
+
+    lost = empty_slots = double = stray = gaps = 0
+    for a in db.backend().fetch_scan_slots():
+        badge = int(a["badge_id"])
+        if badge not in badges:
+            continue
+        logged = scans.get(badge, [])
+        if badge in accepted_badges and not logged:
+            lost += 1
+        slots = [a.get(f"scan{i}") for i in range(1, SLOTS + 1)]
+        filled = [_parse(s) for s in slots if s]
+        first_empty = next((i for i, s in enumerate(slots) if not s), SLOTS)
+        gaps += any(slots[first_empty:])
+        empty_slots += max(0, min(SLOTS, len(logged)) - len(filled))
+        double += len(filled) - len(set(filled))
+        known = set(logged)
+        stray += sum(1 for f in filled if f not in known)
+    return {"badges_without_scans": lost, "slots_missing": empty_slots,
+            "slots_double_assigned": double, "slots_not_in_scanlog": stray,
+            "slot_gaps": gaps, "scanlog_rows": sum(map(len, scans.values()))}
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Multi-kiosk check-in load test.")
+    ap.add_argument("--backend", choices=["sqlite", "postgres", "rest"], default="sqlite")
+    ap.add_argument("--mode", choices=["queued", "direct"], default="queued",
+                    help="log_scan (local queue) or log_scan_now (one round trip)")
+    ap.add_argument("--stations", type=int, default=8)
+    ap.add_argument("--attendees", type=int, default=1000)
+    ap.add_argument("--duration", type=float, default=30.0, help="seconds of arrivals")
+    ap.add_argument("--scans-per-badge", type=float, default=3.0)
+    ap.add_argument("--dup-rate", type=float, default=0.15)
+    ap.add_argument("--cross-dup-rate", type=float, default=0.05)
+    ap.add_argument("--rtt-ms", type=float, default=20.0,
+                    help="simulated round trip per backend call (sqlite only)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--json", help="write the results here")
+    ap.add_argument("--baseline", help="earlier --json output to compare against")
+    args = ap.parse_args()
+
+    # a throwaway queue journal so runs never mix with a kiosk's real one
+    tmp = tempfile.mkdtemp(prefix="loadtest_")
+    os.environ["SCAN_QUEUE_PATH"] = os.path.join(tmp, "queue.db")
+    os.environ.setdefault("SCAN_QUEUE_INTERVAL", "0.2")
+
+    import database as db
+    import metrics
+    from backends import SqliteBackend, make_backend
+
+    if args.backend == "sqlite":
+        db.set_backend(with_latency(SqliteBackend(":memory:"), args.rtt_ms))
+    else:
+        db.set_backend(make_backend(args.backend))
+
+    first = db.reserve_badge_ids(args.attendees)
+    badges = list(range(first, first + args.attendees))
+    db.register_attendees([{"badge_id": b, "name": f"Load Test {b}",
+                            "email": f"loadtest+{b}@example.com"} for b in badges])
+    schedule = build_schedule(badges, args.stations, args.duration, args.seed,
+                              args.scans_per_badge, dup_rate=args.dup_rate,
+                              cross_dup_rate=args.cross_dup_rate)
+    db.get_all_attendees()            # warm the roster like a running kiosk
+    metrics.reset()
+
+    results, lock = [], threading.Lock()
+    t0 = time.perf_counter() + 0.5
+    threads = [threading.Thread(target=run_station,
+                                args=(db, f"loadtest-{i}", ev, t0, args.mode, results, lock))
+               for i, ev in enumerate(schedule)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    ran = time.perf_counter() - t0
+
+    drain_start = time.perf_counter()
+    while db.scan_queue_stats()["depth"]:
+        db.flush_scans()
+    drain = time.perf_counter() - drain_start
+
+    lat = [r["latency"] for r in results]
+    due = [r["from_due"] for r in results]
+    accepted = [r for r in results if r["accepted"]]
+    checks = check_correctness(db, set(badges), {r["badge"] for r in accepted})
+    by_kind = defaultdict(lambda: [0, 0])
+    for r in results:
+        by_kind[r["kind"]][0] += 1
+        by_kind[r["kind"]][1] += r["accepted"]
+
+    report = {
+        "commit": _git_commit(), "params": vars(args),
+        "scans": len(results), "accepted": len(accepted),
+        "errors": sum(1 for r in results if r["error"]),
+        "throughput_per_s": len(results) / ran if ran else 0.0,
+        "p50_ms": _pct(lat, 0.50), "p95_ms": _pct(lat, 0.95), "p99_ms": _pct(lat, 0.99),
+        "p99_from_due_ms": _pct(due, 0.99),
+        "drain_s": drain,
+        "accepted_by_kind": {k: {"scans": v[0], "accepted": v[1]} for k, v in by_kind.items()},
+        "backend_ops": [r for r in metrics.summary_rows() if r["op"].startswith("backend.")],
+        "checks": checks,
+        # accepted scans the server dropped as replays (same idempotency key,
+        # or same badge and instant); each accepted scan has its own, so none
+        "merged_by_key": len(accepted) - checks["scanlog_rows"],
+    }
+    failed = [k for k in ("badges_without_scans", "slots_missing", "slots_double_assigned",
+                          "slots_not_in_scanlog", "slot_gaps") if checks[k]]
+
+    print(f"{args.backend}/{args.mode}: {args.stations} stations, {len(results)} scans "
+          f"in {ran:.1f}s → {report['throughput_per_s']:.1f} scans/s")
+    print(f"latency p50/p95/p99 {report['p50_ms']:.1f} / {report['p95_ms']:.1f} / "
+          f"{report['p99_ms']:.1f} ms   (p99 from arrival {report['p99_from_due_ms']:.1f} ms)")
+    print(f"queue drained in {drain:.2f}s; {report['errors']} errors; "
+          f"{report['merged_by_key']} accepted scans merged by idempotency key")
+    for kind, v in sorted(report["accepted_by_kind"].items()):
+        print(f"  {kind:<7} {v['accepted']:>6} / {v['scans']:<6} accepted")
+    for op in report["backend_ops"]:
+        print(f"  {op['op']:<28} {op['calls']:>6} calls  p95 {op['p95 ms']:.1f} ms")
+    print("checks: " + ", ".join(f"{k}={v}" for k, v in checks.items()))
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            base = json.load(f)
+        print(f"vs {base.get('commit') or args.baseline}:")
+        for key in ("throughput_per_s", "p50_ms", "p95_ms", "p99_ms", "drain_s"):
+            old, new = base.get(key) or 0.0, report[key]
+            change = f"{(new - old) / old:+.1%}" if old else "n/a"
+            print(f"  {key:<18}{old:>10.1f} → {new:>10.1f}  ({change})")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+
+    if failed:
+        raise SystemExit("correctness checks failed: " + ", ".join(failed))
+
+
+if __name__ == "__main__":
+    main()
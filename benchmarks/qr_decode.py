@@ -0,0 +1,70 @@
+# # benchmarks/qr_decode.py
+"""
+Decode every badge photo in a folder with the original and the tuned path.
+
+    python -m benchmarks.qr_decode photos/ [--repeat 3]
+
+Reports decode success rate and p50/p95 latency for each, so we can tell
+whether a kiosk keeps up with the door.
+"""
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import qr_decode
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+
+
+def legacy_decode(image_bytes: bytes) -> str:
+    """The original run_qr_scanner path."""
+    from io import BytesIO
+    img = Image.open(BytesIO(image_bytes)).convert("RGB")
+    gray = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2GRAY)
+    data, _, _ = cv2.QRCodeDetector().detectAndDecode(gray)
+    return data
+
+
+def tuned_decode(image_bytes: bytes) -> str:
+    return qr_decode.decode_qr(image_bytes).data
+
+
+def run(label, fn, images, repeat):
+    ms, ok = [], 0
+    for _ in range(repeat):
+        for blob in images:
+            t0 = time.perf_counter()
+            data = fn(blob)
+            ms.append((time.perf_counter() - t0) * 1000)
+            ok += bool(data)
+    ms = np.array(ms)
+    print(f"{label:<8}{ok / len(ms):>10.1%}{np.percentile(ms, 50):>10.1f}"
+          f"{np.percentile(ms, 95):>10.1f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="QR decode success rate and latency.")
+    ap.add_argument("folder")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    images = []
+    for f in sorted(os.listdir(args.folder)):
+        if os.path.splitext(f)[1].lower() in IMAGE_EXTS:
+            with open(os.path.join(args.folder, f), "rb") as fh:
+                images.append(fh.read())
+    if not images:
+        raise SystemExit(f"No images in {args.folder}")
+
+    print(f"{len(images)} images × {args.repeat}")
+    print(f"{'path':<8}{'decoded':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    run("legacy", legacy_decode, images, args.repeat)
+    run("tuned", tuned_decode, images, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# # benchmarks/reports.py
+"""
+Compare the vectorized report engine against the original row-by-row code.
+
+    python -m benchmarks.reports [--scans 100000] [--attendees 5000]
+
+Builds a synthetic conference, checks that both implementations return
+identical frames, and prints the timings. Empty scan logs are checked too.
+"""
+import argparse
+import datetime
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+import reports
+
+
+# ─── Original implementations (from fullapp.py, fed their inputs directly) ──
+def legacy_punch_report(attendees, raw_logs):
+    norm = []
+    for e in raw_logs:
+        bid = int(e["badge_id"])
+        ts  = e["timestamp"]
+        if isinstance(ts, str):
+            if ts.startswith("datetime.datetime"):
+                inner = ts[len("datetime.datetime("):-1]
+                ts = datetime.datetime.fromisoformat(inner)
+            else:
+                ts = datetime.datetime.fromisoformat(ts)
+        norm.append({"badge_id": bid, "timestamp": ts})
+
+    scans_by_date = defaultdict(list)
+    for e in norm:
+        d = e["timestamp"].date()
+        scans_by_date[(e["badge_id"], d)].append(e["timestamp"])
+
+    rows = []
+    info = { int(a["badge_id"]): (a["name"], a["email"]) for a in attendees }
+    for (bid, d), times in sorted(scans_by_date.items()):
+        times.sort()
+        check_in  = times[0].strftime("%H:%M:%S")
+        check_out = times[-1].strftime("%H:%M:%S")
+        name, email = info.get(bid, ("<unknown>", ""))
+        rows.append({
+            "Badge ID": bid,
+            "Name":      name,
+            "Email":     email,
+            "Date":      d.isoformat(),
+            "Check‑In":  check_in,
+            "Check‑Out": check_out
+        })
+
+    return pd.DataFrame(rows).sort_values(["Date","Badge ID"]).reset_index(drop=True)
+
+
+def legacy_flattened_log(attendees, raw_scans):
+    attendee_map = { int(a["badge_id"]): a for a in attendees }
+
+    scans_by = {}
+    for entry in sorted(raw_scans, key=lambda x: x["timestamp"]):
+        bid = int(entry["badge_id"])
+        scans_by.setdefault(bid, []).append(entry["timestamp"])
+
+    rows = []
+    for bid, times in scans_by.items():
+        info = attendee_map.get(bid, {})
+        row = {
+            "Badge ID": bid,
+            "Name":      info.get("name", f"<unregistered {bid}>"),
+            "Email":     info.get("email", ""),
+        }
+        for i in range(1, 11):
+            if i <= len(times):
+                row[f"Scan {i}"] = times[i-1].strftime("%Y-%m-%d %H:%M:%S")
+            else:
+                row[f"Scan {i}"] = ""
+        rows.append(row)
+
+    rows = sorted(rows, key=lambda r: r["Badge ID"])
+    return pd.DataFrame(rows)
+
+
+def legacy_all_scans(attendees, logs):
+    scans_map: dict[int, list[str]] = {}
+    for entry in logs:
+        try:
+            bid = int(entry["badge_id"])
+        except Exception:
+            bid = entry["badge_id"]
+        ts = entry["timestamp"]
+        if isinstance(ts, str) and ts.startswith("datetime.datetime"):
+            inner = ts.replace("datetime.datetime(", "").rstrip(")")
+            ts = datetime.datetime.fromisoformat(inner)
+        elif isinstance(ts, str):
+            ts = datetime.datetime.fromisoformat(ts)
+        s = ts.strftime("%Y-%m-%d %H:%M:%S")
+        scans_map.setdefault(bid, []).append(s)
+
+    for bid in scans_map:
+        scans_map[bid].sort()
+
+    rows = []
+    for person in attendees:
+        bid   = person["badge_id"]
+        times = scans_map.get(bid, [])
+        rows.append({
+            "Badge ID":  bid,
+            "Name":       person["name"],
+            "Email":      person["email"],
+            "All Scans":  ", ".join(times)
+        })
+    return pd.DataFrame(rows)
+
+
+# ─── Synthetic data ──────────────────────────────────────────────────────────
+def synthetic(n_scans: int, n_attendees: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    attendees = [
+        {"badge_id": b, "name": f"Attendee {b}", "email": f"a{b}@example.com"}
+        for b in range(1, n_attendees + 1)
+    ]
+    # a few badges that scanned without registering
+    badges = rng.integers(1, n_attendees + 50, size=n_scans)
+    day    = rng.integers(0, 3, size=n_scans)
+    usecs  = rng.integers(8 * 3600 * 10**6, 17 * 3600 * 10**6, size=n_scans)
+    base   = np.datetime64("2025-05-02T00:00:00", "us")
+    ts     = base + day.astype("timedelta64[D]") + usecs.astype("timedelta64[us]")
+    scans = pd.DataFrame({
+        "id":        np.arange(1, n_scans + 1, dtype="int64"),
+        "badge_id":  badges.astype("int64"),
+        "timestamp": ts.astype("datetime64[ns]"),
+    })
+    return attendees, scans
+
+
+def as_scan_log(scans: pd.DataFrame) -> list[dict]:
+    """What the original database.get_scan_log() handed the legacy code."""
+    ordered = scans.sort_values("timestamp", ascending=False, kind="stable")
+    return [
+        {"badge_id": b, "name": "", "email": "", "timestamp": t.to_pydatetime()}
+        for b, t in zip(ordered["badge_id"].tolist(), ordered["timestamp"])
+    ]
+
+
+def check_empty(attendees, scans):
+    """
+    No scans at all, and a roster nobody has scanned yet: the engine must
+    still return its usual columns (the legacy code has no columns to compare).
+    """
+    none = scans.iloc[:0]
+    for roster in ([], attendees[:20]):
+        for engine in (reports.punch_report, reports.flattened_log, reports.all_scans_table):
+            out = engine(none, roster)
+            expected = engine(scans.iloc[:1], roster)
+            assert list(out.columns) == list(expected.columns), engine.__name__
+            assert len(out) == (len(roster) if engine is reports.all_scans_table else 0)
+    pd.testing.assert_frame_equal(legacy_all_scans(attendees, []),
+                                  reports.all_scans_table(none, attendees))
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--scans", type=int, default=100_000)
+    ap.add_argument("--attendees", type=int, default=5_000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    attendees, scans = synthetic(args.scans, args.attendees, args.seed)
+    logs = as_scan_log(scans)
+
+    cases = [
+        ("punch report",  legacy_punch_report,  reports.punch_report),
+        ("flattened log", legacy_flattened_log, reports.flattened_log),
+        ("all scans",     legacy_all_scans,     reports.all_scans_table),
+    ]
+    print(f"{args.scans:,} scans / {args.attendees:,} attendees")
+    print(f"{'report':<15}{'legacy (s)':>12}{'engine (s)':>12}{'speedup':>10}")
+    for label, legacy, engine in cases:
+        old, t_old = _timed(legacy, attendees, logs)
+        new, t_new = _timed(engine, scans, attendees)
+        pd.testing.assert_frame_equal(old, new)
+        print(f"{label:<15}{t_old:>12.3f}{t_new:>12.3f}{t_old / t_new:>9.1f}x")
+    check_empty(attendees, scans)
+    print("outputs identical ✔")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# # benchmarks/schema.py
+"""
+Per-badge and per-day query times before and after migrations 005 onwards.
+
+    createdb cereport_bench
+    DATABASE_URL=postgresql:///cereport_bench python -m benchmarks.schema
+    python -m benchmarks.schema --attendees 5000 --scans-per-badge 40 --json schema.json
+
+Only runs against an empty database. It migrates to 004 (the schema the app
+grew up with: scan1..scan10 on attendees, an unindexed scanlog), loads a
+seeded synthetic conference over the programme's days with COPY, and times
+the queries the app makes. Then it applies 005 onwards, runs the partition
+backfill and times the same queries again.
+"""
+import argparse
+import csv
+import datetime
+import io
+import json
+import random
+import statistics
+import time
+
+from backfill import backfill, programme_days
+from database import LOCAL_TZ
+from migrate import connect, migrate
+
+
+# ─── Data ────────────────────────────────────────────────────────────────────
+def seed(conn, attendees: int, scans_per_badge: float, days: list[datetime.date], rng):
+    """Roster plus scanlog; the first ten scans of each badge also go in scanN."""
+    people, scans = io.StringIO(), io.StringIO()
+    people_w, scans_w = csv.writer(people), csv.writer(scans)
+    n = 0
+    for badge in range(1, attendees + 1):
+        times = sorted(
+            datetime.datetime.combine(rng.choice(days), datetime.time(8), LOCAL_TZ)
+            + datetime.timedelta(seconds=rng.uniform(0, 9 * 3600))
+            for _ in range(max(1, round(rng.expovariate(1 / scans_per_badge)))))
+        slots = [t.isoformat() for t in times[:10]] + [""] * (10 - min(len(times), 10))
+        people_w.writerow([badge, f"Bench Attendee {badge}", f"bench+{badge}@example.com", *slots])
+        scans_w.writerows((badge, t.isoformat()) for t in times)
+        n += len(times)
+    people.seek(0)
+    scans.seek(0)
+    cols = ", ".join(f"scan{i}" for i in range(1, 11))
+    with conn, conn.cursor() as cur:
+        cur.copy_expert(f"copy public.attendees (badge_id, name, email, {cols}) "
+                        "from stdin with (format csv)", people)
+        cur.copy_expert('copy public.scanlog (badge_id, "timestamp") from stdin with (format csv)',
+                        scans)
+    return n
+
+
+def analyze(conn):
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute("analyze")
+    conn.autocommit = False
+
+
+# ─── Queries ─────────────────────────────────────────────────────────────────
+def day_bounds(day: datetime.date) -> tuple[str, str]:
+    start = datetime.datetime.combine(day, datetime.time(), LOCAL_TZ)
+    return start.isoformat(), (start + datetime.timedelta(days=1)).isoformat()
+
+
+def workload(slots_sql: str, attendees: int, days: list[datetime.date], phase: str):
+    """(name, sql, params factory, repetitions) for each query the app makes."""
+    badge = lambda rng: (rng.randint(1, attendees),)
+    day = lambda rng: day_bounds(rng.choice(days))
+    counter = iter(range(10 ** 9))
+
+    def new_scan(rng):
+        ts = datetime.datetime.combine(rng.choice(days), datetime.time(18), LOCAL_TZ) \
+             + datetime.timedelta(microseconds=next(counter))
+        return rng.randint(1, attendees), ts.isoformat(), f"bench-{phase}-{ts.timestamp()}"
+
+    return [
+        ("badge history",
+         'select "timestamp" from public.scanlog where badge_id = %s order by "timestamp"',
+         badge, 300),
+        ("badge slots", slots_sql, badge, 300),
+        ("day headcount",
+         'select count(distinct badge_id) from public.scanlog '
+         'where "timestamp" >= %s and "timestamp" < %s', day, 20),
+        ("day log page (query_scan_log)",
+         'select id, badge_id, "timestamp" from public.scanlog '
+         'where "timestamp" >= %s and "timestamp" < %s order by "timestamp" desc limit 100',
+         day, 50),
+        ("log_scan rpc", "select public.log_scan(%s, %s, %s)", new_scan, 300),
+    ]
+
+
+def run(conn, queries, seed_value: int) -> dict[str, dict]:
+    rng = random.Random(seed_value)
+    out = {}
+    for name, sql, params, reps in queries:
+        times = []
+        for _ in range(reps):
+            p = params(rng)
+            t0 = time.perf_counter()
+            with conn, conn.cursor() as cur:
+                cur.execute(sql, p)
+                cur.fetchall()
+            times.append((time.perf_counter() - t0) * 1000)
+        times.sort()
+        out[name] = {"p50_ms": statistics.median(times),
+                     "p95_ms": times[min(len(times) - 1, int(0.95 * len(times)))]}
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Query timings before/after the scanlog migrations.")
+    ap.add_argument("--attendees", type=int, default=3000)
+    ap.add_argument("--scans-per-badge", type=float, default=30.0)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--json", help="write the results here")
+    args = ap.parse_args()
+
+    conn = connect()
+    with conn, conn.cursor() as cur:
+        cur.execute("select to_regclass('public.attendees') is not null")
+        if cur.fetchone()[0]:
+            raise SystemExit("benchmarks.schema needs an empty database (it creates its own tables)")
+
+    quiet = lambda msg: None
+    days = programme_days()
+    migrate(conn, "004", log=quiet)
+    t0 = time.perf_counter()
+    n = seed(conn, args.attendees, args.scans_per_badge, days, random.Random(args.seed))
+    analyze(conn)
+    print(f"{args.attendees} attendees, {n} scans over {len(days)} days "
+          f"loaded in {time.perf_counter() - t0:.1f}s")
+
+    cols = ", ".join(f"scan{i}" for i in range(1, 11))
+    before = run(conn, workload(f"select {cols} from public.attendees where badge_id = %s",
+                                args.attendees, days, "before"), args.seed)
+
+    t0 = time.perf_counter()
+    migrate(conn, log=quiet)
+    backfill(conn, days, log=quiet)
+    analyze(conn)
+    print(f"migrations 005+ and backfill took {time.perf_counter() - t0:.1f}s")
+    after = run(conn, workload("select * from public.attendee_scan_slots where badge_id = %s",
+                               args.attendees, days, "after"), args.seed)
+    conn.close()
+
+    print(f"{'query':<32}{'before p50':>12}{'after p50':>12}{'speedup':>10}{'after p95':>12}")
+    for name in before:
+        b, a = before[name]["p50_ms"], after[name]["p50_ms"]
+        print(f"{name:<32}{b:>10.2f}ms{a:>10.2f}ms{b / a if a else 0:>9.1f}x"
+              f"{after[name]['p95_ms']:>10.2f}ms")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"params": vars(args), "scans": n, "before": before, "after": after}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
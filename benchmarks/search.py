@@ -0,0 +1,86 @@
+# # benchmarks/search.py
+"""
+Per-keystroke latency of the attendee search index.
+
+    python -m benchmarks.search [--attendees 10000] [--queries 300]
+
+Builds a synthetic roster, then replays staff typing names, emails and
+badge numbers one character at a time (some with a typo) and reports build
+time, incremental add time and the p50/p99/max of every keystroke.
+"""
+import argparse
+import random
+import time
+
+from attendee_search import AttendeeIndex
+
+FIRST = ("James Mary John Patricia Robert Jennifer Michael Linda William Elizabeth David "
+         "Barbara Richard Susan Joseph Jessica Thomas Sarah José Zoë Nguyen Anh Chloé "
+         "Mohammed Priya Wei Olga Søren").split()
+LAST  = ("Smith Johnson Williams Brown Jones Garcia Miller Davis Rodriguez Martinez "
+         "Hernandez Lopez Gonzalez Wilson Anderson Thomas Taylor Moore Jackson Martin Lee "
+         "Perez Thompson White Harris Sanchez Clark Ramirez Lewis Robinson Walker Young "
+         "Allen King Wright Scott Torres Nguyen Hill Flores Green Adams Nelson Baker Hall "
+         "Rivera Campbell Mitchell Carter Roberts Müller O'Brien").split()
+
+
+def roster(n: int, rng) -> list[dict]:
+    rows = []
+    for badge in range(1, n + 1):
+        first, last = rng.choice(FIRST), rng.choice(LAST)
+        rows.append({"badge_id": badge, "name": f"{first} {last}",
+                     "email": f"{first[0]}{last}{rng.randint(1, 999)}@example.org".lower()})
+    return rows
+
+
+def typo(text: str, rng) -> str:
+    i = rng.randrange(1, len(text))
+    return text[:i] + text[i + 1:] if rng.random() < 0.5 else text[:i] + text[i - 1] + text[i:]
+
+
+def typed_queries(rows: list[dict], count: int, rng) -> list[str]:
+    out = []
+    for _ in range(count):
+        row = rng.choice(rows)
+        target = rng.choice([row["name"], row["name"], row["email"], str(row["badge_id"])])
+        if len(target) > 3 and rng.random() < 0.2:
+            target = typo(target, rng)
+        out.extend(target[:k] for k in range(1, len(target) + 1))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Attendee search latency per keystroke.")
+    ap.add_argument("--attendees", type=int, default=10000)
+    ap.add_argument("--queries", type=int, default=300, help="attendees looked up by typing")
+    ap.add_argument("--limit", type=int, default=8)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = roster(args.attendees, rng)
+    t0 = time.perf_counter()
+    index = AttendeeIndex(rows)
+    build = time.perf_counter() - t0
+
+    extra = roster(100, rng)
+    t0 = time.perf_counter()
+    for i, row in enumerate(extra):
+        index.add({**row, "badge_id": args.attendees + 1 + i})
+    add_ms = (time.perf_counter() - t0) * 1000 / len(extra)
+
+    keystrokes = typed_queries(rows, args.queries, rng)
+    times = []
+    for q in keystrokes:
+        t0 = time.perf_counter()
+        index.search(q, args.limit)
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+
+    print(f"{args.attendees} attendees indexed in {build:.2f}s; add {add_ms:.3f} ms per row")
+    print(f"{len(times)} keystrokes: p50 {times[len(times) // 2]:.3f} ms  "
+          f"p99 {times[int(len(times) * 0.99)]:.3f} ms  max {times[-1]:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# # benchmarks/startup.py
+"""
+Cold-start cost of the apps' import graph.
+
+    python -m benchmarks.startup [--repeat 5] [--max-import-ms 800]
+    python -m benchmarks.startup --app fullapp.py     # also time app runs
+
+Each module is imported in a fresh interpreter so nothing is cached between
+samples. Reports the median import time and which heavy libraries came along
+with it; --max-import-ms turns the run into a regression check (non-zero exit
+when `database` imports slower than that). --app runs the script once cold and
+then reruns it through streamlit's AppTest, which needs a configured backend.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY = ["cv2", "pandas", "numpy", "PIL", "qrcode", "supabase", "reportlab", "docx"]
+MODULES = ["database", "reports", "attendance", "exports", "qr_decode", "certificates"]
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+ms = (time.perf_counter() - t0) * 1000
+print(json.dumps({{"ms": ms, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def import_cost(module: str, repeat: int) -> tuple[float, list[str]]:
+    """Median import time (ms) of `module` in a fresh interpreter, plus heavy deps loaded."""
+    samples, heavy = [], []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY)],
+                             capture_output=True, text=True)
+        if out.returncode:
+            return float("nan"), [out.stderr.strip().splitlines()[-1]]
+        res = json.loads(out.stdout.strip().splitlines()[-1])
+        samples.append(res["ms"])
+        heavy = res["heavy"]
+    return statistics.median(samples), heavy
+
+
+def app_runs(script: str, reruns: int) -> None:
+    from streamlit.testing.v1 import AppTest
+    t0 = time.perf_counter()
+    at = AppTest.from_file(script, default_timeout=120).run()
+    print(f"{script}: cold run {(time.perf_counter() - t0) * 1000:.0f} ms")
+    ms = []
+    for _ in range(reruns):
+        t0 = time.perf_counter()
+        at.run()
+        ms.append((time.perf_counter() - t0) * 1000)
+    if ms:
+        print(f"{script}: rerun p50 {statistics.median(ms):.0f} ms over {len(ms)}")
+    if at.exception:
+        print(f"{script}: raised {at.exception[0].message}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Import and first-render timings.")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--max-import-ms", type=float, default=None,
+                    help="fail when `database` imports slower than this")
+    ap.add_argument("--app", action="append", default=[], help="streamlit script to run")
+    ap.add_argument("--reruns", type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"{'module':<14}{'import ms':>10}  heavy deps loaded")
+    costs = {}
+    for mod in MODULES:
+        ms, heavy = import_cost(mod, args.repeat)
+        costs[mod] = ms
+        print(f"{mod:<14}{ms:>10.0f}  {', '.join(heavy) or '-'}")
+
+    for script in args.app:
+        app_runs(script, args.reruns)
+
+    if args.max_import_ms is not None and not costs["database"] <= args.max_import_ms:
+        raise SystemExit(f"database import {costs['database']:.0f} ms "
+                         f"> budget {args.max_import_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
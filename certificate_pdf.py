@@ -0,0 +1,188 @@
+# # certificate_pdf.py
+"""
+Native PDF certificates with reportlab, no Word or LibreOffice involved.
+
+The layout is compiled once per process: fonts are registered, static text
+is measured and positioned, and every CE session's table row is wrapped in
+advance. Rendering an attendee then only stamps the name, total hours,
+their session rows and the attendance-email page into an in-memory PDF.
+"""
+import os
+from functools import lru_cache
+from io import BytesIO
+
+from reportlab.lib.colors import HexColor
+from reportlab.lib.pagesizes import landscape, letter
+from reportlab.lib.units import inch
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen import canvas
+
+from conference import sessions
+
+TITLE      = "Certificate of Training"
+PREAMBLE   = "This is to certify that"
+HOURS_LINE = "{hours:.1f} In-Person Hours of Continuing Education Units"
+FOOTER     = os.getenv("CERT_FOOTER", "")
+FONT_PATH  = os.getenv("CERT_FONT_PATH")       # optional TTF for names outside Latin-1
+
+ACCENT = HexColor("#1f3b5c")
+RULE   = HexColor("#8c8c8c")
+
+
+class CertificateLayout:
+    """Geometry, fonts and pre-wrapped session rows; build once, stamp many."""
+
+    COLUMNS = (("Date", 1.35), ("Session", 3.9), ("Presenter", 2.65), ("Credits", 0.9))
+
+    def __init__(self, ce_sessions: list[dict] = sessions):
+        self.page_w, self.page_h = landscape(letter)
+        self.margin = 0.6 * inch
+        self.body_font, self.bold_font, self.name_font = "Helvetica", "Helvetica-Bold", "Times-BoldItalic"
+        if FONT_PATH:
+            from reportlab.pdfbase import pdfmetrics
+            from reportlab.pdfbase.ttfonts import TTFont
+            pdfmetrics.registerFont(TTFont("CertFont", FONT_PATH))
+            self.body_font = self.bold_font = self.name_font = "CertFont"
+
+        # table columns, scaled to the printable width
+        usable = self.page_w - 2 * self.margin - 0.4 * inch
+        scale = usable / sum(w for _, w in self.COLUMNS) / inch
+        x = self.margin + 0.2 * inch
+        self.columns = []
+        for label, w in self.COLUMNS:
+            self.columns.append((label, x, w * scale * inch))
+            x += w * scale * inch
+
+        self.table_top = self.page_h - 3.55 * inch
+        self.font_size = 8.5
+        self.leading   = 10.5
+        self._rows = {self._key(s): self._wrap(s) for s in ce_sessions}
+
+    @staticmethod
+    def _key(s: dict) -> tuple:
+        return (s["date"], s["title"], s["speaker"], s["credits"])
+
+    def _wrap(self, s: dict) -> tuple[list[list[str]], float]:
+        """Cell lines for one session and the row height they need."""
+        values = (s["date"].replace("\n", " "), s["title"], s["speaker"], f"{s['credits']} hrs.")
+        cells = [simpleSplit(v, self.body_font, self.font_size, w - 6)
+                 for v, (_, _, w) in zip(values, self.columns)]
+        return cells, max(len(c) for c in cells) * self.leading + 4
+
+    def row(self, s: dict):
+        key = self._key(s)
+        if key not in self._rows:              # a session not in the programme
+            self._rows[key] = self._wrap(s)
+        return self._rows[key]
+
+    # ─── Drawing ──────────────────────────────────────────────────────────
+    def draw_static(self, c: canvas.Canvas):
+        """Border, heading and table header: identical on every certificate."""
+        m = self.margin
+        c.setStrokeColor(ACCENT)
+        c.setLineWidth(3)
+        c.rect(m / 2, m / 2, self.page_w - m, self.page_h - m)
+        c.setLineWidth(0.8)
+        c.rect(m / 2 + 6, m / 2 + 6, self.page_w - m - 12, self.page_h - m - 12)
+
+        c.setFillColor(ACCENT)
+        c.setFont(self.bold_font, 30)
+        c.drawCentredString(self.page_w / 2, self.page_h - 1.25 * inch, TITLE.upper())
+        c.setFillColor(HexColor("#000000"))
+        c.setFont(self.body_font, 13)
+        c.drawCentredString(self.page_w / 2, self.page_h - 1.7 * inch, PREAMBLE)
+
+        y = self.table_top
+        c.setFont(self.bold_font, 9)
+        for label, x, _ in self.columns:
+            c.drawString(x + 3, y - 11, label)
+        c.setStrokeColor(RULE)
+        c.setLineWidth(0.6)
+        c.line(self.columns[0][1], y - 15, self.columns[-1][1] + self.columns[-1][2], y - 15)
+
+        if FOOTER:
+            c.setFont(self.body_font, 9)
+            c.drawCentredString(self.page_w / 2, m / 2 + 18, FOOTER)
+        sig_y = m + 0.55 * inch
+        c.setStrokeColor(HexColor("#000000"))
+        c.line(self.page_w - m - 3.2 * inch, sig_y, self.page_w - m - 0.4 * inch, sig_y)
+        c.setFont(self.body_font, 9)
+        c.drawString(self.page_w - m - 3.2 * inch, sig_y - 12, "Authorized signature")
+
+    def stamp(self, c: canvas.Canvas, name: str, sessions_attended: list[dict]):
+        """Per-attendee fields on top of the static artwork."""
+        c.setFont(self.name_font, 32)
+        c.drawCentredString(self.page_w / 2, self.page_h - 2.35 * inch, name)
+        hours = sum(s["credits"] for s in sessions_attended)
+        c.setFont(self.body_font, 13)
+        c.drawCentredString(self.page_w / 2, self.page_h - 2.85 * inch,
+                            HOURS_LINE.format(hours=hours))
+
+        y = self.table_top - 18
+        bottom = self.margin + 0.9 * inch
+        c.setFont(self.body_font, self.font_size)
+        for s in sessions_attended:
+            cells, height = self.row(s)
+            if y - height < bottom:            # more rows than fit: continue on a new page
+                c.showPage()
+                c.setFont(self.body_font, self.font_size)
+                y = self.page_h - self.margin
+            for lines, (_, x, _) in zip(cells, self.columns):
+                ty = y - self.leading
+                for line in lines:
+                    c.drawString(x + 3, ty, line)
+                    ty -= self.leading
+            y -= height
+
+    def email_page(self, c: canvas.Canvas, email_text: str):
+        """The attendance email on its own portrait-width text block."""
+        c.showPage()
+        width = self.page_w - 2 * self.margin
+        t = c.beginText(self.margin, self.page_h - self.margin)
+        t.setFont(self.body_font, 11)
+        t.setLeading(15)
+        for para in email_text.split("\n"):
+            for line in simpleSplit(para, self.body_font, 11, width) or [""]:
+                if t.getY() < self.margin:
+                    c.drawText(t)
+                    c.showPage()
+                    t = c.beginText(self.margin, self.page_h - self.margin)
+                    t.setFont(self.body_font, 11)
+                    t.setLeading(15)
+                t.textLine(line)
+        c.drawText(t)
+
+
+@lru_cache(maxsize=1)
+def layout() -> CertificateLayout:
+    return CertificateLayout()
+
+
+# ─── Rendering ───────────────────────────────────────────────────────────────
+def _certificate_pages(c: canvas.Canvas, lay: CertificateLayout, name: str,
+                       sessions_attended: list[dict], email_text: str | None):
+    c.doForm("static")
+    lay.stamp(c, name, sessions_attended)
+    if email_text:
+        lay.email_page(c, email_text)
+    c.showPage()
+
+
+def _new_canvas(buf: BytesIO, lay: CertificateLayout, title: str) -> canvas.Canvas:
+    c = canvas.Canvas(buf, pagesize=(lay.page_w, lay.page_h), pageCompression=1)
+    c.setTitle(title)
+    c.beginForm("static")
+    lay.draw_static(c)
+    c.endForm()
+    return c
+
+
+def render_certificate(name: str, sessions_attended: list[dict],
+                       email_text: str | None = None) -> bytes:
+    """One attendee's certificate (+ email page) as PDF bytes."""
+    lay = layout()
+    buf = BytesIO()
+    c = _new_canvas(buf, lay, f"{TITLE} – {name}")
+    _certificate_pages(c, lay, name, sessions_attended, email_text)
+    c.save()
+    return buf.getvalue()
@@ -0,0 +1,209 @@
+# # certificates.py
+"""
+CEU certificate rendering, one at a time or for a whole conference.
+
+    python certificates.py --out certificates [--session 0 --session 3 ...] [--docx]
+
+PDFs come from the native reportlab renderer (certificate_pdf) straight into
+memory. The Word template is only read when an editable DOCX is asked for.
+The batch path renders attendees in parallel and writes the PDFs (and DOCX
+files) with a manifest.csv directly into a single zip.
+"""
+import argparse
+import copy
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import pandas as pd
+
+from attendance import credited_sessions
+from certificate_pdf import render_certificate
+from conference import sessions
+from emails import day_summaries, render_email
+from metrics import timed
+
+TEMPLATE_PATH = "Certficate of Training Blank (1).docx"
+
+
+# ─── Generate Email Message ───────────────────────────
+def generate_attendance_email(name, scans_df, badge_id=None):
+    """
+    Attendance email for one attendee. Scans are matched on badge_id when it
+    is given, otherwise on a name column, otherwise the frame is taken to be
+    this attendee's own scans.
+    """
+    if badge_id is not None:
+        scans_df = scans_df[scans_df["badge_id"].astype(int) == int(badge_id)]
+    elif "name" in scans_df:
+        scans_df = scans_df[scans_df["name"] == name]
+    days = day_summaries(scans_df.assign(badge_id=0)).get(0, {})
+    return render_email(name, days)
+
+
+# ─── Certificate document ─────────────────────────────
+@timed("certificates.build")
+def build_certificate(template, name, sessions_attended, email_text):
+    """Fill a copy of the parsed template; the template itself is untouched."""
+    from docx.shared import Pt
+    from docx.oxml.ns import qn
+    doc = copy.deepcopy(template)
+    total_credits = sum(s["credits"] for s in sessions_attended)
+    for para in doc.paragraphs:
+        if "Jane Doe" in para.text:
+            para.text = para.text.replace("Jane Doe", name)
+            run = para.runs[0] if para.runs else para.add_run(name)
+            run.font.size = Pt(20)
+            run.font.name = 'Monotype Corsiva'
+            run.bold = True
+            rFonts = run._element.rPr.rFonts
+            rFonts.set(qn('w:eastAsia'), 'Monotype Corsiva')
+        if "18 In-Person Hours" in para.text:
+            para.text = f"{total_credits:.1f} In-Person Hours of Continuing Education Units"
+            para.runs[0].font.size = Pt(12)
+
+    table = doc.tables[0]
+    for i in range(len(table.rows) - 1, 0, -1):
+        table._tbl.remove(table._tbl.tr_lst[i])
+    for s in sessions_attended:
+        row = table.add_row()
+        row.cells[0].text = s["date"]
+        row.cells[1].text = s["title"]
+        row.cells[2].text = s["speaker"]
+        row.cells[3].text = f"{s['credits']} hrs."
+
+    doc.add_page_break()
+    doc.add_paragraph(email_text)
+    return doc
+
+
+def _docx_bytes(template, name, sessions_attended, email_text) -> bytes:
+    buf = BytesIO()
+    build_certificate(template, name, sessions_attended, email_text).save(buf)
+    return buf.getvalue()
+
+
+@timed("certificates.generate")
+def generate_certificate(name, sessions_attended, scans_df, docx: bool = False):
+    """
+    Returns (pdf bytes, docx bytes or None). The DOCX is only built when asked
+    for and the Word template is present.
+    """
+    email_text = generate_attendance_email(name, scans_df)
+    pdf = render_certificate(name, sessions_attended, email_text)
+    doc = None
+    if docx and os.path.exists(TEMPLATE_PATH):
+        from docx import Document
+        doc = _docx_bytes(Document(TEMPLATE_PATH), name, sessions_attended, email_text)
+    return pdf, doc
+
+
+# ─── Batch rendering ──────────────────────────────────
+_worker_template = None
+
+
+def _init_worker(template_path):
+    global _worker_template
+    if template_path:
+        from docx import Document
+        _worker_template = Document(template_path)
+
+
+def _render_job(job: dict, pdf: bool, docx: bool) -> tuple[dict, bytes, bytes]:
+    safe = re.sub(r"[^\w.-]+", "_", job["name"]).strip("_") or "attendee"
+    stem = f"{job['badge_id']}_{safe}_CERT"
+    row = {"badge_id": job["badge_id"], "name": job["name"],
+           "docx": "", "pdf": "", "status": "ok", "error": ""}
+    pdf_bytes = docx_bytes = b""
+    try:
+        if pdf:
+            pdf_bytes = render_certificate(job["name"], job["sessions"], job["email_text"])
+            row["pdf"] = stem + ".pdf"
+        if docx:
+            docx_bytes = _docx_bytes(_worker_template, job["name"], job["sessions"],
+                                     job["email_text"])
+            row["docx"] = stem + ".docx"
+    except Exception as e:
+        row.update(status="failed", error=f"render: {e}")
+    return row, pdf_bytes, docx_bytes
+
+
+@timed("certificates.generate_batch")
+def generate_batch(jobs: list[dict], out_dir: str, template_path: str = TEMPLATE_PATH,
+                   workers: int | None = None, pdf: bool = True, docx: bool = False):
+    """
+    Render one certificate per job ({badge_id, name, sessions, email_text}).
+    Returns (zip_path, manifest DataFrame); failures are recorded, not raised.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    template = template_path if docx else None
+    if len(jobs) < 64:
+        _init_worker(template)
+        results = [_render_job(j, pdf, docx) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(template,)) as pool:
+            results = list(pool.map(_render_job, jobs, [pdf] * len(jobs), [docx] * len(jobs),
+                                    chunksize=max(1, len(jobs) // 64)))
+
+    zip_path = os.path.join(out_dir, "certificates.zip")
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for row, pdf_bytes, docx_bytes in results:
+            if row["pdf"]:
+                zf.writestr(row["pdf"], pdf_bytes)
+            if row["docx"]:
+                zf.writestr(row["docx"], docx_bytes)
+        manifest = pd.DataFrame([r for r, _, _ in results],
+                                columns=["badge_id", "name", "docx", "pdf", "status", "error"])
+        zf.writestr("manifest.csv", manifest.to_csv(index=False))
+    return zip_path, manifest
+
+
+def batch_jobs(attendees: list[dict], scans_df: pd.DataFrame,
+               sessions_attended: list[dict] | None = None) -> list[dict]:
+    """
+    One job per attendee who earned credit. With sessions_attended None the
+    sessions are inferred from scans (attendance.credited_sessions); otherwise
+    every scanned attendee is credited with sessions_attended.
+    """
+    if sessions_attended is None:
+        earned = credited_sessions(scans_df)
+    else:
+        scanned = set(scans_df["badge_id"].astype(int)) if len(scans_df) else set()
+        earned = {b: sessions_attended for b in scanned}
+    summary = day_summaries(scans_df)
+    return [
+        {"badge_id": int(a["badge_id"]), "name": a["name"],
+         "sessions": earned[int(a["badge_id"])],
+         "email_text": render_email(a["name"], summary.get(int(a["badge_id"]), {}))}
+        for a in attendees
+        if int(a["badge_id"]) in earned and a.get("name")
+    ]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Generate CEU certificates for every scanned attendee.")
+    ap.add_argument("--out", default="certificates", help="output folder")
+    ap.add_argument("--session", type=int, action="append",
+                    help="credit this index into conference.sessions for everyone "
+                         "(repeatable; default: infer from scans)")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--docx", action="store_true", help="also write editable DOCX files")
+    ap.add_argument("--no-pdf", action="store_true", help="skip the PDFs (with --docx)")
+    args = ap.parse_args()
+
+    from database import get_all_attendees, get_scan_frame
+    chosen = [sessions[i] for i in args.session] if args.session else None
+    jobs = batch_jobs(get_all_attendees(), get_scan_frame(), chosen)
+    zip_path, manifest = generate_batch(jobs, args.out, workers=args.workers,
+                                        pdf=not args.no_pdf, docx=args.docx)
+    failed = manifest[manifest["status"] != "ok"]
+    print(f"{len(manifest) - len(failed)} ok, {len(failed)} failed → {zip_path}")
+    if len(failed):
+        print(failed.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,61 +1,20 @@
 # 🎓 Final Clean Streamlit App for CEU Certificate + Email Message (PDF optional)
 
-import streamlit as st
-from docx import Document
-from docx.shared import Pt
-from docx.oxml.ns import qn
-import pandas as pd
 import os
-from dotenv import load_dotenv
-from supabase import create_client
-from datetime import datetime
-from docx2pdf import convert
-
-from database import get_all_attendees, get_scan_log
-
-
-
-# ─── Setup Supabase ─────────────────────────────────────
-load_dotenv()
-supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
-
-
-attendees_data = pd.DataFrame(get_all_attendees())
-    if attendees_data.empty:
-        st.error("⚠️ No attendees found in the database. Please check your Supabase connection.")
-        st.stop()
-scan_data = pd.DataFrame(get_scan_log())
-
-
-# ─── Sessions Info ─────────────────────────────────────
-sessions = [
-    {"date": "May 2, 2025\n8:30", "title": "Prevention of Child Molestation", "speaker": "Matthew L. Ferrara, Ph.D.", "credits": 1.5},
-    {"date": "May 2, 2025\n10:30", "title": "Overview of the Texas Department of Criminal Justice", "speaker": "Jennifer Deyne, LPC-S, LSOTP-S", "credits": 1.5},
-    {"date": "May 2, 2025\n1:30 and 3:30", "title": "Taking the High Road-Ethical Challenges", "speaker": "Dan Powers, LCSW-S", "credits": 3.0},
-    {"date": "May 3, 2025\n8:30", "title": "Role of LSOTPs & Polygraph Examiners", "speaker": "Sean Braun, LSOTP; Clay Wood", "credits": 1.5},
-    {"date": "May 3, 2025\n10:30", "title": "Working with Female Juveniles", "speaker": "Francisco Torres, LSOTP", "credits": 1.5},
-    {"date": "May 3, 2025\n1:30", "title": "Treating Clients with Mild Autism", "speaker": "Emily Dixon, Ph.D.", "credits": 1.5},
-    {"date": "May 3, 2025\n3:30", "title": "Sexual Addiction Treatment", "speaker": "Matthew L. Ferrara, Ph.D.", "credits": 1.5},
-    {"date": "May 4, 2025\n8:30", "title": "Risk Assessment Reports", "speaker": "Matthew L. Ferrara, Ph.D.", "credits": 1.5},
-    {"date": "May 4, 2025\n10:30", "title": "Chaperon Program for Your Practice", "speaker": "Shelley Graham, Ph.D., LSOTP; Anna Shursen, Ph.D., LSOTP", "credits": 1.5},
-    {"date": "May 4, 2025\n1:30", "title": "Legal Aspects of Deregistration", "speaker": "Scott Smith, Esq", "credits": 1.5},
-    {"date": "May 4, 2025\n3:30", "title": "Adolescent Risk-Need-Responsivity", "speaker": "Casey O'Neal, Ph.D.", "credits": 1.5},
-]
+import streamlit as st
+import tempfile
 
-# ─── Streamlit UI ─────────────────────────────────────
-st.title("🎓 CEU Certificate Generator")
-badge_ids = sorted(attendees_data["badge_id"].astype(int).unique())
-selected_badge = st.selectbox("Select attendee by badge number:", badge_ids)
-    
-selected_row = attendees_data[attendees_data["badge_id"] == selected_badge].iloc[0]
-name = selected_row["name"]
-email = selected_row.get("email", "no-email@example.com")
+from database import get_all_attendees, get_badge_scans, get_scan_frame, search_attendees
+from conference import sessions
+from attendance import credited_sessions
 
-st.write(f"**Name:** {name}")
-st.write(f"**Email:** {email}")
 
+# Roster comes from the shared cache; scans are loaded per badge on demand.
+people = get_all_attendees()
+if not people:
+    st.error("⚠️ No attendees found in the database. Please check your Supabase connection.")
+    st.stop()
 
-st.write("Attendees Columns:", attendees_data.columns.tolist())
 
 def get_scans_by_day(scan_df, person_name):
     person_scans = scan_df[scan_df["name"] == person_name]
@@ -68,75 +27,95 @@ def get_scans_by_day(scan_df, person_name):
         summary.append((day.strftime("%B %d, %Y"), check_in, check_out))
     return summary
 
-selected_sessions = []
-for session in sessions:
-    label = f"{session['date']} – {session['title']} ({session['credits']} hrs)"
-    if st.checkbox(label):
-        selected_sessions.append(session)
-
-
-
-# ─── Generate Email Message ───────────────────────────
-def generate_attendance_email(name, scans_df):
-    person_scans = scans_df[scans_df["name"] == name]
-    email_lines = [f"Hi {name.split()[0]},\n",
-                   "Thank you so much for attending the conference! According to our scan records, it looks like you were present during the following times:\n"]
-    for day in ["2025-05-02", "2025-05-03", "2025-05-04"]:
-        day_dt = datetime.strptime(day, "%Y-%m-%d").date()
-        day_scans = person_scans[person_scans["date"] == day_dt]
-        if not day_scans.empty:
-            in_time = day_scans["timestamp"].min().strftime("%I:%M %p")
-            out_time = day_scans["timestamp"].max().strftime("%I:%M %p")
-            email_lines.append(f"\u2022 {day_dt.strftime('%B %d, %Y')}: {in_time} to {out_time}")
-        else:
-            email_lines.append(f"\u2022 {day_dt.strftime('%B %d, %Y')}: No record")
-    email_lines.append("\nIf any of these details need to be updated, just reply to this email and I’ll be happy to take care of it.\n")
-    email_lines.append("Thanks again for being part of the event!\n\nBest,\n[Your Name]\n[Your Organization]")
-    return "\n".join(email_lines)
-
-
-# ─── Generate Certificate Function ────────────────────
-def generate_certificate(name, sessions_attended, scans_df):
-    doc = Document("Certficate of Training Blank (1).docx")
-    total_credits = sum(s["credits"] for s in sessions_attended)
-    for para in doc.paragraphs:
-        if "Jane Doe" in para.text:
-            para.text = para.text.replace("Jane Doe", name)
-            run = para.runs[0] if para.runs else para.add_run(name)
-            run.font.size = Pt(20)
-            run.font.name = 'Monotype Corsiva'
-            run.bold = True
-            rFonts = run._element.rPr.rFonts
-            rFonts.set(qn('w:eastAsia'), 'Monotype Corsiva')
-        if "18 In-Person Hours" in para.text:
-            para.text = f"{total_credits:.1f} In-Person Hours of Continuing Education Units"
-            para.runs[0].font.size = Pt(12)
-
-    table = doc.tables[0]
-    for i in range(len(table.rows) - 1, 0, -1):
-        table._tbl.remove(table._tbl.tr_lst[i])
-    for s in sessions_attended:
-        row = table.add_row()
-        row.cells[0].text = s["date"]
-        row.cells[1].text = s["title"]
-        row.cells[2].text = s["speaker"]
-        row.cells[3].text = f"{s['credits']} hrs."
-
-    doc.add_page_break()
-    doc.add_paragraph(generate_attendance_email(name, scans_df))
-
-    docx_file = f"{name.replace(' ', '_')}_CERT.docx"
-    doc.save(docx_file)
-    convert(docx_file)  # Creates PDF automatically
-    return docx_file, docx_file.replace(".docx", ".pdf")
-
-# ─── Download Button ──────────────────────────────────
-if name and selected_sessions:
-    if st.button("🖨️ Generate Certificate with Email"):
-        docx_file, pdf_file = generate_certificate(name, selected_sessions, scan_data)
-        with open(pdf_file, "rb") as f:
-            st.download_button("📥 Download PDF Certificate + Email", f, file_name=pdf_file)
-        with open(docx_file, "rb") as f:
-            st.download_button("📄 Download DOCX (editable)", f, file_name=docx_file)
-
 
+# ─── Streamlit UI ─────────────────────────────────────
+st.title("🎓 CEU Certificate Generator")
+query = st.text_input("Find attendee by name, email or badge number:", key="attendee_search")
+matches = search_attendees(query, limit=10) if query.strip() else []
+if query.strip() and not matches:
+    st.caption("No attendee matches that search.")
+selected_row = st.selectbox("Select attendee:", matches, index=0 if matches else None,
+                            format_func=lambda p: f"{p['badge_id']} – {p['name']}")
+
+if selected_row is None:
+    st.info("Search for an attendee to build their certificate.")
+else:
+    selected_badge = int(selected_row["badge_id"])
+    name = selected_row["name"]
+    email = selected_row.get("email") or "no-email@example.com"
+
+    st.write(f"**Name:** {name}")
+    st.write(f"**Email:** {email}")
+
+    scan_data = get_badge_scans(selected_badge).assign(name=name)
+
+    # pre-tick the sessions this badge's scans cover; staff can still adjust
+    earned = credited_sessions(scan_data)
+    inferred = earned.get(selected_badge, [])
+
+    selected_sessions = []
+    for i, session in enumerate(sessions):
+        label = f"{session['date']} – {session['title']} ({session['credits']} hrs)"
+        if st.checkbox(label, value=session in inferred, key=f"session_{selected_badge}_{i}"):
+            selected_sessions.append(session)
+
+    # ─── Download Button ──────────────────────────────
+    if name and selected_sessions:
+        if st.button("🖨️ Generate Certificate with Email"):
+            from certificates import generate_certificate
+            pdf_bytes, docx_bytes = generate_certificate(name, selected_sessions, scan_data, docx=True)
+            stem = f"{name.replace(' ', '_')}_CERT"
+            st.download_button("📥 Download PDF Certificate + Email", pdf_bytes,
+                               file_name=stem + ".pdf", mime="application/pdf")
+            if docx_bytes:
+                st.download_button("📄 Download DOCX (editable)", docx_bytes,
+                                   file_name=stem + ".docx")
+
+
+# ─── Batch: every scanned attendee ────────────────────
+st.markdown("---")
+st.subheader("📦 Batch Certificates")
+st.caption("Creates certificates for every attendee who earned credit, "
+           "with sessions inferred from their scans.")
+if st.button("🖨️ Generate All Certificates"):
+    from certificates import generate_batch, batch_jobs
+    jobs = batch_jobs(people, get_scan_frame())
+    with st.spinner(f"Rendering {len(jobs)} certificates…"):
+        out_dir = tempfile.mkdtemp(prefix="certs_")
+        zip_path, manifest = generate_batch(jobs, out_dir)
+    failed = manifest[manifest["status"] != "ok"]
+    if len(failed):
+        st.warning(f"{len(failed)} of {len(manifest)} certificates failed — see manifest.")
+    else:
+        st.success(f"Generated {len(manifest)} certificates.")
+    st.dataframe(manifest)
+    with open(zip_path, "rb") as f:
+        st.download_button("📥 Download All (zip)", f, file_name="certificates.zip")
+
+
+# ─── Bulk attendance emails ───────────────────────────
+st.markdown("---")
+st.subheader("✉️ Attendance Emails")
+st.caption("Drafts an attendance summary email for every scanned attendee.")
+mail_fmt = st.selectbox("Format", ["mbox", "CSV (mail merge)", "eml (zip)"])
+if st.button("✉️ Draft All Emails"):
+    import io
+    import zipfile
+    from emails import draft_emails, write_eml, write_mbox, write_mail_merge_csv
+    drafts = draft_emails(people, get_scan_frame())
+    out_dir = tempfile.mkdtemp(prefix="emails_")
+    if mail_fmt == "mbox":
+        path, mime = write_mbox(drafts, os.path.join(out_dir, "attendance.mbox")), "application/mbox"
+    elif mail_fmt.startswith("CSV"):
+        path, mime = write_mail_merge_csv(drafts, os.path.join(out_dir, "attendance_emails.csv")), "text/csv"
+    else:
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+            for f in write_eml(drafts, out_dir):
+                zf.write(f, os.path.basename(f))
+        path, mime = os.path.join(out_dir, "attendance_emails.zip"), "application/zip"
+        with open(path, "wb") as f:
+            f.write(buf.getvalue())
+    st.success(f"Drafted {len(drafts)} emails.")
+    with open(path, "rb") as f:
+        st.download_button("📥 Download Emails", f, file_name=os.path.basename(path), mime=mime)
@@ -0,0 +1,34 @@
+# # conference.py
+"""Conference programme shared by the check-in app and the CEU tools."""
+
+# Conference session definitions with titles and exact times
+conference_sessions = [
+    {"title": "Prevention of C.M.", "start": "2025-05-02 08:30", "end": "2025-05-02 10:00"},
+    {"title": "The TDCJ SO Treatment Program", "start": "2025-05-02 10:30", "end": "2025-05-02 12:00"},
+    {"title": "Taking the High Road - Ethical Challenges (Part 1)", "start": "2025-05-02 13:30", "end": "2025-05-02 15:00"},
+    {"title": "Taking the High Road - Ethical Challenges (Part 2)", "start": "2025-05-02 15:30", "end": "2025-05-02 17:00"},
+    {"title": "Use of Polygraph Exams in Treatment", "start": "2025-05-03 08:30", "end": "2025-05-03 10:00"},
+    {"title": "Challenges, Lessons Learned...", "start": "2025-05-03 10:30", "end": "2025-05-03 12:00"},
+    {"title": "Treating Clients with Mild Autism", "start": "2025-05-03 13:30", "end": "2025-05-03 15:00"},
+    {"title": "Unpacking the Offense Cycle", "start": "2025-05-03 15:30", "end": "2025-05-03 17:00"},
+    {"title": "Risk Assessment Reports", "start": "2025-05-04 08:30", "end": "2025-05-04 10:00"},
+    {"title": "Chaperon Training", "start": "2025-05-04 10:30", "end": "2025-05-04 12:00"},
+    {"title": "Legal and Strategy Aspects of Deregistration", "start": "2025-05-04 13:30", "end": "2025-05-04 15:00"},
+    {"title": "RNR Approach to Adolescent Assessment", "start": "2025-05-04 15:30", "end": "2025-05-04 17:00"},
+]
+
+# CE sessions as printed on the certificate; "blocks" are the start times of
+# the conference_sessions entries an attendee must be present for
+sessions = [
+    {"date": "May 2, 2025\n8:30", "title": "Prevention of Child Molestation", "speaker": "Matthew L. Ferrara, Ph.D.", "blocks": ["2025-05-02 08:30"], "credits": 1.5},
+    {"date": "May 2, 2025\n10:30", "title": "Overview of the Texas Department of Criminal Justice", "speaker": "Jennifer Deyne, LPC-S, LSOTP-S", "blocks": ["2025-05-02 10:30"], "credits": 1.5},
+    {"date": "May 2, 2025\n1:30 and 3:30", "title": "Taking the High Road-Ethical Challenges", "speaker": "Dan Powers, LCSW-S", "blocks": ["2025-05-02 13:30", "2025-05-02 15:30"], "credits": 3.0},
+    {"date": "May 3, 2025\n8:30", "title": "Role of LSOTPs & Polygraph Examiners", "speaker": "Sean Braun, LSOTP; Clay Wood", "blocks": ["2025-05-03 08:30"], "credits": 1.5},
+    {"date": "May 3, 2025\n10:30", "title": "Working with Female Juveniles", "speaker": "Francisco Torres, LSOTP", "blocks": ["2025-05-03 10:30"], "credits": 1.5},
+    {"date": "May 3, 2025\n1:30", "title": "Treating Clients with Mild Autism", "speaker": "Emily Dixon, Ph.D.", "blocks": ["2025-05-03 13:30"], "credits": 1.5},
+    {"date": "May 3, 2025\n3:30", "title": "Sexual Addiction Treatment", "speaker": "Matthew L. Ferrara, Ph.D.", "blocks": ["2025-05-03 15:30"], "credits": 1.5},
+    {"date": "May 4, 2025\n8:30", "title": "Risk Assessment Reports", "speaker": "Matthew L. Ferrara, Ph.D.", "blocks": ["2025-05-04 08:30"], "credits": 1.5},
+    {"date": "May 4, 2025\n10:30", "title": "Chaperon Program for Your Practice", "speaker": "Shelley Graham, Ph.D., LSOTP; Anna Shursen, Ph.D., LSOTP", "blocks": ["2025-05-04 10:30"], "credits": 1.5},
+    {"date": "May 4, 2025\n1:30", "title": "Legal Aspects of Deregistration", "speaker": "Scott Smith, Esq", "blocks": ["2025-05-04 13:30"], "credits": 1.5},
+    {"date": "May 4, 2025\n3:30", "title": "Adolescent Risk-Need-Responsivity", "speaker": "Casey O'Neal, Ph.D.", "blocks": ["2025-05-04 15:30"], "credits": 1.5},
+]
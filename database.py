@@ -1,105 +1,432 @@
 # # database.py
+from __future__ import annotations
 from zoneinfo import ZoneInfo
-import pandas as pd
+from typing import TYPE_CHECKING
+import atexit
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import datetime
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from scan_queue import ScanQueue
+from debounce import ScanDebouncer, STATION_ID, idempotency_key
+from metrics import instrument_module, instrument_object
 
-# ─── Initialize Supabase client ─────────────────────────────────────────────
+if TYPE_CHECKING:
+    import pandas as pd
+    from scan_store import ScanStore
+    from backends import StorageBackend
+    from occupancy import Occupancy
+    from attendee_search import AttendeeIndex
+
+# ─── Storage backend ─────────────────────────────────────────────────────────
 load_dotenv()
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+_backend: StorageBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def backend() -> StorageBackend:
+    """
+    The one storage backend for this process, created on first use from
+    STORAGE_BACKEND (rest | postgres | sqlite, see backends.py).
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                from backends import make_backend
+                _backend = instrument_object(make_backend(), "backend.")
+    return _backend
+
+
+def set_backend(b: StorageBackend):
+    """Swap in a backend (tests, load runs) and drop everything cached from the old one."""
+    global _backend, _scan_store, _occupancy, _search_index
+    with _backend_lock:
+        _backend = instrument_object(b, "backend.")
+    _scan_store = None
+    _occupancy = None
+    _search_index = None
+    invalidate_roster()
 
 
 # ─── Attendees ───────────────────────────────────────────────────────────────
+ROSTER_TTL = float(os.getenv("ROSTER_TTL", "60"))   # seconds
+
+_roster_lock = threading.Lock()
+_roster: list[dict] = []
+_roster_index: dict[int, dict] = {}
+_roster_loaded_at: float | None = None
+
+
 def register_attendee(badge_id: int, name: str, email: str):
-    """Insert a new attendee row into Supabase."""
-    supabase.table("attendees") \
-            .insert({"badge_id": badge_id, "name": name, "email": email}) \
-            .execute()
+    """Insert a new attendee row."""
+    row = {"badge_id": badge_id, "name": name, "email": email}
+    backend().insert_attendees([row])
+    _index_rows([row])
+    invalidate_roster()
+
+
+def register_attendees(rows: list[dict], chunk_size: int = 500) -> int:
+    """Insert many attendee rows ({badge_id, name, email}) in chunked batches."""
+    for i in range(0, len(rows), chunk_size):
+        backend().insert_attendees(rows[i:i + chunk_size])
+    _index_rows(rows)
+    invalidate_roster()
+    return len(rows)
+
+
+def reserve_badge_ids(count: int = 1) -> int:
+    """
+    Atomically reserve `count` consecutive badge ids and return the first
+    (reserve_badge_ids RPC, migrations/002_badge_id_allocation.sql).
+    """
+    return backend().reserve_badge_ids(int(count))
+
+
+def _fetch_attendees():
+    return backend().fetch_attendees()
+
+
+def _roster_snapshot() -> tuple[list[dict], dict[int, dict]]:
+    """Return (roster, badge index), refetching once the TTL has expired."""
+    global _roster, _roster_index, _roster_loaded_at
+    with _roster_lock:
+        if (_roster_loaded_at is None
+                or time.monotonic() - _roster_loaded_at > ROSTER_TTL):
+            rows = _fetch_attendees()
+            _roster = rows
+            _roster_index = {int(a["badge_id"]): a for a in rows}
+            _roster_loaded_at = time.monotonic()
+        return _roster, _roster_index
 
 
 def get_all_attendees():
-    """Fetch all attendees from Supabase as a list of dicts."""
-    resp = supabase.table("attendees") \
-                   .select("*") \
-                   .order("badge_id", desc=False) \
-                   .execute()
-    return resp.data
+    """All attendees as a list of dicts, served from the process-wide cache."""
+    return _roster_snapshot()[0]
 
 
-# ─── Scanning ────────────────────────────────────────────────────────────────
-def log_scan(badge_id: int):
+def get_attendee(badge_id: int) -> dict | None:
+    """Look up one attendee by badge from the cached roster (no network)."""
+    try:
+        return _roster_snapshot()[1].get(int(badge_id))
+    except (TypeError, ValueError):
+        return None
+
+
+def invalidate_roster():
+    """Drop the cached roster so the next read refetches it."""
+    global _roster_loaded_at
+    with _roster_lock:
+        _roster_loaded_at = None
+
+
+_search_lock = threading.Lock()
+_search_index: AttendeeIndex | None = None
+_search_roster: list[dict] | None = None      # the roster the index was last synced with
+
+
+def search_attendees(query: str, limit: int = 10) -> list[dict]:
     """
-    1) Insert raw scan event into scanlog
-    2) Update next empty scanN column in attendees
+    Ranked matches on name, email or badge id from the in-memory index
+    (attendee_search.py); no network once the roster is cached.
     """
+    global _search_index, _search_roster
+    roster = get_all_attendees()
+    with _search_lock:
+        if _search_index is None:
+            from attendee_search import AttendeeIndex
+            _search_index = AttendeeIndex(roster)
+        elif _search_roster is not roster:      # a refetch: re-index only what changed
+            _search_index.sync(roster)
+        _search_roster = roster
+        index = _search_index
+    return index.search(query, limit)
+
+
+def _index_rows(rows: list[dict]):
+    """Make freshly registered attendees searchable before the roster refetch."""
+    with _search_lock:
+        if _search_index is not None:
+            _search_index.add_many(rows)
+
+
+# ─── Scanning ────────────────────────────────────────────────────────────────
+LOCAL_TZ = ZoneInfo("America/Chicago")
+MAX_BADGE_ID = 2_147_483_647          # scanlog.badge_id is a Postgres integer
+_scan_queue = None
+_slots_full: set[int] = set()
+_debouncer = ScanDebouncer()
+
+
+def _queue() -> ScanQueue:
+    """Process-wide scan queue; the flusher thread starts on first use."""
+    global _scan_queue
+    if _scan_queue is None:
+        _scan_queue = ScanQueue(_flush_scans)
+        _scan_queue.start()
+        atexit.register(_scan_queue.flush)
+    return _scan_queue
+
+
+def _scan_badge(badge_id) -> int:
+    """Badge id as an int, or ValueError before a bad one reaches the queue."""
     badge = int(badge_id)
-    local_tz = ZoneInfo("America/Chicago")
-    now_iso  = datetime.datetime.now(local_tz).isoformat()
-
-    # 1) raw log
-    supabase.table("scanlog") \
-            .insert({"badge_id": badge, "timestamp": now_iso}) \
-            .execute()
-
-    # 2) fetch the attendee row
-    resp = supabase.table("attendees") \
-                   .select("*") \
-                   .eq("badge_id", badge) \
-                   .execute()
-    rows = resp.data
-    if not rows:
-        return
-
-    row = rows[0]
-    updates = {}
-    for i in range(1, 11):
-        col = f"scan{i}"
-        if row.get(col) is None:
-            updates[col] = now_iso
-            break
-
-    if updates:
-        supabase.table("attendees") \
-                .update(updates) \
-                .eq("badge_id", badge) \
-                .execute()
-
-
-def get_scan_log():
-    resp_scans = supabase.table("scanlog") \
-                        .select("*") \
-                        .order("timestamp", desc=True) \
-                        .execute()
-    scans = resp_scans.data
-
-    logs = []
-    for sc in scans:
-        raw_ts = sc["timestamp"]            # e.g. "2025-05-02T08:35:12Z"
-        if isinstance(raw_ts, str) and raw_ts.endswith("Z"):
-            raw_ts = raw_ts[:-1]
-        ts = datetime.datetime.fromisoformat(raw_ts).replace(tzinfo=None)
-        logs.append({
-            "badge_id":  sc["badge_id"],
-            "name":       "",  # we only need badge_id/timestamp here
-            "email":      "",
-            "timestamp": ts
-        })
-    return logs
-
-
-def save_ce_report(df: pd.DataFrame, report_date: datetime.date):
+    if not 1 <= badge <= MAX_BADGE_ID:
+        raise ValueError(f"Badge id {badge} is out of range")
+    return badge
+
+
+def log_scan(badge_id: int, station: str = STATION_ID) -> str | None:
+    """
+    Record a scan locally and return immediately with its event id, or None
+    when the same badge was already scanned at this station within the
+    debounce window. The background flusher pushes it to scanlog, which the
+    scanN slots are derived from (migrations/007_scan_slots_view.sql).
+    Raises ValueError for a badge id that is not a number in range.
+    """
+    badge = _scan_badge(badge_id)
+    now = datetime.datetime.now(LOCAL_TZ)
+    if not _debouncer.accept(badge, station, now.timestamp()):
+        return None
+    return _queue().put(badge, now.isoformat(), station)
+
+
+def flush_scans() -> int:
+    """Push every queued scan to the backend now; returns how many were sent."""
+    return _queue().flush()
+
+
+def scan_queue_stats() -> dict:
+    """Depth of the local scan queue and how far behind the flusher is."""
+    return _queue().stats()
+
+
+def _flush_scans(events: list[dict]):
+    """
+    Send a batch of queued events through the log_scans RPC
+    (migrations/001_log_scan_rpc.sql): one call logs every scan and reports
+    each one's scanN slot. Replays of an already-logged event, caught by its
+    idempotency key (003_scan_idempotency.sql), are no-ops.
+    """
+    results = backend().log_scans(
+        [{"badge_id": e["badge_id"], "timestamp": e["timestamp"],
+          "key": _scan_idempotency_key(e["badge_id"], e["timestamp"],
+                                       e.get("station") or STATION_ID)}
+         for e in events])
+    for r in results:
+        if r["slot"] == 0:
+            _slots_full.add(int(r["badge_id"]))
+
+
+def _scan_idempotency_key(badge_id: int, ts_iso: str, station: str) -> str:
+    ts = datetime.datetime.fromisoformat(ts_iso)
+    return idempotency_key(badge_id, ts.timestamp(), station)
+
+
+class ScanSlotsFull(Exception):
+    """The badge already has ten scans; this one is kept in scanlog past the slots."""
+
+
+def log_scan_now(badge_id: int, station: str = STATION_ID) -> int | None:
+    """
+    Log a scan synchronously in one round trip, bypassing the queue.
+    Returns the scanN slot that was filled, -1 for a repeat inside the
+    debounce window, or None for an unknown badge.
+    """
+    badge = _scan_badge(badge_id)
+    now = datetime.datetime.now(LOCAL_TZ)
+    if not _debouncer.accept(badge, station, now.timestamp()):
+        return -1
+    slot = backend().log_scan(badge, now.isoformat(),
+                              idempotency_key(badge, now.timestamp(), station))
+    if slot == 0:
+        _slots_full.add(badge)
+        raise ScanSlotsFull(f"Badge {badge} has used all 10 scan slots")
+    return slot
+
+
+def slots_full_badges() -> list[int]:
+    """Badges with more scans than scan1..scan10 can show."""
+    return sorted(_slots_full)
+
+
+_scan_store = None
+
+
+def _fetch_scans_after(last_id: int, limit: int):
+    return backend().fetch_scans_after(last_id, limit)
+
+
+def iter_scan_pages(page_size: int = 1000, badge_min: int | None = None,
+                    badge_max: int | None = None):
+    """
+    Yield the whole scanlog (or the badges in [badge_min, badge_max]) in id
+    order, one page of rows at a time.
+    """
+    last_id = 0
+    while True:
+        page = []
+        # PostgREST caps each response, so fill a page from several requests
+        while len(page) < page_size:
+            rows = backend().fetch_scans_after(last_id, min(page_size - len(page), 1000),
+                                               badge_min, badge_max)
+            if not rows:
+                break
+            page.extend(rows)
+            last_id = rows[-1]["id"]
+        if not page:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+
+
+def _store() -> ScanStore:
+    global _scan_store
+    if _scan_store is None:
+        from scan_store import ScanStore
+        _scan_store = ScanStore(_fetch_scans_after)
+    return _scan_store
+
+
+def get_scan_frame() -> pd.DataFrame:
+    """
+    The scan log as a columnar frame (id, badge_id, timestamp), after a delta
+    sync. Shared between callers — treat it as read-only.
+    """
+    store = _store()
+    store.sync()
+    return store.frame
+
+
+_occupancy = None
+
+
+def get_occupancy() -> Occupancy:
+    """Live occupancy aggregates, brought up to date with one delta poll."""
+    global _occupancy
+    if _occupancy is None:
+        from occupancy import Occupancy
+        _occupancy = Occupancy(_fetch_scans_after)
+    _occupancy.poll()
+    return _occupancy
+
+
+def get_badge_scans(badge_id: int) -> pd.DataFrame:
+    """One badge's scans (id, badge_id, timestamp) in time order, straight from scanlog."""
+    from scan_store import scan_frame
+    return scan_frame(backend().fetch_badge_scans(int(badge_id))) \
+             .sort_values("timestamp", kind="stable", ignore_index=True)
+
+
+def export_scanlog_csv(out) -> int:
+    """
+    Write the whole scanlog as CSV (badge_id, local timestamp) to a text file
+    object; COPY on the Postgres backend. Returns the row count.
+    """
+    return backend().copy_scans_out(out, LOCAL_TZ.key)
+
+
+# ─── Admin queries (filtered + paginated in the backend) ─────────────────────
+def query_attendees(search: str = "", badge_min: int | None = None,
+                    badge_max: int | None = None, page: int = 0,
+                    page_size: int = 50) -> tuple[list[dict], int]:
+    """One page of attendees matching the filters, plus the total match count."""
+    return backend().query_attendees(search.strip(), badge_min, badge_max,
+                                     page * page_size, page_size)
+
+
+def _day_range(day: datetime.date | None) -> tuple[str | None, str | None]:
+    """[start, end) of a local day as ISO instants; (None, None) for no day."""
+    if day is None:
+        return None, None
+    start_of = datetime.datetime.combine(day, datetime.time(), LOCAL_TZ)
+    return start_of.isoformat(), (start_of + datetime.timedelta(days=1)).isoformat()
+
+
+def query_scan_log(day: datetime.date | None = None, badge_min: int | None = None,
+                   badge_max: int | None = None, page: int = 0,
+                   page_size: int = 100) -> tuple[list[dict], int]:
+    """One page of raw scans (newest first) matching the filters, plus the total."""
+    start_iso, end_iso = _day_range(day)
+    return backend().query_scan_log(start_iso, end_iso, badge_min, badge_max,
+                                    page * page_size, page_size)
+
+
+def query_punch_report(day: datetime.date | None = None, badge_min: int | None = None,
+                       badge_max: int | None = None, search: str = "",
+                       missed_only: bool = False, page: int = 0,
+                       page_size: int = 50) -> tuple[list[dict], int]:
+    """
+    One page of the Daily Punch Report ({badge_id, name, email, day, check_in,
+    check_out}, by day then badge) matching the filters, plus the total.
+    Grouped, filtered and paged in the backend (migrations/009_punch_report.sql).
+    """
+    start_iso, end_iso = _day_range(day)
+    return backend().query_punch_report(
+        LOCAL_TZ.key, start_iso, end_iso,
+        None if badge_min is None else int(badge_min),
+        None if badge_max is None else int(badge_max),
+        search.strip(), missed_only, page * page_size, page_size)
+
+
+def iter_punch_report_pages(page_size: int = 1000):
+    """
+    Yield the whole Daily Punch Report, by day then badge, one page of rows
+    at a time; each page is grouped in the backend.
+    """
+    offset = 0
+    while True:
+        rows, total = backend().query_punch_report(LOCAL_TZ.key, None, None, None, None,
+                                                   "", False, offset, page_size)
+        if not rows:
+            return
+        yield rows
+        offset += len(rows)         # a capped REST response may hold fewer than asked
+        if offset >= total:
+            return
+
+
+CE_CHUNK_SIZE = 500
+CE_RETRIES    = 3
+
+
+def _fetch_ce_report(report_date: str) -> dict[tuple[int, str], bool]:
+    """Existing (badge_id, session_title) → attended for one report date."""
+    return backend().fetch_ce_report(report_date)
+
+
+def _upsert_chunk(records: list[dict], retries: int):
+    for attempt in range(retries):
+        try:
+            backend().upsert_ce_reports(records)
+            return
+        except Exception:
+            if attempt == retries - 1:
+                raise
+            time.sleep(0.5 * 2 ** attempt)
+
+
+def save_ce_report(df: pd.DataFrame, report_date: datetime.date,
+                   chunk_size: int = CE_CHUNK_SIZE, workers: int = 1,
+                   retries: int = CE_RETRIES) -> dict:
     """
     Expect df like:
        Badge ID | Name | Email | [session1] | [session2] | ...
-    This will melt it to one row per session and insert into ce_reports.
+    This will melt it to one row per session and upsert into ce_reports,
+    keyed on (badge_id, session_title, report_date). Only new or changed rows
+    are sent, in chunks of chunk_size (optionally `workers` at a time), each
+    retried with backoff. Returns inserted/updated/unchanged/failed counts.
     """
+    import numpy as np
+    import pandas as pd
+
     # melt wide→long
     id_vars = ["Badge ID", "Name", "Email"]
     value_vars = [c for c in df.columns if c not in id_vars]
+    day = report_date.isoformat()
     df_long = (
         df
         .melt(id_vars=id_vars, value_vars=value_vars,
@@ -108,11 +435,38 @@ def save_ce_report(df: pd.DataFrame, report_date: datetime.date):
         .assign(
             badge_id       = lambda d: d["Badge ID"].astype(int),
             attended       = lambda d: d["attended_mark"] == "✅",
-            report_date    = report_date
+            report_date    = day
         )
         .loc[:, ["badge_id","session_title","attended","report_date"]]
+        .drop_duplicates(["badge_id", "session_title"], keep="last")
     )
 
-    # insert into Supabase
-    records = df_long.to_dict(orient="records")
-    supabase.table("ce_reports").insert(records).execute()
+    # diff against what is already stored for this date
+    existing = _fetch_ce_report(day)
+    before = pd.Series([existing.get(k) for k in zip(df_long["badge_id"], df_long["session_title"])],
+                       index=df_long.index, dtype=object)
+    is_new  = before.isna()
+    changed = ~is_new & (before != df_long["attended"])
+    to_send = df_long[is_new | changed]
+
+    # upsert in bounded chunks; a chunk that still fails after retries is counted
+    records = to_send.to_dict(orient="records")
+    starts = range(0, len(records), chunk_size)
+    sent = np.ones(len(records), dtype=bool)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [(i, pool.submit(_upsert_chunk, records[i:i + chunk_size], retries))
+                   for i in starts]
+        for i, fut in futures:
+            if fut.exception() is not None:
+                sent[i:i + chunk_size] = False
+
+    return {
+        "inserted":  int((is_new[to_send.index].to_numpy() & sent).sum()),
+        "updated":   int((changed[to_send.index].to_numpy() & sent).sum()),
+        "unchanged": int(len(df_long) - len(to_send)),
+        "failed":    int((~sent).sum()),
+    }
+
+
+# every function above is timed as database.<name>; each backend call as backend.<name>
+instrument_module(globals(), "database.", skip=("backend", "set_backend"))
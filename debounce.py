@@ -0,0 +1,52 @@
+# # debounce.py
+"""
+Drop repeat scans of the same badge at the same station within a window.
+
+The in-memory index answers before anything is queued. idempotency_key()
+names one accepted scan by its station, badge and the time it was accepted
+(the time stored in scanlog), so a retried or replayed submission of that
+scan lands once on the server.
+
+Repeats are only suppressed within one process: two kiosk processes on the
+same station keep separate windows, and a repeat accepted by the other one
+is stored. Deduplication across processes is best-effort.
+"""
+import os
+import socket
+import threading
+import time
+
+DEBOUNCE_SECONDS = float(os.getenv("SCAN_DEBOUNCE_SECONDS", "10"))
+STATION_ID       = os.getenv("STATION_ID") or socket.gethostname()
+PRUNE_AT         = 10_000      # entries before stale ones are swept
+
+
+class ScanDebouncer:
+    def __init__(self, window: float = DEBOUNCE_SECONDS):
+        self.window = window
+        self._last: dict[tuple[str, int], float] = {}
+        self._lock = threading.Lock()
+
+    def accept(self, badge_id: int, station: str = STATION_ID,
+               now: float | None = None) -> bool:
+        """
+        True if this scan should be logged, False if it repeats a recent one.
+        `now` is the scan's time in seconds (default time.monotonic()); the
+        window runs from the last accepted scan.
+        """
+        now = time.monotonic() if now is None else now
+        key = (station, int(badge_id))
+        with self._lock:
+            last = self._last.get(key)
+            if last is not None and 0 <= now - last < self.window:   # a clock stepped back: accept
+                return False
+            self._last[key] = now
+            if len(self._last) > PRUNE_AT:
+                cutoff = now - self.window
+                self._last = {k: t for k, t in self._last.items() if t >= cutoff}
+        return True
+
+
+def idempotency_key(badge_id: int, accepted_at: float, station: str = STATION_ID) -> str:
+    """Server-side key for one accepted scan: station, badge, epoch microseconds."""
+    return f"{station}:{int(badge_id)}:{round(accepted_at * 1_000_000)}"
@@ -0,0 +1,169 @@
+# # emails.py
+"""
+Attendance emails for every attendee, drafted in one pass.
+
+    python emails.py --format eml  --out drafts/
+    python emails.py --format mbox --out attendance.mbox
+    python emails.py --format csv  --out mail_merge.csv
+
+The scan log is grouped once into per-badge, per-day first/last scans;
+each email is then filled from that summary by badge id, so drafting the
+whole roster costs one groupby plus string formatting.
+"""
+import argparse
+import csv
+import os
+import re
+import time
+from datetime import date
+from email.header import Header
+from email.utils import formataddr, formatdate
+from string import Template
+
+import pandas as pd
+
+from conference import conference_sessions
+
+SUBJECT = "Your conference attendance record"
+
+# the conference days, from the programme rather than hard-coded
+CONFERENCE_DAYS = sorted({date.fromisoformat(s["start"][:10]) for s in conference_sessions})
+
+BODY = Template("""Hi $first_name,
+
+Thank you so much for attending the conference! According to our scan records, it looks like you were present during the following times:
+
+$days
+
+If any of these details need to be updated, just reply to this email and I’ll be happy to take care of it.
+
+Thanks again for being part of the event!
+
+Best,
+[Your Name]
+[Your Organization]""")
+
+
+# ─── Summaries ───────────────────────────────────────────────────────────────
+def day_summaries(scans: pd.DataFrame) -> dict[int, dict[date, tuple[str, str]]]:
+    """
+    Scan frame (badge_id, timestamp) → {badge_id: {day: (first, last)}} with
+    times already formatted as '08:31 AM'. One grouped pass over the log.
+    """
+    if scans.empty:
+        return {}
+    ts = pd.to_datetime(scans["timestamp"])
+    g = pd.DataFrame({"badge_id": scans["badge_id"].astype("int64").to_numpy(),
+                      "day": ts.dt.date.to_numpy(), "ts": ts.to_numpy()}) \
+          .groupby(["badge_id", "day"], sort=False)["ts"] \
+          .agg(["min", "max"]) \
+          .reset_index()
+    first = g["min"].dt.strftime("%I:%M %p").tolist()
+    last  = g["max"].dt.strftime("%I:%M %p").tolist()
+    out: dict[int, dict] = {}
+    for badge, day, a, b in zip(g["badge_id"].tolist(), g["day"].tolist(), first, last):
+        out.setdefault(badge, {})[day] = (a, b)
+    return out
+
+
+def render_email(name: str, days: dict, conference_days: list[date] = CONFERENCE_DAYS) -> str:
+    """Email body for one attendee from their {day: (first, last)} summary."""
+    lines = []
+    for day in conference_days:
+        label = day.strftime("%B %d, %Y")
+        if day in days:
+            lines.append(f"• {label}: {days[day][0]} to {days[day][1]}")
+        else:
+            lines.append(f"• {label}: No record")
+    first_name = (name or "").split()[0] if (name or "").split() else "there"
+    return BODY.substitute(first_name=first_name, days="\n".join(lines))
+
+
+def draft_emails(attendees: list[dict], scans: pd.DataFrame,
+                 subject: str = SUBJECT, only_scanned: bool = True) -> list[dict]:
+    """One draft ({badge_id, name, email, subject, body}) per attendee."""
+    summary = day_summaries(scans)
+    return [
+        {"badge_id": int(a["badge_id"]), "name": a.get("name") or "",
+         "email": a.get("email") or "", "subject": subject,
+         "body": render_email(a.get("name") or "", summary.get(int(a["badge_id"]), {}))}
+        for a in attendees
+        if not only_scanned or int(a["badge_id"]) in summary
+    ]
+
+
+# ─── Writers ─────────────────────────────────────────────────────────────────
+# Messages are plain UTF-8 text/plain, so they are formatted directly rather
+# than through EmailMessage, whose generator costs ~1.5 ms per message.
+def _message(d: dict, sender: str) -> str:
+    """RFC 5322 message text with LF line endings."""
+    to = formataddr((d["name"], d["email"]), "utf-8") if d["email"] else d["name"]
+    headers = [
+        f"From: {sender}",
+        f"To: {to}",
+        f"Subject: {Header(d['subject'], 'utf-8').encode()}",
+        f"Date: {formatdate(localtime=True)}",
+        "MIME-Version: 1.0",
+        "Content-Type: text/plain; charset=utf-8",
+        "Content-Transfer-Encoding: 8bit",
+        f"X-Badge-ID: {d['badge_id']}",
+    ]
+    return "\n".join(headers) + "\n\n" + d["body"].rstrip("\n") + "\n"
+
+
+def write_eml(drafts: list[dict], out_dir: str, sender: str = "") -> list[str]:
+    """One <badge>_<name>.eml per draft; open in any mail client to send."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for d in drafts:
+        safe = re.sub(r"[^\w.-]+", "_", d["name"]).strip("_") or "attendee"
+        path = os.path.join(out_dir, f"{d['badge_id']}_{safe}.eml")
+        with open(path, "w", encoding="utf-8", newline="\r\n") as f:
+            f.write(_message(d, sender))
+        paths.append(path)
+    return paths
+
+
+def write_mbox(drafts: list[dict], path: str, sender: str = "") -> str:
+    """Every draft in one mbox (mboxrd) file."""
+    stamp = time.asctime()
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        for d in drafts:
+            text = re.sub(r"^(>*From )", r">\1", _message(d, sender), flags=re.M)
+            f.write(f"From MAILER-DAEMON {stamp}\n{text}\n")
+    return path
+
+
+def write_mail_merge_csv(drafts: list[dict], path: str) -> str:
+    """badge_id, name, email, subject, body — one row per draft."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=["badge_id", "name", "email", "subject", "body"])
+        w.writeheader()
+        w.writerows(drafts)
+    return path
+
+
+WRITERS = {"eml": write_eml, "mbox": write_mbox, "csv": write_mail_merge_csv}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Draft attendance emails for every attendee.")
+    ap.add_argument("--format", choices=list(WRITERS), default="eml")
+    ap.add_argument("--out", required=True, help="folder for eml, file for mbox/csv")
+    ap.add_argument("--sender", default="", help="From: address")
+    ap.add_argument("--subject", default=SUBJECT)
+    ap.add_argument("--all", action="store_true", help="include attendees with no scans")
+    args = ap.parse_args()
+
+    from database import get_all_attendees, get_scan_frame
+    drafts = draft_emails(get_all_attendees(), get_scan_frame(), args.subject,
+                          only_scanned=not args.all)
+    if args.format == "csv":
+        write_mail_merge_csv(drafts, args.out)
+    else:
+        WRITERS[args.format](drafts, args.out, args.sender)
+    print(f"{len(drafts)} drafts → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# # exports.py
+"""
+On-demand report exports, written chunk by chunk.
+
+Each dataset is a generator of DataFrame chunks and each format a writer that
+appends one chunk at a time to a temporary file, so the whole export is never
+held in memory as one frame or one string. The sources read the server a
+page at a time (scans by id, a roster chunk's scans by badge range, the
+punch report as the backend groups it), never the whole scan log.
+"""
+import gzip
+import os
+import tempfile
+
+import pandas as pd
+
+import reports
+from database import (export_scanlog_csv, get_all_attendees, iter_punch_report_pages,
+                      iter_scan_pages)
+from scan_store import parse_timestamps, scan_frame
+
+CHUNK_ROWS = 5_000
+CHUNK_BADGES = 500     # attendees whose scans are fetched and held at once
+
+FORMATS = {
+    "CSV (gzip)": ("csv.gz",  "application/gzip"),
+    "Parquet":    ("parquet", "application/vnd.apache.parquet"),
+    "Excel":      ("xlsx",    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+# ─── Sources ─────────────────────────────────────────────────────────────────
+def raw_log_chunks(chunk_rows: int = CHUNK_ROWS):
+    """scanlog straight from the server, one keyset page at a time."""
+    for page in iter_scan_pages(chunk_rows):
+        yield pd.DataFrame({
+            "badge_id":  [r["badge_id"] for r in page],
+            "timestamp": parse_timestamps([r["timestamp"] for r in page]),
+        })
+
+
+def attendees_with_scans_chunks(chunk_rows: int = CHUNK_ROWS):
+    """The roster a few hundred attendees at a time, with only those badges' scans."""
+    attendees = get_all_attendees()          # ordered by badge_id
+    step = min(chunk_rows, CHUNK_BADGES)
+    for i in range(0, len(attendees), step):
+        part = attendees[i:i + step]
+        ids = [int(a["badge_id"]) for a in part]
+        rows = [r for page in iter_scan_pages(chunk_rows, min(ids), max(ids)) for r in page]
+        yield reports.all_scans_table(scan_frame(rows), part)
+
+
+def punch_report_chunks(chunk_rows: int = CHUNK_ROWS):
+    """Pages of the punch report grouped in the backend, in (Date, Badge ID) order."""
+    for rows in iter_punch_report_pages(chunk_rows):
+        yield reports.punch_page_frame(rows)
+
+
+DATASETS = {
+    "Attendees with scans": (attendees_with_scans_chunks, "attendees_with_scans"),
+    "Raw attendance log":   (raw_log_chunks,              "raw_attendance"),
+    "Daily punch report":   (punch_report_chunks,         "punch_report"),
+}
+
+
+# ─── Writers ─────────────────────────────────────────────────────────────────
+def _write_csv_gz(chunks, path):
+    with gzip.open(path, "wt", encoding="utf-8", newline="") as f:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(f, header=(i == 0), index=False)
+
+
+def _write_parquet(chunks, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:            # no rows at all
+        pd.DataFrame().to_parquet(path)
+
+
+def _write_xlsx(chunks, path):
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    for i, chunk in enumerate(chunks):
+        if i == 0:
+            ws.append([str(c) for c in chunk.columns])
+        for row in chunk.itertuples(index=False):
+            ws.append([None if pd.isna(v) else v for v in row])
+    wb.save(path)
+
+
+_WRITERS = {"csv.gz": _write_csv_gz, "parquet": _write_parquet, "xlsx": _write_xlsx}
+
+
+def _copy_raw_log_csv_gz(path):
+    """The raw log as CSV without DataFrames: COPY … TO STDOUT on Postgres."""
+    with gzip.open(path, "wt", encoding="utf-8", newline="") as f:
+        export_scanlog_csv(f)
+
+
+# (dataset, format) pairs the backend writes directly instead of chunk by chunk
+_DIRECT = {(raw_log_chunks, "csv.gz"): _copy_raw_log_csv_gz}
+
+
+def build_export(dataset: str, fmt: str, chunk_rows: int = CHUNK_ROWS) -> tuple[str, str, str]:
+    """
+    Write `dataset` in format `fmt` (keys of DATASETS / FORMATS) to a temp file.
+    Returns (path, download file name, mime type).
+    """
+    source, stem = DATASETS[dataset]
+    ext, mime = FORMATS[fmt]
+    fd, path = tempfile.mkstemp(suffix="." + ext, prefix=stem + "_")
+    os.close(fd)
+    direct = _DIRECT.get((source, ext))
+    if direct:
+        direct(path)
+    else:
+        _WRITERS[ext](source(chunk_rows), path)
+    return path, f"{stem}.{ext}", mime
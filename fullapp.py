@@ -1,356 +1,452 @@
 import datetime
-import pandas as pd
-import streamlit as st
-import qrcode
-import numpy as np
-import cv2
 import os
-from io import BytesIO
-from PIL import Image
-from dotenv import load_dotenv
-from supabase import create_client, Client
-from database import get_all_attendees, log_scan
-from database import get_scan_log
-
-# ─── Load .env & initialize Supabase client ───────────────────────────────
-load_dotenv()
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+import streamlit as st
 
+# Heavy modules (pandas, cv2, qrcode, reportlab…) are imported by the pages
+# that need them, so the check-in page starts without them.
 from database import (
     register_attendee,
     get_all_attendees,
+    get_attendee,
+    search_attendees,
     log_scan,
-    get_scan_log,
+    get_scan_frame,
+    scan_queue_stats,
+    slots_full_badges,
+    save_ce_report,
+    reserve_badge_ids,
+    query_attendees,
+    query_scan_log,
+    query_punch_report,
+    get_occupancy,
+    LOCAL_TZ,
 )
+from debounce import STATION_ID
 
 # ─── Page‑swap helper (only once) ─────────────────────────────────────────
 def switch_page(page_name: str):
     st.session_state.page = page_name
 
 
+def paged_view(key: str, page_size: int, fetch):
+    """
+    Fetch and return the current page for a table; fetch(page) returns
+    (rows, total). Also renders the page picker for it.
+    """
+    page = st.session_state.get(key, 1) - 1
+    rows, total = fetch(page)
+    pages = max(1, -(-total // page_size))
+    if page >= pages:                # filters shrank the result
+        page = 0
+        st.session_state[key] = 1
+        rows, total = fetch(page)
+    st.number_input(f"Page (of {pages}, {total} rows)", min_value=1,
+                    max_value=pages, step=1, key=key)
+    return rows
+
+
+def kiosk_station() -> str:
+    """
+    Station this browser session scans for: ?station=… in the kiosk's URL,
+    else this host's STATION_ID. Debounce and idempotency keys are per station.
+    """
+    if "station" not in st.session_state:
+        st.session_state.station = st.query_params.get("station") or STATION_ID
+    return st.session_state.station
+
+
 # ─── Init page state ────────────────────────────────────────────────────────
 if 'page' not in st.session_state:
     st.session_state.page = 'home'
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-# Conference session definitions with titles and exact times
-conference_sessions = [
-    {"title": "Prevention of C.M.", "start": "2025-05-02 08:30", "end": "2025-05-02 10:00"},
-    {"title": "The TDCJ SO Treatment Program", "start": "2025-05-02 10:30", "end": "2025-05-02 12:00"},
-    {"title": "Taking the High Road - Ethical Challenges (Part 1)", "start": "2025-05-02 13:30", "end": "2025-05-02 15:00"},
-    {"title": "Taking the High Road - Ethical Challenges (Part 2)", "start": "2025-05-02 15:30", "end": "2025-05-02 17:00"},
-    {"title": "Use of Polygraph Exams in Treatment", "start": "2025-05-03 08:30", "end": "2025-05-03 10:00"},
-    {"title": "Challenges, Lessons Learned...", "start": "2025-05-03 10:30", "end": "2025-05-03 12:00"},
-    {"title": "Treating Clients with Mild Autism", "start": "2025-05-03 13:30", "end": "2025-05-03 15:00"},
-    {"title": "Unpacking the Offense Cycle", "start": "2025-05-03 15:30", "end": "2025-05-03 17:00"},
-    {"title": "Risk Assessment Reports", "start": "2025-05-04 08:30", "end": "2025-05-04 10:00"},
-    {"title": "Chaperon Training", "start": "2025-05-04 10:30", "end": "2025-05-04 12:00"},
-    {"title": "Legal and Strategy Aspects of Deregistration", "start": "2025-05-04 13:30", "end": "2025-05-04 15:00"},
-    {"title": "RNR Approach to Adolescent Assessment", "start": "2025-05-04 15:30", "end": "2025-05-04 17:00"},
-]
 
 
-# ─── Utility functions ─────────────────────────────────────────────────────
-def generate_qr_code(badge_id: int) -> bytes:
-    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=5, border=2)
-    qr.add_data(str(badge_id))
-    qr.make(fit=True)
-    img = qr.make_image(fill='black', back_color='white')
-    buf = BytesIO()
-    img.save(buf, format='PNG')
-    return buf.getvalue()
-
 
+# ─── Utility functions ─────────────────────────────────────────────────────
 def run_qr_scanner():
     st.subheader("📷 Scan QR Code")
     img_file = st.camera_input("Point camera at QR code")
     if not img_file:
         return
+    # camera_input keeps returning the last photo on every rerun; only act
+    # on a frame once
+    if st.session_state.get("last_frame") == img_file.file_id:
+        return
+    st.session_state.last_frame = img_file.file_id
 
-    img = Image.open(img_file).convert("RGB")
-    gray = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2GRAY)
-    data, _, _ = cv2.QRCodeDetector().detectAndDecode(gray)
-    if not data:
+    from qr_decode import decode_qr
+    result = decode_qr(img_file.getvalue())
+    if not result.data:
         st.warning("⚠ QR Code not recognized.")
         return
 
-    badge_id = data.strip()
-    log_scan(badge_id)
+    badge_id = result.data
+    try:
+        logged = log_scan(badge_id, kiosk_station())
+    except ValueError:
+        st.warning(f"⚠ QR code {badge_id!r} is not a badge ID.")
+        return
 
-    people = get_all_attendees()
-    person = next((p for p in people if p["badge_id"] == int(badge_id)), None)
+    person = get_attendee(badge_id)
     name = person["name"] if person else badge_id
-    st.success(f"✅ Scanned and checked in: {name}")
+    if logged is None:
+        st.info(f"ℹ {name} was already checked in moments ago.")
+    else:
+        st.success(f"✅ Scanned and checked in: {name}")
 st.subheader("📅 Daily Punch Report")
 
 
+# Hands-free mode: frames come from a camera attached to the kiosk running
+# this app; one scanner per (source, station), shared by the sessions using it
+@st.cache_resource
+def _scanner_pool():
+    import functools
+    from stream_scanner import ScannerPool, StreamScanner, check_in
+    return ScannerPool(lambda key: StreamScanner(
+        key[0], functools.partial(check_in, station=key[1])).start())
+
+
+def _scanner_user() -> str:
+    """Token this browser session holds its scanner reference under."""
+    if "scanner_user" not in st.session_state:
+        import uuid
+        st.session_state.scanner_user = uuid.uuid4().hex
+    return st.session_state.scanner_user
+
+
+@st.fragment(run_every=0.5)
+def stream_feed(scanner):
+    """Redraw only the confirmations; scans are logged by the decode thread."""
+    if scanner.error:
+        st.error(f"⚠ {scanner.error}")
+        return
+    recent = scanner.confirmations()
+    if not recent:
+        st.caption("Waiting for a badge…")
+    for i, c in enumerate(recent[:5]):
+        msg = f"{c.get('name', c['badge'])} · {datetime.datetime.fromtimestamp(c['at']):%I:%M:%S %p}"
+        if "error" in c:
+            st.error(f"⚠ {c['badge']}: {c['error']}")
+        elif not c.get("known", True):
+            st.warning(f"⚠ Unknown badge {msg}")
+        elif c.get("repeat"):
+            st.info(f"ℹ Already checked in: {msg}")
+        elif i == 0:
+            st.success(f"✅ Checked in: {msg}")
+        else:
+            st.write(f"✅ {msg}")
+    s = scanner.stats()
+    st.caption(f"{s['fps_decoded']:.1f} frames/s decoded · {s['badges']} badges")
+
+
+def run_stream_scanner():
+    st.subheader("🎥 Hands-free Scanning")
+    source = st.text_input("Camera index, file or stream URL",
+                           value=os.getenv("SCAN_STREAM_SOURCE", "0"), key="stream_source")
+    key = (source, kiosk_station())
+    if st.session_state.get("stream_running") not in (None, key):
+        stop_stream_scanner()          # the source was changed
+    st.session_state.stream_running = key
+    stream_feed(_scanner_pool().acquire(key, _scanner_user()))
+
+
+def stop_stream_scanner():
+    """Drop this session's reference; the scanner stops when no session uses it."""
+    key = st.session_state.pop("stream_running", None)
+    if key is not None:
+        _scanner_pool().release(key, _scanner_user())
 
 
-def generate_punch_report():
-    attendees = get_all_attendees()    # list of { badge_id, name, email, … }
-    raw_logs  = get_scan_log()         # list of { badge_id, timestamp }
 
-    # 2) normalize timestamps to datetime
-    norm = []
-    for e in raw_logs:
-        bid = int(e["badge_id"])
-        ts  = e["timestamp"]
-        if isinstance(ts, str):
-            # strip the “datetime.datetime(...)” wrapper if present
-            if ts.startswith("datetime.datetime"):
-                inner = ts[len("datetime.datetime("):-1]
-                ts = datetime.datetime.fromisoformat(inner)
-            else:
-                ts = datetime.datetime.fromisoformat(ts)
-        norm.append({"badge_id": bid, "timestamp": ts})
-
-    # 3) group by badge_id and date → list of timestamps
-    from collections import defaultdict
-    scans_by_date = defaultdict(list)
-    for e in norm:
-        d = e["timestamp"].date()
-        scans_by_date[(e["badge_id"], d)].append(e["timestamp"])
-
-    # 4) build rows: for each (badge, date) compute min & max
-    rows = []
-    # build a lookup for name/email
-    info = { int(a["badge_id"]): (a["name"], a["email"]) for a in attendees }
-    for (bid, d), times in sorted(scans_by_date.items()):
-        times.sort()
-        check_in  = times[0].strftime("%H:%M:%S")
-        check_out = times[-1].strftime("%H:%M:%S")
-        name, email = info.get(bid, ("<unknown>", ""))
-        rows.append({
-            "Badge ID": bid,
-            "Name":      name,
-            "Email":     email,
-            "Date":      d.isoformat(),
-            "Check‑In":  check_in,
-            "Check‑Out": check_out
-        })
-
-    return pd.DataFrame(rows).sort_values(["Date","Badge ID"]).reset_index(drop=True)
-def generate_flattened_log():
-    # 1) Fetch registered attendees
-    attendees = get_all_attendees()   # list of dicts: { badge_id, name, email, … }
-    attendee_map = { int(a["badge_id"]): a for a in attendees }
-
-    raw_scans = get_scan_log()        # list of { badge_id, name, email, timestamp }
-
-    # 3) Group scans by badge_id (earliest → latest)
-    scans_by = {}
-    for entry in sorted(raw_scans, key=lambda x: x["timestamp"]):
-        bid = int(entry["badge_id"])
-        scans_by.setdefault(bid, []).append(entry["timestamp"])
-
-    # 4) Build a row for every scanned badge
-    rows = []
-    for bid, times in scans_by.items():
-        # look up registration info if it exists
-        info = attendee_map.get(bid, {})
-        row = {
-            "Badge ID": bid,
-            "Name":      info.get("name", f"<unregistered {bid}>"),
-            "Email":     info.get("email", ""),
-        }
-        # fill Scan 1…Scan 10
-        for i in range(1, 11):
-            if i <= len(times):
-                row[f"Scan {i}"] = times[i-1].strftime("%Y-%m-%d %H:%M:%S")
-            else:
-                row[f"Scan {i}"] = ""
-        rows.append(row)
 
-    # 5) Sort numerically by badge and return
-    rows = sorted(rows, key=lambda r: r["Badge ID"])
-    return pd.DataFrame(rows)
 # ─── Page layouts ────────────────────────────────────────────────────────────
 if st.session_state.page == 'home':
     st.title("📋 Conference Check‑In System")
 
-    # QR scanner
-    run_qr_scanner()
+    # QR scanner: one photo per badge, or continuous from a video stream
+    if st.toggle("🎥 Hands-free scanning", key="hands_free"):
+        run_stream_scanner()
+    else:
+        stop_stream_scanner()
+        run_qr_scanner()
 
 # Manual badge ID
     st.subheader("🔢 Manual Check-In by Badge ID")
     badge_input = st.text_input("Enter Badge ID", key="manual_badge")
 
     if st.button("Check In", key="checkin_manual"):
-        if badge_input:
         # 1) Record the scan
-            log_scan(badge_input)
-
-        # 2) Fetch name (none → resp.data is None)
-            resp = (
-                supabase
-                .table("attendees")
-                .select("name")
-                .eq("badge_id", int(badge_input))
-                .maybe_single()
-                .execute()
-            )
-            if resp is not None and resp.data:
-                name = resp.data.get("name", badge_input)
-            else:
-                name = badge_input
+        try:
+            logged = log_scan(badge_input, kiosk_station())
+        except ValueError:
+            st.warning("Please enter a valid badge ID.")
+        else:
+        # 2) Look up the name in the cached roster
+            person = get_attendee(badge_input)
+            name = person["name"] if person else badge_input
 
         # 4) Show the confirmation
-            st.success(f"✅ Checked in: {name}")
-        else:
-            st.warning("Please enter a valid badge ID.")
+            if logged is None:
+                st.info(f"ℹ {name} was already checked in moments ago.")
+            else:
+                st.success(f"✅ Checked in: {name}")
 
     st.subheader("👤 Manual Check-In by Name")
-    people = get_all_attendees()
-    names = [f"{p['name']} ({p['badge_id']})" for p in people]
-    selection = st.selectbox("Select Attendee", names, index=0)
+    query = st.text_input("Search by name, email or badge ID", key="name_search")
+    matches = search_attendees(query, limit=8) if query.strip() else []
+    if query.strip() and not matches:
+        st.caption("No attendee matches that search.")
+    selection = st.selectbox("Select Attendee", matches, index=0 if matches else None,
+                             format_func=lambda p: f"{p['name']} ({p['badge_id']})")
 
     if st.button("Check In Selected", key="checkin_select"):
-        bid = int(selection.split("(")[-1].rstrip(")"))
-        log_scan(bid)
-        # lookup the person’s name for that badge
-        name = next(p["name"] for p in people if p["badge_id"] == bid)
-        st.success(f"✅ Checked in: {name} ({bid})")
+        if selection is None:
+            st.warning("Search for an attendee first.")
+        else:
+            bid = int(selection["badge_id"])
+            logged = log_scan(bid, kiosk_station())
+            name = selection["name"]
+            if logged is None:
+                st.info(f"ℹ {name} ({bid}) was already checked in moments ago.")
+            else:
+                st.success(f"✅ Checked in: {name} ({bid})")
 
     # Go to Admin
     if st.button("🔐 Admin Area"):
         switch_page('admin')
 
 elif st.session_state.page == 'admin':
+    from io import BytesIO
+    import pandas as pd
+    import reports
+    from attendance import credited_sessions, attendance_sheet
+    from badges import badge_sheet_pdf
+    from exports import build_export, DATASETS as EXPORT_DATASETS, FORMATS as EXPORT_FORMATS
+    from importer import import_roster
+    from qr_decode import decode_stats
+    from scan_store import parse_timestamps
+
     st.title("🔐 Admin – Attendance Dashboard")
 
     # ← Back to Home
-    if st.button("⬅ Back to Home"):
+    b1, b2 = st.columns(2)
+    if b1.button("⬅ Back to Home"):
         switch_page('home')
+    if b2.button("📡 Live Occupancy"):
+        switch_page('live')
+
+    # Offline scan queue health
+    qs = scan_queue_stats()
+    c1, c2 = st.columns(2)
+    c1.metric("Queued scans", qs["depth"])
+    c2.metric("Flush lag (s)", f"{qs['lag_seconds']:.1f}")
+    ds = decode_stats()
+    if ds["frames"]:
+        c1, c2 = st.columns(2)
+        c1.metric("QR decode p50 / p95 (ms)", f"{ds['p50_ms']:.0f} / {ds['p95_ms']:.0f}")
+        c2.metric("QR decode success", f"{ds['success_rate']:.0%}")
+    if qs["last_error"]:
+        st.warning(f"⚠ Scan upload failing, will retry: {qs['last_error']}")
+    if qs["failed"]:
+        st.error(f"⚠ {qs['failed']} scan(s) rejected by the server were set aside "
+                 "in the local scan queue journal.")
+    # Hidden latency panel: open the app with ?metrics=1
+    if st.query_params.get("metrics") == "1":
+        import json
+        import metrics
+        with st.expander("⏱ Operation latency", expanded=True):
+            rows = metrics.summary_rows()
+            if rows:
+                st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+            else:
+                st.caption("Nothing recorded yet.")
+            m1, m2, m3 = st.columns(3)
+            m1.download_button("📥 Prometheus", metrics.prometheus_text(),
+                               file_name="metrics.prom", mime="text/plain")
+            m2.download_button("📥 JSON", json.dumps(metrics.snapshot()),
+                               file_name="metrics.json", mime="application/json")
+            if m3.button("Reset metrics"):
+                metrics.reset()
+
+    full = slots_full_badges()
+    if full:
+        st.warning("⚠ All 10 scan slots full (scan kept in raw log) for badges: "
+                   + ", ".join(map(str, full)))
+
+    # Filters shared by the tables below; pushed down to the queries
+    st.subheader("🔎 Filters")
+    f1, f2, f3, f4 = st.columns([3, 2, 1, 1])
+    search    = f1.text_input("Name or email contains")
+    day       = f2.date_input("Day", value=None)
+    badge_min = f3.number_input("Badge from", min_value=0, value=None, step=1)
+    badge_max = f4.number_input("Badge to", min_value=0, value=None, step=1)
+    page_size = st.select_slider("Rows per page", [25, 50, 100, 250], value=50)
 
     st.subheader("👥 All Registered Attendees")
     attendees = get_all_attendees()   # list of dicts with int badge_id
-    logs      = get_scan_log()        # list of dicts with badge_id (str), timestamp (datetime or repr)
-
-    # 2) Build badge_id → sorted list of timestamp strings
-    scans_map: dict[int, list[str]] = {}
-    for entry in logs:
-        # normalize badge_id to int
-        try:
-            bid = int(entry["badge_id"])
-        except Exception:
-            bid = entry["badge_id"]
-
-        # normalize timestamp to datetime
-        ts = entry["timestamp"]
-        if isinstance(ts, str) and ts.startswith("datetime.datetime"):
-            # strip off the wrapper: datetime.datetime(…)
-            inner = ts.replace("datetime.datetime(", "").rstrip(")")
-            ts = datetime.datetime.fromisoformat(inner)
-        elif isinstance(ts, str):
-            ts = datetime.datetime.fromisoformat(ts)
-
-        # format and collect
-        s = ts.strftime("%Y-%m-%d %H:%M:%S")
-        scans_map.setdefault(bid, []).append(s)
-
-    # sort each attendee’s scans chronologically
-    for bid in scans_map:
-        scans_map[bid].sort()
-
-    # 3) Assemble rows for the DataFrame
-    rows = []
-    for person in attendees:
-        bid   = person["badge_id"]
-        times = scans_map.get(bid, [])
-        rows.append({
-            "Badge ID":  bid,
-            "Name":       person["name"],
-            "Email":      person["email"],
-            "All Scans":  ", ".join(times)
-        })
-
-    # 4) Render table & download button
-    df_all = pd.DataFrame(rows)
-    st.dataframe(df_all)
-    st.download_button(
-        "📥 Download Attendees with Scans",
-        data=df_all.to_csv(index=False).encode("utf-8"),
-        file_name="attendees_with_scans.csv",
-        mime="text/csv"
-    )
+    scans     = get_scan_frame()      # columnar scan log, synced once per render
+    page_rows = paged_view(
+        "attendees_page", page_size,
+        lambda page: query_attendees(search, badge_min, badge_max, page, page_size))
+    ids = [r["badge_id"] for r in page_rows]
+    st.dataframe(reports.all_scans_table(scans[scans["badge_id"].isin(ids)], page_rows))
 
     st.markdown("---")
 
     st.subheader("📊 Raw Attendance Log")
-    raw = get_scan_log()
-    df_raw = pd.DataFrame(raw)
-    st.dataframe(df_raw)
-    st.download_button(
-    "📥 Download Raw Attendance Log",
-    df_raw.to_csv(index=False).encode("utf-8"),
-    file_name="raw_attendance.csv"
-)
+    raw_rows = paged_view(
+        "raw_page", page_size,
+        lambda page: query_scan_log(day, badge_min, badge_max, page, page_size))
+    st.dataframe(pd.DataFrame({
+        "badge_id":  [r["badge_id"] for r in raw_rows],
+        "timestamp": parse_timestamps([r["timestamp"] for r in raw_rows]),
+    }))
     st.markdown("---")
     
     st.subheader("📅 Daily Punch Report")
-    df_punch = generate_punch_report()
-
-    # highlight any row where Check‑In == Check‑Out
+    missed_only = st.checkbox("Missed check-out only")
+    punch_rows = paged_view(
+        "punch_page", page_size,
+        lambda page: query_punch_report(day, badge_min, badge_max, search,
+                                        missed_only, page, page_size))
+    page_df = reports.punch_page_frame(punch_rows)
+
+    # highlight any row where Check‑In == Check‑Out (visible page only)
     def highlight_missed(row):
         return ["background-color: #ffcccc" if row["Check‑In"] == row["Check‑Out"] else "" 
                 for _ in row]
 
-    styled = df_punch.style.apply(highlight_missed, axis=1)
+    styled = page_df.style.apply(highlight_missed, axis=1)
     st.dataframe(styled)
 
-    st.download_button(
-        "📥 Download Punch Report",
-        data=df_punch.to_csv(index=False).encode("utf-8"),
-        file_name="punch_report.csv",
-        mime="text/csv"
-    )
-
-
-    # — your usual init —
-load_dotenv()
-supabase = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
-
-def get_next_badge_id():
-    # pull the single highest badge_id, descending, limit=1
-    resp = (
-      supabase
-        .table("attendees")
-        .select("badge_id")
-        .order("badge_id", desc=True)
-        .limit(1)
-        .execute()
-    )
-    data = resp.data or []
-    if data:
-        return data[0]["badge_id"] + 1
-    return 1
+    st.markdown("---")
+
+    # Files are only built when asked for, then streamed from disk
+    st.subheader("📥 Downloads")
+    e1, e2 = st.columns(2)
+    dataset = e1.selectbox("Report", list(EXPORT_DATASETS))
+    fmt     = e2.selectbox("Format", list(EXPORT_FORMATS))
+    if st.button("Prepare Download"):
+        if "export" in st.session_state and os.path.exists(st.session_state.export[0]):
+            os.remove(st.session_state.export[0])
+        with st.spinner("Building export…"):
+            st.session_state.export = build_export(dataset, fmt)
+    if "export" in st.session_state:
+        path, file_name, mime = st.session_state.export
+        with open(path, "rb") as f:
+            st.download_button(f"📥 Download {file_name}", f, file_name=file_name, mime=mime)
+
+    st.markdown("---")
+
+    st.subheader("🎓 CE Attendance (inferred from scans)")
+    # inferring sessions walks every badge's scans: only on request, then kept
+    if st.button("Build CE Attendance"):
+        with st.spinner("Inferring sessions from scans…"):
+            st.session_state.ce_sheet = (datetime.datetime.now(LOCAL_TZ),
+                                         attendance_sheet(credited_sessions(scans), attendees))
+    if "ce_sheet" in st.session_state:
+        built_at, df_ce = st.session_state.ce_sheet
+        st.caption(f"Built {built_at:%I:%M %p}; build again to include newer scans.")
+        ce_page = paged_view(
+            "ce_page", page_size,
+            lambda page: (df_ce.iloc[page * page_size:(page + 1) * page_size], len(df_ce)))
+        st.dataframe(ce_page)
+        report_date = st.date_input("Report date", value=datetime.date.today())
+        if st.button("💾 Save CE Report"):
+            res = save_ce_report(df_ce, report_date, workers=4)
+            msg = (f"CE report for {report_date}: {res['inserted']} inserted, "
+                   f"{res['updated']} updated, {res['unchanged']} unchanged")
+            if res["failed"]:
+                st.error(f"{msg}, {res['failed']} failed — save again to retry them.")
+            else:
+                st.success(msg)
+
+    st.markdown("---")
+
+    st.subheader("📤 Bulk Import Attendees")
+    roster_file = st.file_uploader("Vendor roster (CSV or XLSX)", type=["csv", "xlsx"])
+    if roster_file and st.button("Import Roster"):
+        with st.spinner("Importing…"):
+            res = import_roster(roster_file, roster_file.name, qr_dir="badges_qr")
+        if res["inserted"]:
+            st.success(f"Imported {res['inserted']} attendees "
+                       f"(badges {res['first_badge']}–{res['last_badge']})")
+        if len(res["rejected"]):
+            st.warning(f"{len(res['rejected'])} rows skipped")
+            st.dataframe(res["rejected"])
+
+    st.markdown("---")
+
+    st.subheader("🪪 Badge Sheets")
+    ids = [int(a["badge_id"]) for a in attendees] or [1]
+    c1, c2 = st.columns(2)
+    lo = c1.number_input("From badge", min_value=1, value=min(ids))
+    hi = c2.number_input("To badge", min_value=1, value=max(ids))
+    if st.button("Build Badge PDF"):
+        buf = BytesIO()
+        badge_sheet_pdf([a for a in attendees if lo <= int(a["badge_id"]) <= hi], buf)
+        st.download_button("📥 Download Badges", buf.getvalue(),
+                           file_name=f"badges_{lo}-{hi}.pdf", mime="application/pdf")
+
+elif st.session_state.page == 'live':
+    import pandas as pd
+
+    st.title("📡 Live Occupancy")
+    if st.button("⬅ Back to Admin"):
+        switch_page('admin')
+
+    # only new scans are applied on each tick; the log is never re-read
+    @st.fragment(run_every=5)
+    def live_board():
+        occ    = get_occupancy()
+        roster = len(get_all_attendees())
+        now    = datetime.datetime.now(LOCAL_TZ).replace(tzinfo=None)
+
+        block = occ.current_block(now)
+        if block:
+            here = len(occ.present(block["index"]))
+            st.subheader(f"🎤 {block['title']}")
+            st.caption(f"{block['start']:%a %I:%M %p} – {block['end']:%I:%M %p}")
+            c1, c2 = st.columns(2)
+            c1.metric("In the room", here)
+            c2.metric("Absent", max(roster - here, 0))
+        else:
+            upcoming = occ.next_block(now)
+            st.info("No session in progress."
+                    + (f" Next: {upcoming['title']} at {upcoming['start']:%I:%M %p}."
+                       if upcoming else ""))
+
+        st.subheader("Per session")
+        st.dataframe(pd.DataFrame(occ.session_counts(roster)), hide_index=True)
+        st.subheader("Per day")
+        st.dataframe(pd.DataFrame(occ.day_counts(roster)), hide_index=True)
+
+        st.subheader("🚪 Checked in, no check-out")
+        day = st.date_input("Day", value=now.date(), key="live_day")
+        open_ = occ.no_checkout(day)
+        st.dataframe(pd.DataFrame([
+            {"Badge ID": b, "Name": (get_attendee(b) or {}).get("name", ""),
+             "Checked in": f"{ts:%I:%M %p}"}
+            for b, ts in open_
+        ]), hide_index=True)
+        st.caption(f"Updated {now:%I:%M:%S %p} · scans up to id {occ.last_id}")
+
+    live_board()
+
 
 # — in your Streamlit layout, e.g. sidebar —
 st.sidebar.header("➕ Quick Register")
 
-next_id = get_next_badge_id()
 with st.sidebar.form("quick_register"):
     name     = st.text_input("Full Name")
     email    = st.text_input("Email")
-    # pre-fill and lock the badge field
-    badge_id = st.number_input(
-        "Badge ID",
-        min_value=1,
-        value=next_id,
-        disabled=True
-    )
+    # the badge number is reserved atomically when the form is submitted
+    st.caption("Badge ID is assigned on submit.")
     submitted = st.form_submit_button("Register")
 
 if submitted:
     try:
-        supabase.table("attendees").insert({
-            "badge_id": int(badge_id),
-            "name":     name,
-            "email":    email
-        }).execute()
+        badge_id = reserve_badge_ids(1)
+        register_attendee(badge_id, name, email)
         st.sidebar.success(f"Registered {name} (# {badge_id})")
     except Exception as e:
         st.sidebar.error(f"Failed to register: {e}")
@@ -0,0 +1,121 @@
+# # importer.py
+"""
+Bulk attendee import from the registration vendor's CSV/XLSX export.
+
+    python importer.py roster.xlsx [--qr-dir badges_qr] [--dry-run]
+
+Rows are validated and de-duplicated by email (within the file and against
+the current roster), a contiguous block of badge ids is reserved in one call,
+and the rows are inserted in chunked batches. QR codes for the new badges can
+be rendered straight away.
+"""
+import argparse
+import os
+import re
+
+import pandas as pd
+
+EMAIL_RE   = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+CHUNK_SIZE = 500
+
+# vendor header → our column
+COLUMN_ALIASES = {
+    "name": "name", "full name": "name", "attendee name": "name",
+    "first name": "first_name", "firstname": "first_name",
+    "last name": "last_name", "lastname": "last_name", "surname": "last_name",
+    "email": "email", "e-mail": "email", "email address": "email",
+}
+
+
+# ─── Reading & validation ────────────────────────────────────────────────────
+def read_roster(file, filename: str | None = None) -> pd.DataFrame:
+    """Read a CSV or XLSX export into a frame with name and email columns."""
+    filename = filename or getattr(file, "name", str(file))
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in (".xlsx", ".xls"):
+        df = pd.read_excel(file, dtype=str)
+    else:
+        df = pd.read_csv(file, dtype=str)
+
+    df = df.rename(columns=lambda c: COLUMN_ALIASES.get(str(c).strip().lower(), c))
+    if "name" not in df and {"first_name", "last_name"} <= set(df.columns):
+        df["name"] = df["first_name"].fillna("").str.strip() + " " \
+                     + df["last_name"].fillna("").str.strip()
+    missing = {"name", "email"} - set(df.columns)
+    if missing:
+        raise ValueError(f"Roster is missing column(s): {', '.join(sorted(missing))}")
+    return df[["name", "email"]]
+
+
+def prepare_import(df: pd.DataFrame, existing_emails: set[str]):
+    """
+    Split a roster into (accepted, rejected) frames. Rejected rows carry a
+    'reason': missing name, invalid email, duplicate in file, already registered.
+    """
+    df = df.assign(
+        name=df["name"].fillna("").str.strip().str.replace(r"\s+", " ", regex=True),
+        email=df["email"].fillna("").str.strip().str.lower(),
+    )
+    reason = pd.Series("", index=df.index)
+    reason[df["name"] == ""] = "missing name"
+    reason[(reason == "") & ~df["email"].str.match(EMAIL_RE)] = "invalid email"
+    reason[(reason == "") & df["email"].isin(existing_emails)] = "already registered"
+    ok = reason == ""
+    # only accepted rows count: a rejected first row must not shadow a good one
+    reason[df["email"].where(ok).duplicated() & ok] = "duplicate in file"
+
+    accepted = df[reason == ""].reset_index(drop=True)
+    rejected = df[reason != ""].assign(reason=reason[reason != ""])
+    return accepted, rejected
+
+
+# ─── Import ──────────────────────────────────────────────────────────────────
+def import_roster(file, filename: str | None = None, qr_dir: str | None = None,
+                  chunk_size: int = CHUNK_SIZE, dry_run: bool = False) -> dict:
+    """
+    Validate, allocate badge ids and insert a roster file.
+    Returns {"inserted", "first_badge", "last_badge", "rejected" (frame)}.
+    """
+    from database import get_all_attendees, reserve_badge_ids, register_attendees
+
+    existing = {str(a.get("email") or "").strip().lower() for a in get_all_attendees()}
+    accepted, rejected = prepare_import(read_roster(file, filename), existing)
+    result = {"inserted": 0, "first_badge": None, "last_badge": None,
+              "rejected": rejected}
+    if accepted.empty or dry_run:
+        return result
+
+    first = reserve_badge_ids(len(accepted))
+    accepted.insert(0, "badge_id", range(first, first + len(accepted)))
+    register_attendees(accepted.to_dict(orient="records"), chunk_size=chunk_size)
+    result.update(inserted=len(accepted), first_badge=first,
+                  last_badge=first + len(accepted) - 1)
+
+    if qr_dir:
+        from badges import render_qr_codes
+        render_qr_codes(accepted["badge_id"].tolist(), qr_dir)
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Bulk import attendees from CSV/XLSX.")
+    ap.add_argument("roster")
+    ap.add_argument("--qr-dir", help="also render badge QR codes into this folder")
+    ap.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    ap.add_argument("--dry-run", action="store_true", help="validate only")
+    args = ap.parse_args()
+
+    res = import_roster(args.roster, qr_dir=args.qr_dir,
+                        chunk_size=args.chunk_size, dry_run=args.dry_run)
+    if res["inserted"]:
+        print(f"Inserted {res['inserted']} attendees "
+              f"(badges {res['first_badge']}–{res['last_badge']})")
+    else:
+        print("Nothing inserted")
+    if len(res["rejected"]):
+        print(f"{len(res['rejected'])} rows rejected:")
+        print(res["rejected"].to_string())
+
+
+if __name__ == "__main__":
+    main()
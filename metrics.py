@@ -0,0 +1,237 @@
+# # metrics.py
+"""
+In-process latency histograms and counters.
+
+    @timed("reports.punch_report")
+    def punch_report(...): ...
+
+    with timer("checkin.decode"):
+        ...
+
+Every timed operation lands in one histogram family (op_latency_seconds,
+labelled by op) with fixed buckets, plus an error counter; recording is a
+perf_counter pair, a bisect and a short locked update. snapshot() feeds the
+admin panel, prometheus_text() a scrape or download, and write_json_log()
+(or METRICS_LOG_PATH) appends one JSON snapshot per line.
+
+Set METRICS_ENABLED=0 to turn recording off entirely.
+"""
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+ENABLED      = os.getenv("METRICS_ENABLED", "1") not in ("0", "false", "False")
+LOG_PATH     = os.getenv("METRICS_LOG_PATH")
+LOG_INTERVAL = float(os.getenv("METRICS_LOG_INTERVAL", "60"))
+
+# upper bounds in seconds (+Inf is implicit)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+           0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_histograms: dict[str, "_Histogram"] = {}
+_counters: dict[tuple[str, str], float] = {}      # (name, op) → value
+_started_at = time.time()
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total  = 0.0
+        self.count  = 0
+        self.max    = 0.0
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation (capped at max)."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and i < len(BUCKETS):
+                return min(BUCKETS[i], self.max)
+        return self.max
+
+
+# ─── Recording ───────────────────────────────────────────────────────────────
+def observe(op: str, seconds: float):
+    """Record one latency sample for `op`."""
+    if not ENABLED:
+        return
+    i = bisect_left(BUCKETS, seconds)
+    with _lock:
+        h = _histograms.get(op)
+        if h is None:
+            h = _histograms[op] = _Histogram()
+        h.counts[i] += 1
+        h.total += seconds
+        h.count += 1
+        if seconds > h.max:
+            h.max = seconds
+
+
+def incr(name: str, op: str = "", n: float = 1):
+    """Add n to the counter `name` (optionally labelled by op)."""
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[(name, op)] = _counters.get((name, op), 0) + n
+
+
+@contextmanager
+def timer(op: str):
+    """Time the block as `op`; an exception also bumps op_errors_total."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        incr("op_errors_total", op)
+        raise
+    finally:
+        observe(op, time.perf_counter() - t0)
+
+
+def timed(op: str | None = None):
+    """Decorator form of timer(); op defaults to module.function."""
+    def wrap(fn):
+        name = op or f"{fn.__module__}.{fn.__qualname__}"
+
+        if inspect.isgeneratorfunction(fn):
+            return fn          # the call returns immediately; nothing to time
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except BaseException:
+                incr("op_errors_total", name)
+                raise
+            finally:
+                observe(name, time.perf_counter() - t0)
+        inner.__wrapped_op__ = name
+        return inner
+    return wrap
+
+
+def instrument_module(namespace: dict, prefix: str, skip: tuple = ()):
+    """
+    Wrap every function defined in a module's namespace (pass globals()) with
+    timed(prefix + name), so calls between the module's own functions are
+    timed too.
+    """
+    module = namespace["__name__"]
+    for name, obj in list(namespace.items()):
+        if (inspect.isfunction(obj) and obj.__module__ == module
+                and name not in skip and not hasattr(obj, "__wrapped_op__")):
+            namespace[name] = timed(f"{prefix}{name}")(obj)
+
+
+def instrument_object(obj, prefix: str):
+    """Wrap the public methods of one instance in place (e.g. a storage backend)."""
+    for name in dir(type(obj)):
+        # look at the class so properties are not evaluated
+        if not name.startswith("_") and inspect.isfunction(getattr(type(obj), name)):
+            setattr(obj, name, timed(f"{prefix}{name}")(getattr(obj, name)))
+    return obj
+
+
+# ─── Reading & export ────────────────────────────────────────────────────────
+def snapshot() -> dict:
+    """Copy of every histogram (count, sum, p50/p95/p99, max) and counter."""
+    with _lock:
+        ops = {
+            op: {"count": h.count, "sum_s": h.total, "max_s": h.max,
+                 "p50_s": h.quantile(0.50), "p95_s": h.quantile(0.95),
+                 "p99_s": h.quantile(0.99), "buckets": list(h.counts)}
+            for op, h in _histograms.items()
+        }
+        counters = [{"name": n, "op": o, "value": v} for (n, o), v in _counters.items()]
+    return {"ts": time.time(), "uptime_s": time.time() - _started_at,
+            "ops": ops, "counters": counters}
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text() -> str:
+    """Everything in the Prometheus text exposition format."""
+    snap = snapshot()
+    lines = ["# HELP op_latency_seconds Latency of instrumented operations.",
+             "# TYPE op_latency_seconds histogram"]
+    for op, h in sorted(snap["ops"].items()):
+        lbl = _label(op)
+        cum = 0
+        for bound, c in zip(BUCKETS + (float("inf"),), h["buckets"]):
+            cum += c
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'op_latency_seconds_bucket{{op="{lbl}",le="{le}"}} {cum}')
+        lines.append(f'op_latency_seconds_sum{{op="{lbl}"}} {h["sum_s"]!r}')
+        lines.append(f'op_latency_seconds_count{{op="{lbl}"}} {h["count"]}')
+    seen = set()
+    for c in sorted(snap["counters"], key=lambda c: (c["name"], c["op"])):
+        if c["name"] not in seen:
+            seen.add(c["name"])
+            lines.append(f"# TYPE {c['name']} counter")
+        lbl = f'{{op="{_label(c["op"])}"}}' if c["op"] else ""
+        lines.append(f"{c['name']}{lbl} {c['value']!r}")
+    return "\n".join(lines) + "\n"
+
+
+def summary_rows() -> list[dict]:
+    """One row per op for a table: count, p50/p95/max in ms, errors."""
+    snap = snapshot()
+    errors = {c["op"]: c["value"] for c in snap["counters"] if c["name"] == "op_errors_total"}
+    return sorted((
+        {"op": op, "calls": h["count"],
+         "p50 ms": round(h["p50_s"] * 1000, 1), "p95 ms": round(h["p95_s"] * 1000, 1),
+         "max ms": round(h["max_s"] * 1000, 1), "total s": round(h["sum_s"], 2),
+         "errors": int(errors.get(op, 0))}
+        for op, h in snap["ops"].items()
+    ), key=lambda r: -r["total s"])
+
+
+def write_json_log(path: str = LOG_PATH):
+    """Append the current snapshot to `path` as one JSON line."""
+    line = json.dumps(snapshot(), separators=(",", ":"))
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+_log_thread = None
+
+
+def start_json_log(path: str = LOG_PATH, interval: float = LOG_INTERVAL):
+    """Append a snapshot to `path` every `interval` seconds from a daemon thread."""
+    global _log_thread
+    if _log_thread is not None or not path:
+        return
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                write_json_log(path)
+            except OSError:
+                pass
+
+    _log_thread = threading.Thread(target=run, name="metrics-log", daemon=True)
+    _log_thread.start()
+
+
+if ENABLED and LOG_PATH:
+    start_json_log()
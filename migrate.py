@@ -0,0 +1,151 @@
+# # migrate.py
+"""
+Versioned schema migrations for the Postgres database.
+
+    python migrate.py                  # apply everything pending
+    python migrate.py --status         # applied / pending / changed
+    python migrate.py --to 005         # stop after 005
+    python migrate.py --baseline 004   # record 000–004 as applied without running them
+
+migrations/NNN_name.sql files are applied in version order, each in one
+transaction together with its row in schema_migrations (version, name,
+checksum, applied_at). Applied versions are skipped, so the runner can be
+re-run at any time. A file edited after it was applied stops the run: the
+database no longer matches it, and the change belongs in a new migration.
+An advisory lock keeps two runners from overlapping.
+
+Connection settings are the Postgres backend's: DATABASE_URL, or the
+user/password/host/port/dbname variables. A database whose 001–004 were
+applied by hand is brought under the runner once with --baseline 004.
+"""
+import argparse
+import hashlib
+import os
+import re
+import time
+from collections import namedtuple
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+Migration = namedtuple("Migration", ["version", "name", "path", "checksum"])
+
+_FILE_RE = re.compile(r"^(\d{3})_(\w+)\.sql$")
+_LOCK    = "select pg_advisory_lock(hashtext('migrate.py'))"
+_UNLOCK  = "select pg_advisory_unlock(hashtext('migrate.py'))"
+_TABLE   = """
+create table if not exists public.schema_migrations (
+    version    text primary key,
+    name       text not null,
+    checksum   text not null,
+    applied_at timestamptz not null default now()
+)
+"""
+
+
+class MigrationError(Exception):
+    """The migrations on disk and the database disagree."""
+
+
+def discover(path: str = MIGRATIONS_DIR) -> list[Migration]:
+    """Migration files in version order."""
+    found = {}
+    for fname in sorted(os.listdir(path)):
+        m = _FILE_RE.match(fname)
+        if not m:
+            continue
+        if m.group(1) in found:
+            raise MigrationError(f"Two migrations numbered {m.group(1)}: "
+                                 f"{os.path.basename(found[m.group(1)].path)} and {fname}")
+        full = os.path.join(path, fname)
+        with open(full, "rb") as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        found[m.group(1)] = Migration(m.group(1), m.group(2), full, checksum)
+    return [found[v] for v in sorted(found)]
+
+
+def connect():
+    """A psycopg2 connection with the backend's settings."""
+    import psycopg2
+    from backends import pg_dsn
+    return psycopg2.connect(**pg_dsn())
+
+
+def applied(conn) -> dict[str, str]:
+    """version → checksum recorded in schema_migrations."""
+    with conn, conn.cursor() as cur:
+        cur.execute(_TABLE)
+        cur.execute("select version, checksum from public.schema_migrations")
+        return dict(cur.fetchall())
+
+
+def status(conn, migrations: list[Migration] | None = None) -> list[dict]:
+    """Each migration on disk with its state: applied, pending or changed."""
+    done = applied(conn)
+    return [{"version": m.version, "name": m.name,
+             "state": "pending" if m.version not in done
+                      else "applied" if done[m.version] == m.checksum else "changed"}
+            for m in (discover() if migrations is None else migrations)]
+
+
+def migrate(conn, target: str | None = None, baseline: bool = False,
+            migrations: list[Migration] | None = None, log=print) -> list[Migration]:
+    """
+    Apply pending migrations up to and including `target` (default: all), or
+    with baseline=True only record them as applied. Returns the ones handled.
+    """
+    migrations = discover() if migrations is None else migrations
+    with conn, conn.cursor() as cur:
+        cur.execute(_LOCK)                       # session lock, outlives the transaction
+    try:
+        done = applied(conn)
+        changed = [m for m in migrations if m.version in done and done[m.version] != m.checksum]
+        if changed:
+            raise MigrationError("Changed after being applied: " + ", ".join(
+                os.path.basename(m.path) for m in changed))
+        todo = [m for m in migrations
+                if m.version not in done and (target is None or m.version <= target)]
+        for m in todo:
+            with open(m.path, encoding="utf-8") as f:
+                sql = f.read()
+            t0 = time.perf_counter()
+            with conn, conn.cursor() as cur:
+                if not baseline:
+                    cur.execute(sql)
+                cur.execute("insert into public.schema_migrations (version, name, checksum) "
+                            "values (%s, %s, %s)", (m.version, m.name, m.checksum))
+            log(f"{'recorded' if baseline else 'applied '} {m.version}_{m.name}"
+                f"  ({(time.perf_counter() - t0) * 1000:.0f} ms)")
+        return todo
+    finally:
+        with conn, conn.cursor() as cur:
+            cur.execute(_UNLOCK)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Apply schema migrations to Postgres.")
+    ap.add_argument("--to", help="last version to apply, e.g. 005")
+    ap.add_argument("--status", action="store_true", help="list migrations and exit")
+    ap.add_argument("--baseline", metavar="VERSION",
+                    help="record migrations up to VERSION as applied without running them")
+    args = ap.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    conn = connect()
+    try:
+        if args.status:
+            for m in status(conn):
+                print(f"{m['version']}  {m['state']:<8} {m['name']}")
+            return
+        version = args.baseline or args.to
+        ran = migrate(conn, version.zfill(3) if version else None, baseline=bool(args.baseline))
+        if not ran:
+            print("Nothing to apply.")
+    except MigrationError as e:
+        raise SystemExit(str(e))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
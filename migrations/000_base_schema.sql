@@ -0,0 +1,34 @@
+-- 000_base_schema.sql
+-- The tables the app started with, as they were first created by hand in
+-- Supabase. Everything is "if not exists": on an existing database this is a
+-- no-op, on an empty one (local Postgres, benchmarks) it is the base that
+-- 001 onwards build on.
+
+create table if not exists public.attendees (
+    badge_id integer primary key,
+    name     text,
+    email    text,
+    scan1  timestamptz,
+    scan2  timestamptz,
+    scan3  timestamptz,
+    scan4  timestamptz,
+    scan5  timestamptz,
+    scan6  timestamptz,
+    scan7  timestamptz,
+    scan8  timestamptz,
+    scan9  timestamptz,
+    scan10 timestamptz
+);
+
+create table if not exists public.scanlog (
+    id          bigserial primary key,
+    badge_id    integer not null,
+    "timestamp" timestamptz not null
+);
+
+create table if not exists public.ce_reports (
+    badge_id      integer not null,
+    session_title text not null,
+    attended      boolean not null default false,
+    report_date   date not null
+);
@@ -0,0 +1,76 @@
+-- 001_log_scan_rpc.sql
+-- Log a scan and claim the next free scanN slot in one round trip.
+--
+-- log_scan(badge, ts) returns
+--   1..10  the slot that was filled
+--   0      all ten slots are already full (the scan is still in scanlog)
+--   -1     this exact (badge, ts) was logged before, nothing changed
+--   NULL   no attendee with that badge (the scan is still in scanlog)
+--
+-- The attendee row is locked with FOR UPDATE, so two kiosks scanning the
+-- same badge at once are serialized and cannot claim the same slot.
+
+create or replace function public.log_scan(p_badge_id integer, p_ts timestamptz)
+returns integer
+language plpgsql
+as $$
+declare
+    a    public.attendees%rowtype;
+    slot integer;
+begin
+    if exists (select 1 from public.scanlog
+               where badge_id = p_badge_id and "timestamp" = p_ts) then
+        return -1;
+    end if;
+
+    insert into public.scanlog (badge_id, "timestamp") values (p_badge_id, p_ts);
+
+    select * into a from public.attendees where badge_id = p_badge_id for update;
+    if not found then
+        return null;
+    end if;
+
+    slot := case
+        when a.scan1  is null then 1
+        when a.scan2  is null then 2
+        when a.scan3  is null then 3
+        when a.scan4  is null then 4
+        when a.scan5  is null then 5
+        when a.scan6  is null then 6
+        when a.scan7  is null then 7
+        when a.scan8  is null then 8
+        when a.scan9  is null then 9
+        when a.scan10 is null then 10
+        else 0
+    end;
+    if slot = 0 then
+        return 0;
+    end if;
+
+    execute format('update public.attendees set scan%s = $1 where badge_id = $2', slot)
+        using p_ts, p_badge_id;
+    return slot;
+end;
+$$;
+
+-- Batch form used by the write-behind flusher: p_events is a JSON array of
+-- {"badge_id": int, "timestamp": text}; events are applied oldest first.
+create or replace function public.log_scans(p_events jsonb)
+returns table (badge_id integer, "timestamp" timestamptz, slot integer)
+language plpgsql
+as $$
+declare
+    e record;
+begin
+    for e in
+        select (x->>'badge_id')::integer as b, (x->>'timestamp')::timestamptz as t
+        from jsonb_array_elements(p_events) as x
+        order by 2
+    loop
+        badge_id    := e.b;
+        "timestamp" := e.t;
+        slot        := public.log_scan(e.b, e.t);
+        return next;
+    end loop;
+end;
+$$;
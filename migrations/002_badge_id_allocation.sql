@@ -0,0 +1,26 @@
+-- 002_badge_id_allocation.sql
+-- Hand out badge numbers from a sequence instead of max(badge_id) + 1, so two
+-- kiosks (or a kiosk and a bulk import) never get the same number.
+
+create sequence if not exists public.badge_id_seq;
+
+-- reserve_badge_ids(n) returns the first id of a contiguous block of n ids.
+-- The advisory lock makes the nextval/setval pair atomic between callers;
+-- the max() guard keeps us clear of rows inserted with explicit ids.
+create or replace function public.reserve_badge_ids(p_count integer)
+returns integer
+language plpgsql
+as $$
+declare
+    first_id bigint;
+begin
+    if p_count < 1 then
+        raise exception 'p_count must be positive, got %', p_count;
+    end if;
+    perform pg_advisory_xact_lock(hashtext('public.reserve_badge_ids'));
+    first_id := greatest(nextval('public.badge_id_seq'),
+                         (select coalesce(max(badge_id), 0) + 1 from public.attendees));
+    perform setval('public.badge_id_seq', first_id + p_count - 1);
+    return first_id;
+end;
+$$;
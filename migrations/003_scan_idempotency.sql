@@ -0,0 +1,82 @@
+-- 003_scan_idempotency.sql
+-- Idempotency keys on scanlog so a repeated or retried submission of the
+-- same badge at the same station in the same debounce window lands once.
+
+alter table public.scanlog add column if not exists idempotency_key text;
+create unique index if not exists scanlog_idempotency_key
+    on public.scanlog (idempotency_key);
+
+drop function if exists public.log_scan(integer, timestamptz);
+
+-- Same contract as 001, plus p_key: returns -1 when the key (or the exact
+-- badge/timestamp pair) was already logged.
+create or replace function public.log_scan(p_badge_id integer, p_ts timestamptz,
+                                           p_key text default null)
+returns integer
+language plpgsql
+as $$
+declare
+    a    public.attendees%rowtype;
+    slot integer;
+begin
+    if exists (select 1 from public.scanlog
+               where badge_id = p_badge_id and "timestamp" = p_ts) then
+        return -1;
+    end if;
+
+    insert into public.scanlog (badge_id, "timestamp", idempotency_key)
+    values (p_badge_id, p_ts, p_key)
+    on conflict (idempotency_key) do nothing;
+    if not found then
+        return -1;
+    end if;
+
+    select * into a from public.attendees where badge_id = p_badge_id for update;
+    if not found then
+        return null;
+    end if;
+
+    slot := case
+        when a.scan1  is null then 1
+        when a.scan2  is null then 2
+        when a.scan3  is null then 3
+        when a.scan4  is null then 4
+        when a.scan5  is null then 5
+        when a.scan6  is null then 6
+        when a.scan7  is null then 7
+        when a.scan8  is null then 8
+        when a.scan9  is null then 9
+        when a.scan10 is null then 10
+        else 0
+    end;
+    if slot = 0 then
+        return 0;
+    end if;
+
+    execute format('update public.attendees set scan%s = $1 where badge_id = $2', slot)
+        using p_ts, p_badge_id;
+    return slot;
+end;
+$$;
+
+-- p_events items may now carry "key"
+create or replace function public.log_scans(p_events jsonb)
+returns table (badge_id integer, "timestamp" timestamptz, slot integer)
+language plpgsql
+as $$
+declare
+    e record;
+begin
+    for e in
+        select (x->>'badge_id')::integer as b, (x->>'timestamp')::timestamptz as t,
+               x->>'key' as k
+        from jsonb_array_elements(p_events) as x
+        order by 2
+    loop
+        badge_id    := e.b;
+        "timestamp" := e.t;
+        slot        := public.log_scan(e.b, e.t, e.k);
+        return next;
+    end loop;
+end;
+$$;
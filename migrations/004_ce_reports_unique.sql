@@ -0,0 +1,13 @@
+-- 004_ce_reports_unique.sql
+-- One row per (attendee, session, report date) so save_ce_report can upsert
+-- instead of appending duplicates on every re-run.
+
+delete from public.ce_reports a
+using public.ce_reports b
+where a.ctid < b.ctid
+  and a.badge_id = b.badge_id
+  and a.session_title = b.session_title
+  and a.report_date = b.report_date;
+
+create unique index if not exists ce_reports_badge_session_date
+    on public.ce_reports (badge_id, session_title, report_date);
@@ -0,0 +1,10 @@
+-- 005_scanlog_indexes.sql
+-- scanlog is read three ways: by id (delta sync, already the primary key),
+-- one badge's scans in time order (log_scan's repeat check, badge history)
+-- and a time range (one day's scans, query_scan_log). Index the last two.
+--
+-- Built inside the migration's transaction, so not concurrently: on a large
+-- log, run it outside scanning hours.
+
+create index if not exists scanlog_badge_ts on public.scanlog (badge_id, "timestamp");
+create index if not exists scanlog_ts       on public.scanlog ("timestamp");
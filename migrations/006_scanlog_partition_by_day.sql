@@ -0,0 +1,160 @@
+-- 006_scanlog_partition_by_day.sql
+-- Partition scanlog by event day (local midnight to midnight), so one day's
+-- scans are one table: day filters prune to a single partition, and a past
+-- event can be detached and archived whole.
+--
+-- Existing rows are copied into the default partition. backfill.py then
+-- moves them into per-day partitions, one day per transaction, and creates
+-- the programme's days ahead of the event. Grants on the old table are
+-- carried over; row-level security policies are not, re-create any by hand.
+--
+-- A unique index on a partitioned table has to include the partition key,
+-- so idempotency keys move to a table of their own, scan_keys.
+
+create table if not exists public.scan_keys (
+    idempotency_key text primary key,
+    badge_id        integer not null,
+    "timestamp"     timestamptz not null
+);
+
+create sequence if not exists public.scanlog_ids;
+
+do $$
+declare
+    g record;
+begin
+    if (select relkind from pg_class where oid = 'public.scanlog'::regclass) = 'p' then
+        return;                                   -- already partitioned
+    end if;
+
+    create table public.scanlog_by_day (
+        id              bigint not null default nextval('public.scanlog_ids'),
+        badge_id        integer not null,
+        "timestamp"     timestamptz not null,
+        idempotency_key text,
+        constraint scanlog_by_day_pkey primary key (id, "timestamp")
+    ) partition by range ("timestamp");
+    create table public.scanlog_default partition of public.scanlog_by_day default;
+
+    insert into public.scanlog_by_day (id, badge_id, "timestamp", idempotency_key)
+    select id, badge_id, "timestamp", idempotency_key from public.scanlog;
+    perform setval('public.scanlog_ids',
+                   coalesce((select max(id) from public.scanlog), 0) + 1, false);
+
+    insert into public.scan_keys (idempotency_key, badge_id, "timestamp")
+    select idempotency_key, badge_id, "timestamp" from public.scanlog
+    where idempotency_key is not null
+    on conflict do nothing;
+
+    for g in select grantee, privilege_type from information_schema.role_table_grants
+             where table_schema = 'public' and table_name = 'scanlog'
+    loop
+        execute format('grant %s on public.scanlog_by_day, public.scan_keys to %s',
+                       g.privilege_type,
+                       case when g.grantee = 'PUBLIC' then 'public' else quote_ident(g.grantee) end);
+        if g.privilege_type = 'INSERT' then
+            execute format('grant usage on sequence public.scanlog_ids to %s',
+                           case when g.grantee = 'PUBLIC' then 'public' else quote_ident(g.grantee) end);
+        end if;
+    end loop;
+
+    drop table public.scanlog;
+    alter table public.scanlog_by_day rename to scanlog;
+    alter index public.scanlog_by_day_pkey rename to scanlog_pkey;
+end;
+$$;
+
+create index if not exists scanlog_badge_ts on public.scanlog (badge_id, "timestamp");
+create index if not exists scanlog_ts       on public.scanlog ("timestamp");
+
+-- ensure_scanlog_partition(day) gives `day` (midnight to midnight in p_tz)
+-- its own partition and moves that day's rows out of scanlog_default.
+-- Returns how many rows moved; a no-op when the partition already exists.
+create or replace function public.ensure_scanlog_partition(p_day date,
+                                                           p_tz text default 'America/Chicago')
+returns integer
+language plpgsql
+as $$
+declare
+    part  text        := 'scanlog_' || to_char(p_day, 'YYYYMMDD');
+    lo    timestamptz := p_day::timestamp at time zone p_tz;
+    hi    timestamptz := (p_day + 1)::timestamp at time zone p_tz;
+    moved integer;
+begin
+    if to_regclass('public.' || part) is not null then
+        return 0;
+    end if;
+
+    -- a new range may not cover rows still sitting in the default partition,
+    -- so the default is detached while the day's rows are moved across
+    alter table public.scanlog detach partition public.scanlog_default;
+    execute format('create table public.%I partition of public.scanlog '
+                   'for values from (%L) to (%L)', part, lo, hi);
+    with gone as (
+        delete from public.scanlog_default
+        where "timestamp" >= lo and "timestamp" < hi
+        returning id, badge_id, "timestamp", idempotency_key
+    )
+    insert into public.scanlog (id, badge_id, "timestamp", idempotency_key)
+    select id, badge_id, "timestamp", idempotency_key from gone;
+    get diagnostics moved = row_count;
+    alter table public.scanlog attach partition public.scanlog_default default;
+    return moved;
+end;
+$$;
+
+-- Same contract as 003; the key is claimed in scan_keys before the scan is
+-- inserted.
+create or replace function public.log_scan(p_badge_id integer, p_ts timestamptz,
+                                           p_key text default null)
+returns integer
+language plpgsql
+as $$
+declare
+    a    public.attendees%rowtype;
+    slot integer;
+begin
+    if exists (select 1 from public.scanlog
+               where badge_id = p_badge_id and "timestamp" = p_ts) then
+        return -1;
+    end if;
+
+    if p_key is not null then
+        insert into public.scan_keys (idempotency_key, badge_id, "timestamp")
+        values (p_key, p_badge_id, p_ts)
+        on conflict (idempotency_key) do nothing;
+        if not found then
+            return -1;
+        end if;
+    end if;
+
+    insert into public.scanlog (badge_id, "timestamp", idempotency_key)
+    values (p_badge_id, p_ts, p_key);
+
+    select * into a from public.attendees where badge_id = p_badge_id for update;
+    if not found then
+        return null;
+    end if;
+
+    slot := case
+        when a.scan1  is null then 1
+        when a.scan2  is null then 2
+        when a.scan3  is null then 3
+        when a.scan4  is null then 4
+        when a.scan5  is null then 5
+        when a.scan6  is null then 6
+        when a.scan7  is null then 7
+        when a.scan8  is null then 8
+        when a.scan9  is null then 9
+        when a.scan10 is null then 10
+        else 0
+    end;
+    if slot = 0 then
+        return 0;
+    end if;
+
+    execute format('update public.attendees set scan%s = $1 where badge_id = $2', slot)
+        using p_ts, p_badge_id;
+    return slot;
+end;
+$$;
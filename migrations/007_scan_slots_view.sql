@@ -0,0 +1,99 @@
+-- 007_scan_slots_view.sql
+-- Scan slots derived from scanlog instead of stored in attendees.scan1..scan10.
+--
+-- Slot timestamps that never reached scanlog (scans from before it existed)
+-- are copied in first, then the columns are dropped. attendee_scan_slots
+-- gives the old shape back: one row per attendee with their first ten scans
+-- in time order as scan1..scan10, plus scan_count. log_scan no longer
+-- updates or locks the attendee row, so it is an insert plus two index reads.
+
+do $$
+begin
+    if not exists (select 1 from information_schema.columns
+                   where table_schema = 'public' and table_name = 'attendees'
+                     and column_name = 'scan1') then
+        return;                                   -- already migrated
+    end if;
+
+    insert into public.scanlog (badge_id, "timestamp")
+    select a.badge_id, s.ts::timestamptz
+    from public.attendees a
+    cross join lateral unnest(array[a.scan1, a.scan2, a.scan3, a.scan4, a.scan5,
+                               a.scan6, a.scan7, a.scan8, a.scan9, a.scan10]) as s(ts)
+    where s.ts is not null
+      and not exists (select 1 from public.scanlog l
+                      where l.badge_id = a.badge_id and l."timestamp" = s.ts::timestamptz);
+
+    alter table public.attendees
+        drop column scan1,
+        drop column scan2,
+        drop column scan3,
+        drop column scan4,
+        drop column scan5,
+        drop column scan6,
+        drop column scan7,
+        drop column scan8,
+        drop column scan9,
+        drop column scan10;
+end;
+$$;
+
+create or replace view public.attendee_scan_slots as
+select a.badge_id, a.name, a.email,
+       s.scans[1] as scan1,
+       s.scans[2] as scan2,
+       s.scans[3] as scan3,
+       s.scans[4] as scan4,
+       s.scans[5] as scan5,
+       s.scans[6] as scan6,
+       s.scans[7] as scan7,
+       s.scans[8] as scan8,
+       s.scans[9] as scan9,
+       s.scans[10] as scan10,
+       s.n as scan_count
+from public.attendees a
+cross join lateral (
+    select array_agg(l."timestamp" order by l."timestamp", l.id) as scans, count(*) as n
+    from public.scanlog l
+    where l.badge_id = a.badge_id
+) s;
+
+-- Same contract as before: the slot is this scan's place among the badge's
+-- scans in time order, 0 past the tenth. Scans of one badge are serialized
+-- on an advisory lock so two kiosks cannot both be told the same slot.
+create or replace function public.log_scan(p_badge_id integer, p_ts timestamptz,
+                                           p_key text default null)
+returns integer
+language plpgsql
+as $$
+declare
+    slot integer;
+begin
+    perform pg_advisory_xact_lock(hashtext('public.log_scan'), p_badge_id);
+
+    if exists (select 1 from public.scanlog
+               where badge_id = p_badge_id and "timestamp" = p_ts) then
+        return -1;
+    end if;
+
+    if p_key is not null then
+        insert into public.scan_keys (idempotency_key, badge_id, "timestamp")
+        values (p_key, p_badge_id, p_ts)
+        on conflict (idempotency_key) do nothing;
+        if not found then
+            return -1;
+        end if;
+    end if;
+
+    insert into public.scanlog (badge_id, "timestamp", idempotency_key)
+    values (p_badge_id, p_ts, p_key);
+
+    if not exists (select 1 from public.attendees where badge_id = p_badge_id) then
+        return null;
+    end if;
+
+    select count(*) into slot from public.scanlog
+    where badge_id = p_badge_id and "timestamp" <= p_ts;
+    return case when slot <= 10 then slot else 0 end;
+end;
+$$;
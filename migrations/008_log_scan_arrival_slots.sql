@@ -0,0 +1,44 @@
+-- 008_log_scan_arrival_slots.sql
+-- 007 told each scan its place among the badge's scans by timestamp. Kiosk
+-- clocks differ and requests overtake each other, so a scan stamped earlier
+-- can reach the server later: both were then counted as the same slot
+-- (e.g. two kiosks told "slot 3"). The slot is now the scan's place in
+-- arrival order, taken under the per-badge advisory lock, so every scan of a
+-- badge gets a different one, as with the scanN columns before 007.
+-- attendee_scan_slots still lists scan1..scan10 in time order.
+
+create or replace function public.log_scan(p_badge_id integer, p_ts timestamptz,
+                                           p_key text default null)
+returns integer
+language plpgsql
+as $$
+declare
+    slot integer;
+begin
+    perform pg_advisory_xact_lock(hashtext('public.log_scan'), p_badge_id);
+
+    if exists (select 1 from public.scanlog
+               where badge_id = p_badge_id and "timestamp" = p_ts) then
+        return -1;
+    end if;
+
+    if p_key is not null then
+        insert into public.scan_keys (idempotency_key, badge_id, "timestamp")
+        values (p_key, p_badge_id, p_ts)
+        on conflict (idempotency_key) do nothing;
+        if not found then
+            return -1;
+        end if;
+    end if;
+
+    insert into public.scanlog (badge_id, "timestamp", idempotency_key)
+    values (p_badge_id, p_ts, p_key);
+
+    if not exists (select 1 from public.attendees where badge_id = p_badge_id) then
+        return null;
+    end if;
+
+    select count(*) into slot from public.scanlog where badge_id = p_badge_id;
+    return case when slot <= 10 then slot else 0 end;
+end;
+$$;
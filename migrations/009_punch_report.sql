@@ -0,0 +1,59 @@
+-- 009_punch_report.sql
+-- The admin Daily Punch Report as one paged query: first and last scan per
+-- badge and local day (read in p_tz), by day then badge. The time and badge
+-- ranges filter scanlog before grouping; the name/email search and "missed
+-- check-out only" (first and last scan in the same second) filter the
+-- grouped rows. total is the number of matching report rows, repeated on
+-- every row of the page.
+--
+-- A plain SQL function, so the planner inlines it with the caller's values:
+-- unused filters fold away and a one-day range is pruned to its partition.
+
+create or replace function public.punch_report(
+    p_tz          text,
+    p_start       timestamptz default null,
+    p_end         timestamptz default null,
+    p_badge_min   integer     default null,
+    p_badge_max   integer     default null,
+    p_term        text        default '',
+    p_missed_only boolean     default false,
+    p_offset      integer     default 0,
+    p_limit       integer     default 50
+)
+returns table (badge_id integer, name text, email text, day text,
+               check_in text, check_out text, total bigint)
+language sql
+stable
+as $$
+    with punches as (
+        select s.badge_id,
+               (s."timestamp" at time zone p_tz)::date as day,
+               min(s."timestamp") at time zone p_tz    as first_scan,
+               max(s."timestamp") at time zone p_tz    as last_scan
+        from public.scanlog s
+        where (p_start is null or s."timestamp" >= p_start)
+          and (p_end is null or s."timestamp" < p_end)
+          and (p_badge_min is null or s.badge_id >= p_badge_min)
+          and (p_badge_max is null or s.badge_id <= p_badge_max)
+        group by 1, 2
+    ), report as (
+        select p.badge_id, p.day,
+               coalesce(a.name, '<unknown>')       as name,
+               coalesce(a.email, '')               as email,
+               to_char(p.first_scan, 'HH24:MI:SS') as check_in,
+               to_char(p.last_scan, 'HH24:MI:SS')  as check_out
+        from punches p
+        left join public.attendees a on a.badge_id = p.badge_id
+        cross join (select '%' || replace(replace(replace(coalesce(p_term, ''),
+                               '\', '\\'), '%', '\%'), '_', '\_') || '%' as pattern) q
+        where coalesce(p_term, '') = ''
+           or a.name ilike q.pattern
+           or a.email ilike q.pattern
+    )
+    select r.badge_id, r.name, r.email, to_char(r.day, 'YYYY-MM-DD'),
+           r.check_in, r.check_out, count(*) over ()
+    from report r
+    where not p_missed_only or r.check_in = r.check_out
+    order by r.day, r.badge_id
+    offset p_offset limit p_limit;
+$$;
@@ -0,0 +1,154 @@
+# # occupancy.py
+"""
+Live room occupancy from the scan stream.
+
+Running aggregates are kept per (day, badge): first scan, last scan and the
+number of scans, the same first → last reading presence_intervals() uses. A
+badge with a single scan that day has checked in without checking out and
+counts as in the building from then on. Each new scan only touches its own
+badge's entry and that day's blocks, so a refresh costs O(new scans)
+whatever the size of the log.
+"""
+import datetime
+import threading
+from collections import defaultdict
+
+from conference import conference_sessions
+from database import LOCAL_TZ
+from scan_store import RESYNC_WINDOW
+
+PAGE_SIZE = 1000
+
+
+def _wall_clock(ts) -> datetime.datetime:
+    # same reading as scan_store.parse_timestamps: offsets converted to LOCAL_TZ
+    if isinstance(ts, str):
+        ts = datetime.datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(LOCAL_TZ)
+    return ts.replace(tzinfo=None)
+
+
+def _blocks(blocks: list[dict]) -> list[dict]:
+    out = []
+    for i, b in enumerate(blocks):
+        start = datetime.datetime.fromisoformat(b["start"])
+        out.append({"index": i, "title": b["title"], "start": start,
+                    "end": datetime.datetime.fromisoformat(b["end"])})
+    return sorted(out, key=lambda b: b["start"])
+
+
+class Occupancy:
+    def __init__(self, fetch_after, blocks: list[dict] = conference_sessions):
+        """fetch_after(last_id, limit) returns scanlog rows with id > last_id, by id."""
+        self._fetch_after = fetch_after
+        self._lock    = threading.Lock()
+        self.blocks   = _blocks(blocks)
+        self._by_day  = defaultdict(list)          # day → its blocks
+        for b in self.blocks:
+            self._by_day[b["start"].date()].append(b)
+        self.last_id  = 0
+        self._applied = set()                       # ids within RESYNC_WINDOW of last_id
+        self._span    = {}                          # (day, badge) → [first, last, count]
+        self._present = defaultdict(set)            # block index → badges in the room
+        self._open    = defaultdict(set)            # day → badges with a single scan
+        self._seen    = defaultdict(set)            # day → badges with any scan
+
+    # ─── Updating ─────────────────────────────────────────────────────────
+    def apply(self, rows: list[dict]) -> int:
+        """
+        Fold scanlog rows (id, badge_id, timestamp) into the aggregates; rows
+        already applied are skipped. Returns how many were new.
+        """
+        n = 0
+        with self._lock:
+            for r in rows:
+                rid = int(r["id"])
+                if rid in self._applied or rid <= self.last_id - RESYNC_WINDOW:
+                    continue
+                self._apply_one(int(r["badge_id"]), _wall_clock(r["timestamp"]))
+                self._applied.add(rid)
+                self.last_id = max(self.last_id, rid)
+                n += 1
+            if len(self._applied) > 2 * RESYNC_WINDOW:
+                floor = self.last_id - RESYNC_WINDOW
+                self._applied = {i for i in self._applied if i > floor}
+        return n
+
+    def _apply_one(self, badge: int, ts: datetime.datetime):
+        day = ts.date()
+        span = self._span.get((day, badge))
+        if span is None:
+            span = self._span[(day, badge)] = [ts, ts, 1]
+        else:
+            span[0], span[1], span[2] = min(span[0], ts), max(span[1], ts), span[2] + 1
+        self._seen[day].add(badge)
+        if span[2] == 1:
+            self._open[day].add(badge)
+        else:
+            self._open[day].discard(badge)
+
+        first, last, count = span
+        for b in self._by_day.get(day, ()):
+            inside = first < b["end"] and (count == 1 or last > b["start"])
+            if inside:
+                self._present[b["index"]].add(badge)
+            else:
+                self._present[b["index"]].discard(badge)
+
+    def poll(self) -> int:
+        """
+        Fetch and apply every scan not seen yet. The fetch starts
+        RESYNC_WINDOW ids early to pick up rows committed out of id order.
+        """
+        n = 0
+        cursor = max(0, self.last_id - RESYNC_WINDOW)
+        while True:
+            rows = self._fetch_after(cursor, PAGE_SIZE)
+            if not rows:
+                return n
+            n += self.apply(rows)
+            if len(rows) < PAGE_SIZE:
+                return n
+            cursor = rows[-1]["id"]
+
+    # ─── Reading ──────────────────────────────────────────────────────────
+    def current_block(self, now: datetime.datetime) -> dict | None:
+        """The block in progress at `now` (start <= now < end), else None."""
+        for b in self._by_day.get(now.date(), ()):
+            if b["start"] <= now < b["end"]:
+                return b
+        return None
+
+    def next_block(self, now: datetime.datetime) -> dict | None:
+        """The first block still to start today after `now`, else None."""
+        for b in self._by_day.get(now.date(), ()):
+            if now < b["start"]:
+                return b
+        return None
+
+    def session_counts(self, roster_size: int) -> list[dict]:
+        """Present/absent per conference block."""
+        with self._lock:
+            return [{"session": b["title"], "start": b["start"], "end": b["end"],
+                     "present": len(self._present[b["index"]]),
+                     "absent": max(roster_size - len(self._present[b["index"]]), 0)}
+                    for b in self.blocks]
+
+    def day_counts(self, roster_size: int) -> list[dict]:
+        """Per day: checked in, still open (no checkout yet), absent."""
+        with self._lock:
+            return [{"day": day, "checked_in": len(self._seen[day]),
+                     "no_checkout": len(self._open[day]),
+                     "absent": max(roster_size - len(self._seen[day]), 0)}
+                    for day in sorted(self._seen)]
+
+    def present(self, block_index: int) -> set[int]:
+        with self._lock:
+            return set(self._present[block_index])
+
+    def no_checkout(self, day: datetime.date) -> list[tuple[int, datetime.datetime]]:
+        """(badge, check-in time) for badges scanned once on `day`, by check-in."""
+        with self._lock:
+            return sorted(((b, self._span[(day, b)][0]) for b in self._open[day]),
+                          key=lambda x: x[1])
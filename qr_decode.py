@@ -0,0 +1,103 @@
+# # qr_decode.py
+"""
+QR decoding for camera frames.
+
+Frames are decoded straight to grayscale, tried first at a reduced size,
+then at full resolution around the region the detector located, and only
+then over the whole full-size frame. One detector is reused per thread and
+every call's latency is recorded for decode_stats().
+"""
+import threading
+import time
+from collections import deque, namedtuple
+
+import cv2
+import numpy as np
+
+import metrics
+
+MAX_SIDE   = 640       # long side of the first, downscaled attempt
+ROI_MARGIN = 0.25      # padding around the located code, as a share of its size
+
+DecodeResult = namedtuple("DecodeResult", ["data", "stage", "ms"])
+
+_local = threading.local()
+_latencies = deque(maxlen=1000)        # (ms, decoded?)
+_stats_lock = threading.Lock()
+
+
+def _detector() -> cv2.QRCodeDetector:
+    # QRCodeDetector is not thread-safe, so each thread keeps its own
+    det = getattr(_local, "detector", None)
+    if det is None:
+        det = _local.detector = cv2.QRCodeDetector()
+    return det
+
+
+def _roi(gray: np.ndarray, points: np.ndarray, scale: float) -> np.ndarray:
+    """Full-resolution crop around points found in the downscaled frame."""
+    pts = points.reshape(-1, 2) / scale
+    x0, y0 = pts.min(axis=0)
+    x1, y1 = pts.max(axis=0)
+    pad_x, pad_y = (x1 - x0) * ROI_MARGIN, (y1 - y0) * ROI_MARGIN
+    h, w = gray.shape
+    x0, y0 = max(int(x0 - pad_x), 0), max(int(y0 - pad_y), 0)
+    x1, y1 = min(int(x1 + pad_x) + 1, w), min(int(y1 + pad_y) + 1, h)
+    return gray[y0:y1, x0:x1]
+
+
+def decode_gray(gray: np.ndarray) -> DecodeResult:
+    """Decode a grayscale frame: downscaled → ROI at full res → full frame."""
+    t0 = time.perf_counter()
+    det = _detector()
+    data, stage = "", "none"
+
+    h, w = gray.shape[:2]
+    scale = MAX_SIDE / max(h, w)
+    if scale < 1:
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        data, points, _ = det.detectAndDecode(small)
+        if data:
+            stage = "downscaled"
+        elif points is not None:
+            crop = _roi(gray, points, scale)
+            if crop.size:
+                data, _, _ = det.detectAndDecode(crop)
+                stage = "roi" if data else stage
+    if not data:
+        data, _, _ = det.detectAndDecode(gray)
+        stage = "full" if data else "none"
+
+    ms = (time.perf_counter() - t0) * 1000
+    with _stats_lock:
+        _latencies.append((ms, bool(data)))
+    return DecodeResult(data.strip() if data else "", stage, ms)
+
+
+def decode_qr(image_bytes: bytes) -> DecodeResult:
+    """Decode an encoded image (JPEG/PNG bytes) without an RGB round trip."""
+    t0 = time.perf_counter()
+    gray = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        metrics.incr("qr_decode_total", "unreadable")
+        return DecodeResult("", "unreadable", (time.perf_counter() - t0) * 1000)
+    res = decode_gray(gray)
+    ms = (time.perf_counter() - t0) * 1000
+    metrics.observe("qr.decode", ms / 1000)
+    metrics.incr("qr_decode_total", res.stage)
+    return res._replace(ms=ms)
+
+
+def decode_stats() -> dict:
+    """Success rate and p50/p95 latency over the most recent decodes."""
+    with _stats_lock:
+        samples = list(_latencies)
+    if not samples:
+        return {"frames": 0, "success_rate": 0.0, "p50_ms": 0.0, "p95_ms": 0.0}
+    ms = np.array([s[0] for s in samples])
+    return {
+        "frames":       len(samples),
+        "success_rate": sum(s[1] for s in samples) / len(samples),
+        "p50_ms":       float(np.percentile(ms, 50)),
+        "p95_ms":       float(np.percentile(ms, 95)),
+    }
@@ -0,0 +1,140 @@
+# # reports.py
+"""
+Attendance reports built from the columnar scan log.
+
+Every function takes the scan frame from database.get_scan_frame()
+(badge_id int64, timestamp datetime64) plus the attendee list, and works on
+whole columns: one sort, one groupby/pivot, one vectorized string format.
+"""
+import numpy as np
+import pandas as pd
+
+from metrics import timed
+
+MAX_SCANS = 10
+
+
+# ─── Helpers ─────────────────────────────────────────────────────────────────
+def _iso_seconds(ts: pd.Series) -> np.ndarray:
+    """datetime64 column → fixed-width 'YYYY-MM-DDTHH:MM:SS' (<U19) array."""
+    return np.datetime_as_string(ts.to_numpy(dtype="datetime64[s]"), unit="s") \
+             .astype("<U19")
+
+
+def format_timestamps(ts: pd.Series) -> np.ndarray:
+    """datetime64 column → 'YYYY-MM-DD HH:MM:SS' strings."""
+    if len(ts) == 0:
+        return np.empty(0, dtype=object)        # np.char.replace rejects zero-size input
+    return np.char.replace(_iso_seconds(ts), "T", " ").astype(object)
+
+
+def format_dates(ts: pd.Series) -> np.ndarray:
+    """datetime64 column → 'YYYY-MM-DD' strings."""
+    return np.datetime_as_string(ts.to_numpy(dtype="datetime64[D]"), unit="D") \
+             .astype(object)
+
+
+def format_clock(ts: pd.Series) -> np.ndarray:
+    """datetime64 column → 'HH:MM:SS' strings."""
+    # slice characters 11..19 out of every fixed-width string at once
+    chars = _iso_seconds(ts).view("<U1").reshape(-1, 19)[:, 11:]
+    return np.ascontiguousarray(chars).view("<U8").ravel().astype(object)
+
+
+def punch_page_frame(rows: list[dict]) -> pd.DataFrame:
+    """
+    Rows of database.query_punch_report (grouped in the backend) → the
+    columns punch_report() returns.
+    """
+    return pd.DataFrame({
+        "Badge ID":  pd.Series([r["badge_id"] for r in rows], dtype="int64"),
+        "Name":      pd.Series([r["name"] for r in rows], dtype=object),
+        "Email":     pd.Series([r["email"] for r in rows], dtype=object),
+        "Date":      pd.Series([r["day"] for r in rows], dtype=object),
+        "Check‑In":  pd.Series([r["check_in"] for r in rows], dtype=object),
+        "Check‑Out": pd.Series([r["check_out"] for r in rows], dtype=object),
+    })
+
+
+def attendee_frame(attendees: list[dict]) -> pd.DataFrame:
+    """Attendee dicts → frame with int badge_id, name and email columns."""
+    df = pd.DataFrame(attendees, columns=["badge_id", "name", "email"])
+    df["badge_id"] = df["badge_id"].astype("int64")
+    return df
+
+
+def _with_info(df: pd.DataFrame, attendees: list[dict],
+               missing_name, missing_email: str = "") -> pd.DataFrame:
+    """Left-join name/email by badge_id, filling badges with no registration."""
+    info = attendee_frame(attendees).drop_duplicates("badge_id")
+    out = df.merge(info, on="badge_id", how="left", indicator=True)
+    known = (out.pop("_merge") == "both").to_numpy()
+    if callable(missing_name):
+        missing_name = missing_name(out["badge_id"])
+    out["name"]  = np.where(known, out["name"].to_numpy(dtype=object), missing_name)
+    out["email"] = np.where(known, out["email"].to_numpy(dtype=object), missing_email)
+    return out
+
+
+# ─── Reports ─────────────────────────────────────────────────────────────────
+@timed("reports.punch_report")
+def punch_report(scans: pd.DataFrame, attendees: list[dict]) -> pd.DataFrame:
+    """One row per (badge, day) with the first and last scan times."""
+    days = scans["timestamp"].dt.normalize()
+    g = scans.groupby([scans["badge_id"], days.rename("day")])["timestamp"] \
+             .agg(["min", "max"]) \
+             .reset_index()
+    g = _with_info(g, attendees, "<unknown>")
+
+    df = pd.DataFrame({
+        "Badge ID":  g["badge_id"].to_numpy(dtype="int64"),
+        "Name":      g["name"].to_numpy(dtype=object),
+        "Email":     g["email"].to_numpy(dtype=object),
+        "Date":      format_dates(g["day"]),
+        "Check‑In":  format_clock(g["min"]),
+        "Check‑Out": format_clock(g["max"]),
+    })
+    return df.sort_values(["Date", "Badge ID"]).reset_index(drop=True)
+
+
+@timed("reports.flattened_log")
+def flattened_log(scans: pd.DataFrame, attendees: list[dict],
+                  max_scans: int = MAX_SCANS) -> pd.DataFrame:
+    """One row per scanned badge with its first max_scans scans as columns."""
+    cols = [f"Scan {i}" for i in range(1, max_scans + 1)]
+    ordered = scans.sort_values(["badge_id", "timestamp"], kind="stable")
+    rank = ordered.groupby("badge_id").cumcount()
+    kept = ordered[rank < max_scans]
+
+    wide = pd.DataFrame({
+        "badge_id": kept["badge_id"].to_numpy(),
+        "col":      np.asarray(cols, dtype=object)[rank[rank < max_scans].to_numpy()],
+        "value":    format_timestamps(kept["timestamp"]),
+    }).pivot(index="badge_id", columns="col", values="value") \
+      .reindex(columns=cols) \
+      .fillna("") \
+      .reset_index()
+    wide.columns.name = None
+
+    wide = _with_info(wide, attendees, lambda b: "<unregistered " + b.astype(str) + ">")
+    return wide.rename(columns={"badge_id": "Badge ID", "name": "Name", "email": "Email"}) \
+               [["Badge ID", "Name", "Email", *cols]] \
+               .astype({c: object for c in cols})
+
+
+@timed("reports.all_scans_table")
+def all_scans_table(scans: pd.DataFrame, attendees: list[dict]) -> pd.DataFrame:
+    """Every registered attendee with all of their scans joined in one cell."""
+    ordered = scans.sort_values(["badge_id", "timestamp"], kind="stable")
+    joined = pd.Series(format_timestamps(ordered["timestamp"]),
+                       index=ordered["badge_id"].to_numpy()) \
+               .groupby(level=0).agg(", ".join)
+
+    people = attendee_frame(attendees)
+    return pd.DataFrame({
+        "Badge ID":  people["badge_id"].to_numpy(),
+        "Name":      people["name"].to_numpy(dtype=object),
+        "Email":     people["email"].to_numpy(dtype=object),
+        "All Scans": joined.reindex(people["badge_id"]).fillna("").to_numpy(dtype=object),
+    })
+
@@ -0,0 +1,189 @@
+# # scan_queue.py
+"""
+Durable write-behind queue for badge scans.
+
+Scans are appended to a local SQLite journal and acknowledged straight away;
+a background thread drains the journal in batches through a flush callback.
+A row is only marked flushed after the callback returns, so a dropped network
+leaves it queued for the next attempt instead of losing it.
+
+A row the server rejects would fail every batch it is in and hold the whole
+queue back. Once a batch has failed MAX_ATTEMPTS times its oldest row is
+sent alone: if that fails while the rest of the batch goes through, the row
+is set aside as failed (kept in the journal with its error) and the queue
+moves on. If both fail the server is unreachable and nothing is set aside.
+"""
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+QUEUE_PATH      = os.getenv("SCAN_QUEUE_PATH", "scan_queue.db")
+FLUSH_BATCH     = int(os.getenv("SCAN_QUEUE_BATCH", "200"))
+FLUSH_INTERVAL  = float(os.getenv("SCAN_QUEUE_INTERVAL", "1.0"))
+MAX_ATTEMPTS    = int(os.getenv("SCAN_QUEUE_MAX_ATTEMPTS", "5"))
+RETAIN_SECONDS  = 24 * 3600      # keep flushed rows a day for auditing
+
+
+class ScanQueue:
+    def __init__(self, flush_fn, path: str = QUEUE_PATH,
+                 batch_size: int = FLUSH_BATCH, interval: float = FLUSH_INTERVAL,
+                 max_attempts: int = MAX_ATTEMPTS):
+        """
+        flush_fn receives a list of event dicts
+        ({id, badge_id, timestamp, station, attempts}) and must raise on failure.
+        """
+        self._flush_fn   = flush_fn
+        self._batch_size = batch_size
+        self._interval   = interval
+        self._max_tries  = max_attempts
+        self._lock       = threading.Lock()
+        self._wake       = threading.Event()
+        self._thread     = None
+
+        self.last_flush_at = None
+        self.last_error    = None
+
+        self._conn = sqlite3.connect(path, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS scans (
+                id         TEXT PRIMARY KEY,
+                badge_id   INTEGER NOT NULL,
+                timestamp  TEXT    NOT NULL,
+                station    TEXT,
+                queued_at  REAL    NOT NULL,
+                attempts   INTEGER NOT NULL DEFAULT 0,
+                flushed_at REAL,
+                failed_at  REAL,
+                error      TEXT
+            )""")
+        # journals from older versions lack the later columns
+        have = {r[1] for r in self._conn.execute("PRAGMA table_info(scans)")}
+        for col, decl in (("station", "TEXT"), ("failed_at", "REAL"), ("error", "TEXT")):
+            if col not in have:
+                self._conn.execute(f"ALTER TABLE scans ADD COLUMN {col} {decl}")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS scans_pending "
+            "ON scans (flushed_at, queued_at)")
+
+    # ─── Producer side ────────────────────────────────────────────────────
+    def put(self, badge_id: int, timestamp: str, station: str | None = None) -> str:
+        """Append one scan (taken at `station`) to the journal and return its event id."""
+        event_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO scans (id, badge_id, timestamp, station, queued_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (event_id, int(badge_id), timestamp, station, time.time()))
+        self._wake.set()
+        return event_id
+
+    # ─── Consumer side ────────────────────────────────────────────────────
+    def flush_once(self) -> int:
+        """Send one batch through flush_fn; return how many were flushed."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, badge_id, timestamp, station, attempts FROM scans "
+                "WHERE flushed_at IS NULL AND failed_at IS NULL "
+                "ORDER BY queued_at LIMIT ?",
+                (self._batch_size,)).fetchall()
+            if not rows:
+                return 0
+            ids = [r[0] for r in rows]
+            marks = ",".join("?" * len(ids))
+            self._conn.execute(
+                f"UPDATE scans SET attempts = attempts + 1 WHERE id IN ({marks})",
+                ids)
+
+        events = [
+            {"id": r[0], "badge_id": r[1], "timestamp": r[2], "station": r[3],
+             "attempts": r[4] + 1}
+            for r in rows
+        ]
+        try:
+            self._flush_fn(events)
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            if len(events) > 1 and events[0]["attempts"] >= self._max_tries:
+                return self._isolate(events)
+            return 0
+
+        self._mark_flushed(ids)
+        return len(events)
+
+    def _isolate(self, events: list[dict]) -> int:
+        """Retry the oldest event alone and the rest without it; see the module doc."""
+        head, rest = events[:1], events[1:]
+        try:
+            self._flush_fn(head)
+            self._mark_flushed([head[0]["id"]])
+            return 1
+        except Exception as e:
+            head_error = f"{type(e).__name__}: {e}"
+        try:
+            self._flush_fn(rest)
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            return 0
+        with self._lock:
+            self._conn.execute(
+                "UPDATE scans SET failed_at = ?, error = ? WHERE id = ?",
+                (time.time(), head_error, head[0]["id"]))
+        self._mark_flushed([e["id"] for e in rest])
+        return len(rest)
+
+    def _mark_flushed(self, ids: list[str]):
+        now = time.time()
+        marks = ",".join("?" * len(ids))
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE scans SET flushed_at = ? WHERE id IN ({marks})",
+                [now, *ids])
+            self._conn.execute(
+                "DELETE FROM scans WHERE flushed_at < ?", (now - RETAIN_SECONDS,))
+        self.last_flush_at = now
+        self.last_error    = None
+
+    def flush(self) -> int:
+        """Drain the journal until empty or a batch fails."""
+        total = 0
+        while True:
+            n = self.flush_once()
+            if not n:
+                return total
+            total += n
+
+    def start(self):
+        """Start the background flusher thread (idempotent)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="scan-flusher",
+                                        daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self._interval)
+            self._wake.clear()
+            self.flush()
+
+    # ─── Introspection ────────────────────────────────────────────────────
+    def stats(self) -> dict:
+        """Queue depth, age of the oldest pending scan, set-aside rows and last flush status."""
+        with self._lock:
+            depth, oldest = self._conn.execute(
+                "SELECT COUNT(*), MIN(queued_at) FROM scans "
+                "WHERE flushed_at IS NULL AND failed_at IS NULL").fetchone()
+            failed, = self._conn.execute(
+                "SELECT COUNT(*) FROM scans WHERE failed_at IS NOT NULL").fetchone()
+        return {
+            "depth":         depth,
+            "failed":        failed,
+            "lag_seconds":   (time.time() - oldest) if oldest else 0.0,
+            "last_flush_at": self.last_flush_at,
+            "last_error":    self.last_error,
+        }
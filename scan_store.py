@@ -0,0 +1,139 @@
+# # scan_store.py
+"""
+Local columnar copy of the scanlog table, kept current by delta fetches.
+
+Each sync requests the rows above the highest id already held, starting
+RESYNC_WINDOW ids early: ids come from a sequence at insert time but become
+visible at commit, so under concurrent kiosks a lower id can appear after a
+higher one was read. Rows not held yet are appended to a pandas frame
+(optionally persisted as Parquet) that every report reads from.
+"""
+import os
+import threading
+import time
+import pandas as pd
+
+from database import LOCAL_TZ
+
+STORE_PATH        = os.getenv("SCAN_STORE_PATH")          # e.g. scanlog.parquet
+SYNC_MIN_INTERVAL = float(os.getenv("SCAN_SYNC_INTERVAL", "2.0"))
+PAGE_SIZE         = 1000     # PostgREST's default max-rows
+RESYNC_WINDOW     = 500      # ids re-read below the highest one held
+
+COLUMNS = ["id", "badge_id", "timestamp"]
+
+_OFFSET = r"(?:Z|[+-]\d{2}:?\d{2})$"
+
+
+def parse_timestamps(values) -> pd.Series:
+    """
+    ISO strings → naive datetime64 in local (LOCAL_TZ) wall-clock time.
+    Values with an offset are converted, so a UTC '...Z' timestamp lands on
+    the same local time as its '-05:00' twin; values without one are taken
+    as local already.
+    """
+    s = pd.Series(values, dtype="string")
+    aware = s.str.contains(_OFFSET, regex=True).fillna(False).to_numpy(dtype=bool)
+    out = pd.to_datetime(s.where(~aware), format="ISO8601").astype("datetime64[ns]")
+    if aware.any():
+        local = pd.to_datetime(s[aware], utc=True, format="ISO8601") \
+                  .dt.tz_convert(LOCAL_TZ) \
+                  .dt.tz_localize(None)
+        out[aware] = local.astype("datetime64[ns]")
+    return out
+
+
+def scan_frame(rows: list[dict]) -> pd.DataFrame:
+    """scanlog rows (id, badge_id, ISO timestamp) → frame with COLUMNS."""
+    return pd.DataFrame({
+        "id":        pd.Series([r["id"] for r in rows], dtype="int64"),
+        "badge_id":  pd.Series([r["badge_id"] for r in rows], dtype="int64"),
+        "timestamp": parse_timestamps([r["timestamp"] for r in rows]),
+    })
+
+
+def _empty_frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "id":        pd.Series(dtype="int64"),
+        "badge_id":  pd.Series(dtype="int64"),
+        "timestamp": pd.Series(dtype="datetime64[ns]"),
+    })
+
+
+class ScanStore:
+    def __init__(self, fetch_after, path: str | None = STORE_PATH,
+                 min_interval: float = SYNC_MIN_INTERVAL):
+        """fetch_after(last_id, limit) returns scanlog rows with id > last_id, by id."""
+        self._fetch_after  = fetch_after
+        self._path         = path
+        self._min_interval = min_interval
+        self._lock         = threading.Lock()
+        self._synced_at    = None
+        self.frame         = self._load()
+
+    def _load(self) -> pd.DataFrame:
+        if self._path and os.path.exists(self._path):
+            try:
+                return pd.read_parquet(self._path)[COLUMNS]
+            except ImportError:
+                pass
+        return _empty_frame()
+
+    def _save(self):
+        if not self._path:
+            return
+        try:
+            self.frame.to_parquet(self._path, index=False)
+        except ImportError:
+            pass        # no pyarrow/fastparquet — keep the copy in memory only
+
+    @property
+    def last_id(self) -> int:
+        return int(self.frame["id"].max()) if len(self.frame) else 0
+
+    def sync(self, force: bool = False) -> int:
+        """
+        Pull rows not held yet (including late commits within RESYNC_WINDOW
+        of the highest id); returns how many arrived.
+        Calls within min_interval of the previous sync are skipped so one page
+        render costs at most one delta fetch.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (not force and self._synced_at is not None
+                    and now - self._synced_at < self._min_interval):
+                return 0
+
+            start = max(0, self.last_id - RESYNC_WINDOW)
+            new_rows = []
+            cursor = start
+            while True:
+                page = self._fetch_after(cursor, PAGE_SIZE)
+                new_rows.extend(page)
+                if len(page) < PAGE_SIZE:
+                    break
+                cursor = page[-1]["id"]
+            self._synced_at = now
+
+            if not new_rows:
+                return 0
+            delta = scan_frame(new_rows)
+            ids = self.frame["id"].to_numpy()
+            held = ids[ids.searchsorted(start, side="right"):]          # frame is sorted by id
+            delta = delta[~delta["id"].isin(held)].drop_duplicates("id")
+            if delta.empty:
+                return 0
+            late = len(ids) > 0 and delta["id"].min() < ids[-1]
+            self.frame = pd.concat([self.frame, delta], ignore_index=True)
+            if late:
+                self.frame = self.frame.sort_values("id", kind="stable", ignore_index=True)
+            self._save()
+            return len(delta)
+
+    def reset(self):
+        """Forget the local copy; the next sync refetches everything."""
+        with self._lock:
+            self.frame = _empty_frame()
+            self._synced_at = None
+            if self._path and os.path.exists(self._path):
+                os.remove(self._path)
@@ -0,0 +1,252 @@
+# # stream_scanner.py
+"""
+Hands-free badge scanning from a live video stream.
+
+    python stream_scanner.py 0                 # first camera
+    python stream_scanner.py door.mp4 --dry-run
+
+A capture thread reads frames from cv2.VideoCapture (device index, file or
+stream URL) into a small bounded queue, dropping the oldest frame when the
+decoder falls behind so it always works on the freshest picture. A decode
+thread takes every `decode_every`-th frame, decodes it with
+qr_decode.decode_gray and hands new badges to a callback. The kiosk page
+only redraws the confirmation list; there is no page rerun per badge.
+ScannerPool shares one scanner per source and station between the browser
+sessions using it and stops it when the last of them leaves.
+"""
+import argparse
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from debounce import STATION_ID
+from qr_decode import decode_gray
+
+SOURCE       = os.getenv("SCAN_STREAM_SOURCE", "0")
+QUEUE_FRAMES = 2        # frames buffered between capture and decode
+COOLDOWN     = 3.0      # seconds before the same badge is reported again
+
+
+def _open(source):
+    src = int(source) if str(source).isdigit() else source
+    cap = cv2.VideoCapture(src)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video source {source!r}")
+    return cap
+
+
+class StreamScanner:
+    def __init__(self, source=SOURCE, on_badge=None, decode_every: int = 1,
+                 max_queue: int = QUEUE_FRAMES, cooldown: float = COOLDOWN,
+                 realtime: bool | None = None):
+        """
+        on_badge(badge_text) is called on the decode thread for each new badge
+        and may return a confirmation dict that is kept in `recent`.
+        realtime paces file sources at their own frame rate (default: files only).
+        """
+        self.source        = source
+        self._on_badge     = on_badge or (lambda badge: {})
+        self._decode_every = max(1, decode_every)
+        self._cooldown     = cooldown
+        self._realtime     = realtime
+        self._frames       = queue.Queue(maxsize=max_queue)
+        self._stop         = threading.Event()
+        self._threads      = []
+        self._last_seen    = {}                 # badge → monotonic time
+        self._lock         = threading.Lock()
+
+        self.recent   = deque(maxlen=20)        # newest first
+        self.error    = None
+        self.finished = threading.Event()       # source exhausted
+        self._stats   = {"read": 0, "dropped": 0, "decoded": 0, "badges": 0,
+                         "decode_ms": 0.0, "started_at": None}
+
+    # ─── Lifecycle ────────────────────────────────────────────────────────
+    def start(self):
+        if self._threads:
+            return self
+        self._stop.clear()
+        self._stats["started_at"] = time.monotonic()
+        for target, name in ((self._capture, "scan-capture"), (self._decode, "scan-decode")):
+            t = threading.Thread(target=target, name=name, daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=2)
+        self._threads = []
+
+    @property
+    def running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    # ─── Threads ──────────────────────────────────────────────────────────
+    def _capture(self):
+        try:
+            cap = _open(self.source)
+        except Exception as e:
+            self.error = str(e)
+            self._put_latest(None)
+            return
+        realtime = self._realtime
+        if realtime is None:
+            realtime = not str(self.source).isdigit()
+        delay = 1 / (cap.get(cv2.CAP_PROP_FPS) or 30) if realtime else 0
+        n = 0
+        try:
+            while not self._stop.is_set():
+                t0 = time.monotonic()
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                n += 1
+                self._stats["read"] += 1
+                if n % self._decode_every:
+                    continue
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+                self._put_latest(gray)
+                if delay:
+                    time.sleep(max(0.0, delay - (time.monotonic() - t0)))
+        finally:
+            cap.release()
+            self._put_latest(None)          # wake the decoder so it can finish
+
+    def _put_latest(self, item):
+        """Enqueue, dropping the oldest frame when full so the decoder sees the freshest."""
+        while True:
+            try:
+                self._frames.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._frames.get_nowait()
+                    self._stats["dropped"] += 1
+                except queue.Empty:
+                    pass
+
+    def _decode(self):
+        while not self._stop.is_set():
+            gray = self._frames.get()
+            if gray is None:
+                break
+            res = decode_gray(gray)
+            self._stats["decoded"] += 1
+            self._stats["decode_ms"] += res.ms
+            if res.data:
+                self._handle(res.data)
+        self.finished.set()
+
+    def _handle(self, badge: str):
+        now = time.monotonic()
+        if now - self._last_seen.get(badge, -self._cooldown) < self._cooldown:
+            self._last_seen[badge] = now        # still in front of the camera
+            return
+        self._last_seen[badge] = now
+        try:
+            info = self._on_badge(badge) or {}
+        except Exception as e:
+            info = {"error": str(e)}
+        self._stats["badges"] += 1
+        with self._lock:
+            self.recent.appendleft({"badge": badge, "at": time.time(), **info})
+
+    # ─── Reading ──────────────────────────────────────────────────────────
+    def confirmations(self) -> list[dict]:
+        with self._lock:
+            return list(self.recent)
+
+    def stats(self) -> dict:
+        s = dict(self._stats)
+        elapsed = time.monotonic() - s.pop("started_at") if s["started_at"] else 0.0
+        s["elapsed_s"] = elapsed
+        s["fps_read"]  = s["read"] / elapsed if elapsed else 0.0
+        s["fps_decoded"] = s["decoded"] / elapsed if elapsed else 0.0
+        s["avg_decode_ms"] = s["decode_ms"] / s["decoded"] if s["decoded"] else 0.0
+        return s
+
+
+class ScannerPool:
+    """
+    Running scanners shared by key, reference-counted by their users.
+
+    acquire(key, user) starts the scanner for key on its first user;
+    release(key, user) stops and drops it when its last user lets go,
+    leaving every other key's scanner running.
+    """
+
+    def __init__(self, factory):
+        self._factory  = factory                # key → started StreamScanner
+        self._lock     = threading.Lock()
+        self._scanners = {}                     # key → scanner
+        self._users    = {}                     # key → set of users
+
+    def acquire(self, key, user) -> StreamScanner:
+        with self._lock:
+            if key not in self._scanners:
+                self._scanners[key] = self._factory(key)
+                self._users[key] = set()
+            self._users[key].add(user)
+            return self._scanners[key]
+
+    def release(self, key, user) -> None:
+        with self._lock:
+            users = self._users.get(key)
+            if users is None:
+                return
+            users.discard(user)
+            if users:
+                return
+            del self._users[key]
+            scanner = self._scanners.pop(key)
+        scanner.stop()                          # joins threads; outside the lock
+
+    def users(self, key) -> int:
+        with self._lock:
+            return len(self._users.get(key, ()))
+
+
+def check_in(badge: str, station: str = STATION_ID) -> dict:
+    """on_badge for the kiosk: queue the scan and look the name up in the roster."""
+    from database import get_attendee, log_scan
+    logged = log_scan(badge, station)
+    person = get_attendee(badge)
+    return {"name": person["name"] if person else badge,
+            "known": person is not None, "repeat": logged is None}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Continuous QR scanning from a video source.")
+    ap.add_argument("source", nargs="?", default=SOURCE, help="device index, file or URL")
+    ap.add_argument("--decode-every", type=int, default=1, help="decode every n-th frame")
+    ap.add_argument("--dry-run", action="store_true", help="print badges, do not log scans")
+    args = ap.parse_args()
+
+    def report(badge):
+        info = {} if args.dry_run else check_in(badge)
+        print(f"{time.strftime('%H:%M:%S')}  {badge}  {info.get('name', '')}")
+        return info
+
+    scanner = StreamScanner(args.source, report, decode_every=args.decode_every).start()
+    try:
+        while not scanner.finished.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        pass
+    scanner.stop()
+    if scanner.error:
+        raise SystemExit(scanner.error)
+    s = scanner.stats()
+    print(f"{s['read']} frames read, {s['decoded']} decoded ({s['dropped']} dropped), "
+          f"{s['badges']} badges in {s['elapsed_s']:.1f}s, "
+          f"avg decode {s['avg_decode_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# # tests/test_attendance.py
+"""
+Crediting presence intervals against session blocks.
+
+    python -m unittest tests.test_attendance
+"""
+import unittest
+
+import pandas as pd
+
+from attendance import block_credits, credited_sessions, presence_intervals
+
+BLOCKS = pd.DataFrame({
+    "start": pd.to_datetime(["2025-05-02 08:30", "2025-05-02 10:30", "2025-05-02 13:30"]),
+    "end":   pd.to_datetime(["2025-05-02 10:00", "2025-05-02 12:00", "2025-05-02 15:00"]),
+    "title": ["A", "B", "C"],
+})
+
+
+def _intervals(*rows):
+    return pd.DataFrame([{"badge_id": b, "start": pd.Timestamp(s), "end": pd.Timestamp(e)}
+                         for b, s, e in rows])
+
+
+def _scans(*rows):
+    return pd.DataFrame({"badge_id": [b for b, _ in rows],
+                         "timestamp": pd.to_datetime([t for _, t in rows])})
+
+
+class BlockCreditsTest(unittest.TestCase):
+    def test_overlap_minutes_per_block(self):
+        out = block_credits(_intervals((1, "2025-05-02 08:00", "2025-05-02 11:00")), BLOCKS)
+        self.assertEqual(out["block"].tolist(), [0, 1])
+        self.assertEqual(out["overlap_minutes"].tolist(), [90.0, 30.0])
+        self.assertEqual(out["credited"].tolist(), [True, False])
+
+    def test_fraction_and_minutes_rules(self):
+        iv = _intervals((1, "2025-05-02 08:30", "2025-05-02 09:42"))       # 72 of 90 minutes
+        self.assertTrue(block_credits(iv, BLOCKS, min_fraction=0.8)["credited"].item())
+        self.assertFalse(block_credits(iv, BLOCKS, min_fraction=0.9)["credited"].item())
+        self.assertFalse(block_credits(iv, BLOCKS, min_minutes=75)["credited"].item())
+
+    def test_intervals_touching_no_block(self):
+        iv = _intervals((1, "2025-05-02 12:05", "2025-05-02 13:00"),
+                        (2, "2025-05-02 10:00", "2025-05-02 10:30"))
+        self.assertTrue(block_credits(iv, BLOCKS).empty)
+
+    def test_split_intervals_add_up(self):
+        iv = _intervals((1, "2025-05-02 08:30", "2025-05-02 09:10"),
+                        (1, "2025-05-02 09:20", "2025-05-02 10:00"))
+        out = block_credits(iv, BLOCKS)
+        self.assertEqual((out["overlap_minutes"].item(), out["credited"].item()), (80.0, True))
+
+
+class CreditedSessionsTest(unittest.TestCase):
+    def test_intervals_from_scans(self):
+        scans = _scans((1, "2025-05-02 08:25"), (1, "2025-05-02 12:05"), (1, "2025-05-03 09:00"),
+                       (2, "2025-05-02 13:00"))
+        iv = presence_intervals(scans)
+        self.assertEqual(iv["badge_id"].tolist(), [1, 1, 2])
+        self.assertEqual(iv["end"].tolist()[0], pd.Timestamp("2025-05-02 12:05"))
+
+    def test_multi_block_session_needs_every_block(self):
+        morning = _scans((1, "2025-05-02 13:25"), (1, "2025-05-02 15:05"))
+        whole   = _scans((2, "2025-05-02 13:25"), (2, "2025-05-02 17:05"))
+        earned = credited_sessions(pd.concat([morning, whole], ignore_index=True))
+        titles = {b: [s["title"] for s in got] for b, got in earned.items()}
+        self.assertNotIn("Taking the High Road-Ethical Challenges", titles.get(1, []))
+        self.assertIn("Taking the High Road-Ethical Challenges", titles[2])
+        self.assertEqual(credited_sessions(morning.iloc[:0]), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
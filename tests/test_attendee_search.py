@@ -0,0 +1,56 @@
+# # tests/test_attendee_search.py
+"""
+Search-as-you-type over the in-memory attendee index.
+
+    python -m unittest tests.test_attendee_search
+"""
+import unittest
+
+from attendee_search import AttendeeIndex
+
+ROSTER = [
+    {"badge_id": 1,   "name": "José Álvarez", "email": "jalvarez@example.com"},
+    {"badge_id": 2,   "name": "Joseph Smith", "email": "jsmith@corp.org"},
+    {"badge_id": 12,  "name": "Anna Lee",     "email": "anna.lee@example.com"},
+    {"badge_id": 120, "name": "Mark Twain",   "email": "mt@example.com"},
+]
+
+
+def _badges(index, query):
+    return [r["badge_id"] for r in index.search(query)]
+
+
+class AttendeeIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = AttendeeIndex(ROSTER)
+
+    def test_prefixes_accents_and_case(self):
+        self.assertEqual(_badges(self.index, "jose"), [1, 2])
+        self.assertEqual(_badges(self.index, "ALV"), [1])
+        self.assertEqual(_badges(self.index, "anna lee"), [12])
+        self.assertEqual(_badges(self.index, "corp"), [2])
+
+    def test_badge_id_prefix(self):
+        self.assertEqual(_badges(self.index, "12"), [12, 120])
+
+    def test_typos_fall_back_to_trigrams(self):
+        self.assertIn(2, _badges(self.index, "Jospeh"))
+        self.assertEqual(_badges(self.index, "zzz"), [])
+        self.assertEqual(_badges(self.index, "  "), [])
+
+    def test_limit(self):
+        self.assertEqual(len(self.index.search("example", limit=2)), 2)
+
+    def test_updates_without_rebuild(self):
+        self.index.remove(2)
+        self.assertEqual(_badges(self.index, "smith"), [])
+        self.index.add({"badge_id": 2, "name": "Jo Renamed", "email": "jo@example.com"})
+        self.assertEqual(_badges(self.index, "renamed"), [2])
+        self.index.sync(ROSTER[:2])
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(_badges(self.index, "anna"), [])
+        self.assertEqual(_badges(self.index, "smith"), [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+# # tests/test_backends.py
+"""
+The log_scan contract on the in-memory SQLite backend.
+
+    python -m unittest tests.test_backends
+"""
+import datetime
+import unittest
+from unittest import mock
+
+import database
+from backends import SCAN_SLOTS, SqliteBackend
+from debounce import ScanDebouncer
+
+BADGE = 7
+
+
+def _at(minute: int, tz=datetime.timezone.utc) -> str:
+    return datetime.datetime(2025, 5, 2, 13, minute, tzinfo=tz).isoformat()
+
+
+class SqliteBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.backend = SqliteBackend(":memory:")
+        self.backend.insert_attendees([{"badge_id": BADGE, "name": "Slot Test",
+                                        "email": "slots@example.com"}])
+
+    def test_log_scan_fills_ten_slots_then_keeps_scanning(self):
+        slots = [self.backend.log_scan(BADGE, _at(m), f"k{m}") for m in range(SCAN_SLOTS + 3)]
+        self.assertEqual(slots, [*range(1, SCAN_SLOTS + 1), 0, 0, 0])
+        row, = self.backend.fetch_scan_slots()
+        self.assertEqual(row["scan_count"], SCAN_SLOTS + 3)
+        self.assertEqual(row[f"scan{SCAN_SLOTS}"], self.backend.fetch_scans_after(0, 100)[9]["timestamp"])
+
+    def test_log_scan_repeats_and_unknown_badges(self):
+        self.assertEqual(self.backend.log_scan(BADGE, _at(0), "k0"), 1)
+        self.assertEqual(self.backend.log_scan(BADGE, _at(0), None), -1)      # same instant
+        self.assertEqual(self.backend.log_scan(BADGE, _at(1), "k0"), -1)      # same key
+        self.assertIsNone(self.backend.log_scan(BADGE + 1, _at(2), None))
+        self.assertEqual(len(self.backend.fetch_scans_after(0, 100)), 2)
+
+    def test_log_scans_batch(self):
+        events = [{"badge_id": BADGE, "timestamp": _at(m), "key": f"k{m}"}
+                  for m in reversed(range(SCAN_SLOTS + 1))]
+        results = self.backend.log_scans(events)
+        self.assertEqual([r["slot"] for r in results], [*range(1, SCAN_SLOTS + 1), 0])
+        self.assertEqual([r["slot"] for r in self.backend.log_scans(events)], [-1] * (SCAN_SLOTS + 1))
+
+    def test_scan_times_compare_as_instants(self):
+        chicago = datetime.timezone(datetime.timedelta(hours=-5))
+        self.backend.log_scan(BADGE, _at(30), None)                     # 13:30Z
+        self.backend.log_scan(BADGE, _at(0, chicago), None)             # 18:00Z
+        self.assertEqual(self.backend.log_scan(BADGE, "2025-05-02T18:00:00Z", None), -1)
+        rows, total = self.backend.query_scan_log(_at(0), _at(45), None, None, 0, 10)
+        self.assertEqual((total, rows[0]["timestamp"]), (1, "2025-05-02T13:30:00.000000+00:00"))
+        row, = self.backend.fetch_scan_slots()
+        self.assertLess(row["scan1"], row["scan2"])
+
+    def test_log_scan_now_raises_once_slots_are_full(self):
+        database.set_backend(self.backend)
+        self.addCleanup(database.set_backend, SqliteBackend(":memory:"))
+        with mock.patch.object(database, "_debouncer", ScanDebouncer(window=0)):
+            for m in range(SCAN_SLOTS):
+                self.backend.log_scan(BADGE, _at(m), None)
+            with self.assertRaises(database.ScanSlotsFull):
+                database.log_scan_now(BADGE, "test-station")
+        self.assertIn(BADGE, database.slots_full_badges())
+        with self.assertRaises(ValueError):
+            database.log_scan_now(database.MAX_BADGE_ID + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
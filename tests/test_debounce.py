@@ -0,0 +1,64 @@
+# # tests/test_debounce.py
+"""
+Per-station repeat suppression in ScanDebouncer, and the server-side keys.
+
+    python -m unittest tests.test_debounce
+"""
+import datetime
+import unittest
+from unittest import mock
+
+import database
+from debounce import ScanDebouncer, idempotency_key
+
+
+class ScanDebouncerTest(unittest.TestCase):
+    def test_repeats_inside_the_window_are_dropped(self):
+        d = ScanDebouncer(window=10)
+        self.assertTrue(d.accept(1, "door-1", now=100.0))
+        self.assertFalse(d.accept(1, "door-1", now=109.9))
+        self.assertTrue(d.accept(1, "door-1", now=110.0))
+
+    def test_window_runs_from_the_last_accepted_scan(self):
+        d = ScanDebouncer(window=10)
+        d.accept(1, "door-1", now=0.0)
+        d.accept(1, "door-1", now=8.0)                  # dropped, does not extend the window
+        self.assertTrue(d.accept(1, "door-1", now=10.0))
+
+    def test_badges_and_stations_are_independent(self):
+        d = ScanDebouncer(window=10)
+        self.assertTrue(d.accept(1, "door-1", now=0.0))
+        self.assertTrue(d.accept(2, "door-1", now=1.0))
+        self.assertTrue(d.accept(1, "door-2", now=2.0))
+        self.assertFalse(d.accept("1", "door-1", now=3.0))
+
+    def test_clock_stepped_back_does_not_block_scans(self):
+        d = ScanDebouncer(window=10)
+        d.accept(1, "door-1", now=1000.0)
+        self.assertTrue(d.accept(1, "door-1", now=400.0))
+
+    def test_stale_entries_are_pruned(self):
+        d = ScanDebouncer(window=1)
+        with mock.patch("debounce.PRUNE_AT", 5):
+            for b in range(6):
+                d.accept(b, now=float(b * 10))
+        self.assertEqual(len(d._last), 1)
+
+
+class IdempotencyKeyTest(unittest.TestCase):
+    def test_one_key_per_accepted_scan(self):
+        at = 1_746_190_799.5                            # the scan's own accepted time
+        self.assertEqual(idempotency_key(1, at, "door-1"), idempotency_key(1, at, "door-1"))
+        self.assertNotEqual(idempotency_key(1, at, "door-1"), idempotency_key(1, at, "door-2"))
+        self.assertNotEqual(idempotency_key(1, at, "door-1"), idempotency_key(2, at, "door-1"))
+        # no wall-clock buckets: nearby scans are told apart, not merged by a boundary
+        self.assertNotEqual(idempotency_key(1, at, "door-1"), idempotency_key(1, at + 1, "door-1"))
+
+    def test_queued_scan_keeps_its_key(self):
+        now = datetime.datetime(2025, 5, 2, 8, 59, 59, 123456, tzinfo=database.LOCAL_TZ)
+        self.assertEqual(database._scan_idempotency_key(1, now.isoformat(), "door-1"),
+                         idempotency_key(1, now.timestamp(), "door-1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+# # tests/test_exports.py
+"""
+Export sources read the SQLite backend page by page and still add up to the
+reports built from the whole scan frame.
+
+    python -m unittest tests.test_exports
+"""
+import gzip
+import os
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+import database
+import exports
+import reports
+from backends import SqliteBackend
+from benchmarks.reports import synthetic
+
+
+class ExportChunksTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.attendees, scans = synthetic(1_500, 120, seed=3)
+        backend = SqliteBackend(":memory:")
+        backend.insert_attendees(cls.attendees)
+        local = scans["timestamp"].dt.tz_localize(database.LOCAL_TZ)
+        backend.log_scans([{"badge_id": b, "timestamp": t.isoformat(), "key": None}
+                           for b, t in zip(scans["badge_id"].tolist(), local)])
+        database.set_backend(backend)
+        cls.frame = database.get_scan_frame()
+
+    @classmethod
+    def tearDownClass(cls):
+        database.set_backend(SqliteBackend(":memory:"))
+
+    def test_attendees_with_scans(self):
+        with mock.patch.object(exports, "CHUNK_BADGES", 25):
+            chunks = list(exports.attendees_with_scans_chunks(40))
+        self.assertEqual([len(c) for c in chunks], [25, 25, 25, 25, 20])
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True),
+                                      reports.all_scans_table(self.frame, self.attendees))
+
+    def test_punch_report(self):
+        chunks = list(exports.punch_report_chunks(100))
+        self.assertGreater(len(chunks), 1)
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True),
+                                      reports.punch_report(self.frame, self.attendees))
+
+    def test_build_export_csv_gz(self):
+        path, name, _ = exports.build_export("Daily punch report", "CSV (gzip)", chunk_rows=100)
+        self.addCleanup(os.remove, path)
+        self.assertEqual(name, "punch_report.csv.gz")
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            written = pd.read_csv(f, dtype=str, keep_default_na=False)
+        expected = reports.punch_report(self.frame, self.attendees).astype(str)
+        pd.testing.assert_frame_equal(written, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+# # tests/test_importer.py
+"""
+Roster validation and de-duplication before anything is inserted.
+
+    python -m unittest tests.test_importer
+"""
+import io
+import unittest
+
+import pandas as pd
+
+from importer import prepare_import, read_roster
+
+
+def _roster(*rows):
+    return pd.DataFrame(rows, columns=["name", "email"])
+
+
+def _reasons(rejected):
+    return dict(zip(rejected["email"], rejected["reason"]))
+
+
+class PrepareImportTest(unittest.TestCase):
+    def test_clean_rows_are_normalized(self):
+        accepted, rejected = prepare_import(_roster(("  Ann   Lee ", " Ann@X.com ")), set())
+        self.assertEqual(accepted.to_dict(orient="records"), [{"name": "Ann Lee", "email": "ann@x.com"}])
+        self.assertTrue(rejected.empty)
+
+    def test_rejection_reasons(self):
+        accepted, rejected = prepare_import(_roster(
+            ("", "noname@x.com"),
+            ("Bad Email", "not-an-email"),
+            ("Old Hand", "old@x.com"),
+            ("First", "dup@x.com"),
+            ("Second", "DUP@x.com"),
+        ), {"old@x.com"})
+        self.assertEqual(accepted["name"].tolist(), ["First"])
+        self.assertEqual(_reasons(rejected), {
+            "noname@x.com": "missing name",
+            "not-an-email": "invalid email",
+            "old@x.com":    "already registered",
+            "dup@x.com":    "duplicate in file",
+        })
+
+    def test_rejected_row_does_not_make_a_later_one_a_duplicate(self):
+        accepted, rejected = prepare_import(_roster(("", "a@x.com"), ("Ann", "a@x.com")), set())
+        self.assertEqual(accepted.to_dict(orient="records"), [{"name": "Ann", "email": "a@x.com"}])
+        self.assertEqual(rejected["reason"].tolist(), ["missing name"])
+
+    def test_read_roster_maps_vendor_headers(self):
+        csv = io.StringIO("First Name,Last Name,E-mail\nAnn,Lee,ann@x.com\n")
+        df = read_roster(csv, "roster.csv")
+        self.assertEqual(df.to_dict(orient="records"), [{"name": "Ann Lee", "email": "ann@x.com"}])
+        with self.assertRaises(ValueError):
+            read_roster(io.StringIO("Name\nAnn\n"), "roster.csv")
+
+
+if __name__ == "__main__":
+    unittest.main()
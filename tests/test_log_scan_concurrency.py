@@ -0,0 +1,87 @@
+# # tests/test_log_scan_concurrency.py
+"""
+log_scan against a real Postgres: many kiosks scanning one badge at once.
+
+    createdb cereport_test
+    DATABASE_URL=postgresql:///cereport_test python -m unittest tests.test_log_scan_concurrency
+
+Skipped unless DATABASE_URL is set. Point it at a scratch database: the
+migrations are applied to it and every test registers a fresh badge.
+"""
+import datetime
+import os
+import threading
+import unittest
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+SCANS = 16      # concurrent scans of one badge; slots run out after ten
+
+
+@unittest.skipUnless(os.getenv("DATABASE_URL"), "needs DATABASE_URL (a scratch Postgres)")
+class LogScanConcurrencyTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from backends import PostgresBackend
+        from migrate import connect, migrate
+        conn = connect()
+        try:
+            migrate(conn, log=lambda msg: None)
+        finally:
+            conn.close()
+        cls.backend = PostgresBackend(minconn=1, maxconn=SCANS)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.backend.close()
+
+    def setUp(self):
+        self.badge = self.backend.reserve_badge_ids(1)
+        self.backend.insert_attendees([{"badge_id": self.badge, "name": "Concurrency Test",
+                                        "email": f"test+{self.badge}@example.com"}])
+        # distinct timestamps, handed to threads that reach the server in any order
+        base = datetime.datetime.now(datetime.timezone.utc)
+        self.events = [((base + datetime.timedelta(milliseconds=i)).isoformat(),
+                        f"test-{uuid.uuid4().hex}") for i in range(SCANS)]
+
+    def _all_at_once(self, events) -> list[int | None]:
+        start = threading.Barrier(len(events))
+
+        def scan(event):
+            start.wait()
+            return self.backend.log_scan(self.badge, *event)
+
+        with ThreadPoolExecutor(len(events)) as pool:
+            return list(pool.map(scan, events))
+
+    def _scanlog_count(self) -> int:
+        with self.backend._cursor() as cur:
+            cur.execute("select count(*) from public.scanlog where badge_id = %s", (self.badge,))
+            return cur.fetchone()[0]
+
+    def test_concurrent_scans_claim_distinct_slots(self):
+        slots = self._all_at_once(self.events)
+        self.assertEqual(sorted(s for s in slots if s), list(range(1, 11)))
+        self.assertEqual(slots.count(0), SCANS - 10)
+        self.assertEqual(self._scanlog_count(), SCANS)
+
+        row = next(r for r in self.backend.fetch_scan_slots() if r["badge_id"] == self.badge)
+        self.assertEqual(row["scan_count"], SCANS)
+        self.assertTrue(all(row[f"scan{i}"] is not None for i in range(1, 11)))
+
+    def test_replays_are_no_ops(self):
+        self._all_at_once(self.events)
+        self.assertEqual(self._all_at_once(self.events), [-1] * SCANS)
+
+        # same keys, later timestamps: the queue retrying through log_scans
+        later = datetime.timedelta(seconds=1)
+        results = self.backend.log_scans(
+            [{"badge_id": self.badge, "key": key,
+              "timestamp": (datetime.datetime.fromisoformat(ts) + later).isoformat()}
+             for ts, key in self.events])
+        self.assertEqual([r["slot"] for r in results], [-1] * SCANS)
+        self.assertEqual(self._scanlog_count(), SCANS)
+
+
+if __name__ == "__main__":
+    unittest.main()
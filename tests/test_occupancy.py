@@ -0,0 +1,67 @@
+# # tests/test_occupancy.py
+"""
+Live occupancy: which block is running, and aggregates polled from SQLite.
+
+    python -m unittest tests.test_occupancy
+"""
+import datetime
+import unittest
+
+from backends import SqliteBackend
+from database import LOCAL_TZ
+from occupancy import Occupancy
+
+BLOCKS = [
+    {"title": "Morning",   "start": "2025-05-02 08:30", "end": "2025-05-02 10:00"},
+    {"title": "Afternoon", "start": "2025-05-02 13:30", "end": "2025-05-02 15:00"},
+]
+
+
+def _at(hhmm: str) -> datetime.datetime:
+    return datetime.datetime.fromisoformat(f"2025-05-02 {hhmm}")
+
+
+class BlockTest(unittest.TestCase):
+    def setUp(self):
+        self.occ = Occupancy(lambda last_id, limit: [], BLOCKS)
+
+    def test_current_block_only_while_running(self):
+        self.assertIsNone(self.occ.current_block(_at("08:00")))
+        self.assertEqual(self.occ.current_block(_at("08:30"))["title"], "Morning")
+        self.assertIsNone(self.occ.current_block(_at("10:00")))
+        self.assertEqual(self.occ.current_block(_at("14:59"))["title"], "Afternoon")
+
+    def test_next_block(self):
+        self.assertEqual(self.occ.next_block(_at("08:00"))["title"], "Morning")
+        self.assertEqual(self.occ.next_block(_at("09:00"))["title"], "Afternoon")
+        self.assertIsNone(self.occ.next_block(_at("13:30")))
+        self.assertIsNone(self.occ.next_block(_at("08:00") + datetime.timedelta(days=1)))
+
+
+class PollTest(unittest.TestCase):
+    def setUp(self):
+        self.backend = SqliteBackend(":memory:")
+        self.occ = Occupancy(self.backend.fetch_scans_after, BLOCKS)
+
+    def _scan(self, badge: int, hhmm: str):
+        self.backend.log_scan(badge, _at(hhmm).replace(tzinfo=LOCAL_TZ).isoformat(), None)
+
+    def test_present_and_no_checkout(self):
+        self._scan(1, "08:20")
+        self._scan(2, "08:25")
+        self._scan(2, "12:00")
+        self.assertEqual(self.occ.poll(), 3)
+        self.assertEqual(self.occ.present(0), {1, 2})
+        self.assertEqual(self.occ.no_checkout(_at("00:00").date()), [(1, _at("08:20"))])
+
+        self._scan(1, "09:00")                      # checked out before the morning ended
+        self.assertEqual(self.occ.poll(), 1)
+        self.assertEqual(self.occ.no_checkout(_at("00:00").date()), [])
+        self.assertEqual(self.occ.present(1), set())
+        self.assertEqual(self.occ.poll(), 0)
+        counts = {c["session"]: c["present"] for c in self.occ.session_counts(roster_size=3)}
+        self.assertEqual(counts, {"Morning": 2, "Afternoon": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+# # tests/test_reports.py
+"""
+The vectorized reports against the original row-by-row code, with the scans
+stored in and synced back from the SQLite backend; and the paged punch report
+query against the vectorized report.
+
+    python -m unittest tests.test_reports
+"""
+import datetime
+import unittest
+
+import pandas as pd
+
+import database
+import reports
+from backends import SqliteBackend
+from benchmarks.reports import (as_scan_log, legacy_all_scans, legacy_flattened_log,
+                                legacy_punch_report, synthetic)
+
+
+class _SyncedScans(unittest.TestCase):
+    """Synthetic scans stored in SQLite, synced back as the scan frame."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.attendees, scans = synthetic(2_000, 150, seed=1)
+        backend = SqliteBackend(":memory:")
+        backend.insert_attendees(cls.attendees)
+        # stored as Chicago wall-clock times with their offset, read back as local
+        local = scans["timestamp"].dt.tz_localize(database.LOCAL_TZ)
+        backend.log_scans([{"badge_id": b, "timestamp": t.isoformat(), "key": None}
+                           for b, t in zip(scans["badge_id"].tolist(), local)])
+        database.set_backend(backend)
+        cls.frame = database.get_scan_frame()
+        cls.logs = as_scan_log(scans)
+
+    @classmethod
+    def tearDownClass(cls):
+        database.set_backend(SqliteBackend(":memory:"))
+
+
+class ReportsTest(_SyncedScans):
+    def test_scan_store_round_trip(self):
+        self.assertEqual(len(self.frame), len(self.logs))
+        self.assertEqual(str(self.frame["timestamp"].dtype), "datetime64[ns]")
+
+    def test_punch_report_matches_legacy(self):
+        pd.testing.assert_frame_equal(legacy_punch_report(self.attendees, self.logs),
+                                      reports.punch_report(self.frame, self.attendees))
+
+    def test_flattened_log_matches_legacy(self):
+        pd.testing.assert_frame_equal(legacy_flattened_log(self.attendees, self.logs),
+                                      reports.flattened_log(self.frame, self.attendees))
+
+    def test_all_scans_matches_legacy(self):
+        pd.testing.assert_frame_equal(legacy_all_scans(self.attendees, self.logs),
+                                      reports.all_scans_table(self.frame, self.attendees))
+
+    def test_empty_log(self):
+        none = self.frame.iloc[:0]
+        self.assertEqual(len(reports.punch_report(none, self.attendees)), 0)
+        self.assertEqual(len(reports.all_scans_table(none, self.attendees)), len(self.attendees))
+
+
+class PunchReportQueryTest(_SyncedScans):
+    def _query(self, **filters) -> pd.DataFrame:
+        rows, total = database.query_punch_report(page_size=100_000, **filters)
+        self.assertEqual(total, len(rows))
+        return reports.punch_page_frame(rows)
+
+    def _expected(self, keep) -> pd.DataFrame:
+        full = reports.punch_report(self.frame, self.attendees)
+        return full[keep(full)].reset_index(drop=True)
+
+    def test_unfiltered(self):
+        pd.testing.assert_frame_equal(self._query(), self._expected(lambda d: d.index >= 0))
+
+    def test_filters(self):
+        day = datetime.date(2025, 5, 3)
+        cases = [
+            ({"day": day},                       lambda d: d["Date"] == day.isoformat()),
+            ({"badge_min": 40, "badge_max": 60}, lambda d: d["Badge ID"].between(40, 60)),
+            ({"search": "ATTENDEE 1"},           lambda d: d["Name"].str.contains("Attendee 1", regex=False)),
+            ({"search": "a12@"},                 lambda d: d["Email"].str.startswith("a12@")),
+            ({"missed_only": True},              lambda d: d["Check‑In"] == d["Check‑Out"]),
+        ]
+        for filters, keep in cases:
+            with self.subTest(**filters):
+                expected = self._expected(keep)
+                self.assertGreater(len(expected), 0)
+                pd.testing.assert_frame_equal(self._query(**filters), expected)
+
+    def test_pages(self):
+        first, total = database.query_punch_report(page=0, page_size=50)
+        second, _ = database.query_punch_report(page=1, page_size=50)
+        everything, _ = database.query_punch_report(page_size=100_000)
+        self.assertEqual((len(first), first + second), (50, everything[:100]))
+        self.assertEqual(database.query_punch_report(page=total, page_size=50), ([], 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
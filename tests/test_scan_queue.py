@@ -0,0 +1,91 @@
+# # tests/test_scan_queue.py
+"""
+ScanQueue draining into the SQLite backend, including a scan the server rejects.
+
+    python -m unittest tests.test_scan_queue
+"""
+import os
+import tempfile
+import unittest
+
+from backends import SqliteBackend
+from scan_queue import ScanQueue
+
+POISON = 666      # a badge the fake server refuses
+
+
+class ScanQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.backend = SqliteBackend(":memory:")
+        self.backend.insert_attendees([{"badge_id": b, "name": f"A{b}", "email": f"a{b}@example.com"}
+                                       for b in (1, 2, 3)])
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "queue.db")
+        self.online = True
+
+    def _send(self, events):
+        if not self.online:
+            raise ConnectionError("offline")
+        if any(e["badge_id"] == POISON for e in events):
+            raise ValueError(f"badge {POISON} rejected")
+        self.backend.log_scans([{"badge_id": e["badge_id"], "timestamp": e["timestamp"],
+                                 "key": e["id"]} for e in events])
+
+    def _queue(self, **kw) -> ScanQueue:
+        q = ScanQueue(self._send, path=self.path, **kw)
+        self.addCleanup(q._conn.close)
+        return q
+
+    def _put(self, q, badge, second):
+        return q.put(badge, f"2025-05-02T13:00:{second:02d}+00:00", "door-1")
+
+    def test_flush_sends_everything_once(self):
+        q = self._queue(batch_size=2)
+        for i, badge in enumerate((1, 2, 3, 1)):
+            self._put(q, badge, i)
+        self.assertEqual(q.flush(), 4)
+        self.assertEqual(q.flush(), 0)
+        self.assertEqual(len(self.backend.fetch_scans_after(0, 100)), 4)
+        self.assertEqual(q.stats()["depth"], 0)
+
+    def test_offline_keeps_scans_queued(self):
+        q = self._queue()
+        self._put(q, 1, 0)
+        self.online = False
+        self.assertEqual(q.flush(), 0)
+        self.assertEqual((q.stats()["depth"], q.stats()["failed"]), (1, 0))
+        self.assertIn("offline", q.stats()["last_error"])
+        self.online = True
+        self.assertEqual(q.flush(), 1)
+        self.assertIsNone(q.stats()["last_error"])
+
+    def test_poison_scan_is_set_aside(self):
+        q = self._queue(max_attempts=2)
+        self._put(q, POISON, 0)
+        for i, badge in enumerate((1, 2, 3), 1):
+            self._put(q, badge, i)
+        self.assertEqual(q.flush_once(), 0)          # first failure: retried as a batch
+        self.assertEqual(q.flush_once(), 3)          # second: the poison row is isolated
+        self.assertEqual(q.stats()["depth"], 0)
+        self.assertEqual(q.stats()["failed"], 1)
+        self.assertEqual(sorted(r["badge_id"] for r in self.backend.fetch_scans_after(0, 100)),
+                         [1, 2, 3])
+        error, = q._conn.execute("SELECT error FROM scans WHERE failed_at IS NOT NULL").fetchone()
+        self.assertIn("rejected", error)
+
+    def test_nothing_set_aside_while_offline(self):
+        q = self._queue(max_attempts=1)
+        self._put(q, POISON, 0)
+        self._put(q, 1, 1)
+        self.online = False
+        self.assertEqual(q.flush(), 0)
+        self.assertEqual((q.stats()["depth"], q.stats()["failed"]), (2, 0))
+
+    def test_journal_survives_a_restart(self):
+        self._put(self._queue(), 1, 0)
+        self.assertEqual(self._queue().flush(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
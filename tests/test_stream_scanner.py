@@ -0,0 +1,53 @@
+# # tests/test_stream_scanner.py
+"""
+ScannerPool: one scanner per key, stopped only when its last user releases it.
+
+    python -m unittest tests.test_stream_scanner
+"""
+import unittest
+
+from stream_scanner import ScannerPool
+
+
+class _FakeScanner:
+    def __init__(self, key):
+        self.key     = key
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+
+
+class ScannerPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.built = []
+        self.pool  = ScannerPool(lambda key: self.built.append(_FakeScanner(key)) or self.built[-1])
+
+    def test_shared_until_last_user_releases(self):
+        a = self.pool.acquire(("0", "door"), "s1")
+        self.assertIs(self.pool.acquire(("0", "door"), "s2"), a)
+        self.assertIs(self.pool.acquire(("0", "door"), "s1"), a)     # rerun, same session
+        self.assertEqual((len(self.built), self.pool.users(("0", "door"))), (1, 2))
+
+        self.pool.release(("0", "door"), "s1")
+        self.assertFalse(a.stopped)
+        self.pool.release(("0", "door"), "s2")
+        self.assertTrue(a.stopped)
+        self.assertIsNot(self.pool.acquire(("0", "door"), "s1"), a)  # started afresh
+
+    def test_release_leaves_other_keys_running(self):
+        door = self.pool.acquire(("0", "door"), "s1")
+        hall = self.pool.acquire(("1", "hall"), "s2")
+        self.pool.release(("0", "door"), "s1")
+        self.assertEqual((door.stopped, hall.stopped), (True, False))
+        self.assertEqual(self.pool.users(("1", "hall")), 1)
+
+    def test_release_never_builds_a_scanner(self):
+        self.pool.release(("0", "door"), "s1")
+        self.pool.acquire(("0", "door"), "s1")
+        self.pool.release(("0", "door"), "s2")                       # not a user
+        self.assertEqual((len(self.built), self.built[0].stopped), (1, False))
+
+
+if __name__ == "__main__":
+    unittest.main()